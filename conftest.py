@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Shared pytest fixtures
+Polling helper for background workers and temporary SQLite paths
+"""
+
+import time
+
+import pytest
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def wait_for():
+    """Poll predicate() until it is true or timeout seconds pass (returns whether it became true)"""
+    return _wait_for
+
+
+@pytest.fixture
+def tmp_db(tmp_path):
+    """SQLite path in the test's temp directory: tmp_db('jobs') -> <tmp>/jobs.db (same name, same file)"""
+    return lambda name='test': str(tmp_path / f'{name}.db')
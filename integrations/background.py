@@ -0,0 +1,135 @@
+"""
+Background Executor
+Bounded worker pool for webhook work that must not block the HTTP response
+"""
+
+import os
+import time
+import queue
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Dict, Any, Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundExecutor:
+    """Runs named tasks on a fixed pool of threads behind a bounded queue"""
+
+    def __init__(self, workers: int = None, max_queue: int = None):
+        """
+        Args:
+            workers: Number of worker threads
+            max_queue: Tasks that may wait before submit() starts rejecting
+        """
+        self.num_workers = workers or int(os.getenv('BACKGROUND_WORKERS', '4'))
+        self.max_queue = max_queue or int(os.getenv('BACKGROUND_QUEUE_SIZE', '100'))
+
+        self._queue: queue.Queue = queue.Queue(maxsize=self.max_queue)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waits: deque = deque(maxlen=500)
+        self._counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0}
+        self._tasks: Dict[str, Dict[str, float]] = {}
+
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._worker_loop, name=f'background-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, name: str, fn: Callable, *args, **kwargs) -> bool:
+        """
+        Queue a task; coroutine functions are run to completion with asyncio.run
+
+        Args:
+            name: Task name used for per-task timing metrics (e.g. 'slack.message')
+            fn: Callable (sync or async) to run
+
+        Returns:
+            False if the queue is full and the task was rejected
+        """
+        try:
+            self._queue.put_nowait((name, fn, args, kwargs, time.monotonic()))
+        except queue.Full:
+            with self._lock:
+                self._counters['rejected'] += 1
+            logger.warning(f"Background queue full, rejected {name}")
+            return False
+
+        with self._lock:
+            self._counters['submitted'] += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, wait-time percentiles and per-task run times"""
+        with self._lock:
+            waits = sorted(self._waits)
+            tasks = {
+                name: {
+                    'count': t['count'],
+                    'errors': t['errors'],
+                    'avg_seconds': round(t['total'] / t['count'], 3) if t['count'] else 0.0,
+                    'max_seconds': round(t['max'], 3)
+                }
+                for name, t in self._tasks.items()
+            }
+            stats = dict(self._counters)
+            stats['active'] = self._active
+
+        def percentile(p: float) -> float:
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))], 3) if waits else 0.0
+
+        stats.update({
+            'queue_depth': self._queue.qsize(),
+            'max_queue': self.max_queue,
+            'workers': self.num_workers,
+            'wait_seconds': {'p50': percentile(0.5), 'p95': percentile(0.95), 'max': percentile(1.0)},
+            'tasks': tasks
+        })
+        return stats
+
+    def shutdown(self, timeout: float = 30.0):
+        """Let workers finish queued tasks, then stop them"""
+        for _ in self._threads:
+            try:
+                self._queue.put((None, None, (), {}, time.monotonic()), timeout=timeout)
+            except queue.Full:
+                break
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0, deadline - time.monotonic()))
+        self._threads = []
+
+    def _worker_loop(self):
+        while True:
+            name, fn, args, kwargs, enqueued_at = self._queue.get()
+            if fn is None:
+                return
+
+            started = time.monotonic()
+            with self._lock:
+                self._active += 1
+                self._waits.append(started - enqueued_at)
+
+            failed = False
+            try:
+                result = fn(*args, **kwargs)
+                if asyncio.iscoroutine(result):
+                    asyncio.run(result)
+            except Exception as e:
+                failed = True
+                logger.error(f"Background task {name} failed: {e}")
+
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._active -= 1
+                self._counters['failed' if failed else 'completed'] += 1
+                task = self._tasks.setdefault(name, {'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0})
+                task['count'] += 1
+                task['total'] += elapsed
+                task['max'] = max(task['max'], elapsed)
+                if failed:
+                    task['errors'] += 1
@@ -0,0 +1,453 @@
+"""
+Bulk Deliverable Generation
+Submits many client briefs through Anthropic's Message Batches API and stores the results,
+with a bounded-concurrency direct-call fallback when batching is unavailable
+"""
+
+import os
+import json
+import uuid
+import time
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class AnthropicBatchAdapter:
+    """Adapter over Anthropic's Message Batches API"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def is_available(self) -> bool:
+        """Check the SDK exposes the batches API and a key is configured"""
+        return (bool(os.getenv('ANTHROPIC_API_KEY')) and
+                hasattr(getattr(self.client, 'messages', None), 'batches'))
+
+    def submit(self, requests: List[Dict[str, Any]]) -> str:
+        """
+        Create a message batch
+
+        Args:
+            requests: List of {'custom_id': ..., 'params': {...messages.create kwargs}}
+
+        Returns:
+            Provider batch id
+        """
+        batch = self.client.messages.batches.create(requests=requests)
+        return batch.id
+
+    def is_finished(self, provider_batch_id: str) -> bool:
+        """Check whether the provider has finished processing the batch"""
+        batch = self.client.messages.batches.retrieve(provider_batch_id)
+        return batch.processing_status == 'ended'
+
+    def results(self, provider_batch_id: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Yield (custom_id, result) for every request in a finished batch
+
+        Results use the call_claude shape: {'success', 'response', 'usage'} or {'success': False, 'error'}
+        """
+        for entry in self.client.messages.batches.results(provider_batch_id):
+            result = entry.result
+            if result.type == 'succeeded':
+                message = result.message
+                yield entry.custom_id, {
+                    'success': True,
+                    'response': ''.join(
+                        block.text for block in message.content if getattr(block, 'type', '') == 'text'
+                    ),
+                    'usage': {
+                        'input_tokens': message.usage.input_tokens,
+                        'output_tokens': message.usage.output_tokens,
+                        'cache_creation_tokens': getattr(message.usage, 'cache_creation_input_tokens', 0) or 0,
+                        'cache_read_tokens': getattr(message.usage, 'cache_read_input_tokens', 0) or 0
+                    }
+                }
+            else:
+                error = getattr(result, 'error', None)
+                yield entry.custom_id, {
+                    'success': False,
+                    'error': str(getattr(error, 'error', error) or result.type)
+                }
+
+
+class LocalBatchAdapter:
+    """In-process stand-in for the Message Batches API (tests and local development)"""
+
+    def __init__(self, generate_fn: Callable[[Dict[str, Any]], Dict[str, Any]]):
+        """
+        Args:
+            generate_fn: Callable taking messages.create params and returning a call_claude-style result
+        """
+        self.generate_fn = generate_fn
+        self._batches: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        return True
+
+    def submit(self, requests: List[Dict[str, Any]]) -> str:
+        provider_batch_id = f"local_{uuid.uuid4().hex[:12]}"
+        results = [(req['custom_id'], self.generate_fn(req['params'])) for req in requests]
+        with self._lock:
+            self._batches[provider_batch_id] = results
+        return provider_batch_id
+
+    def is_finished(self, provider_batch_id: str) -> bool:
+        return True
+
+    def results(self, provider_batch_id: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            results = list(self._batches.get(provider_batch_id, []))
+        return iter(results)
+
+
+class BatchManager:
+    """
+    Tracks bulk deliverable batches in SQLite and polls the provider for results
+
+    Each in-progress batch is leased to one process (owner + locked_until).
+    The owner renews its leases on every poll; another process only picks a
+    batch up once its lease has expired, so several workers (or a restart
+    overlapping a deploy) never submit or collect the same batch twice.
+    """
+
+    def __init__(self, adapter, build_params: Callable[[str, Any], Dict[str, Any]],
+                 fallback_generate: Callable[[str, Any], Dict[str, Any]],
+                 db_path: str = None, poll_interval: float = None, fallback_workers: int = None,
+                 lease: float = None):
+        """
+        Args:
+            adapter: Batch API adapter (AnthropicBatchAdapter or LocalBatchAdapter)
+            build_params: Callable (deliverable, client_data) -> messages.create params
+            fallback_generate: Callable (deliverable, client_data) -> call_claude-style result,
+                used when the batch API is unavailable
+            db_path: SQLite file for batch state
+            poll_interval: Seconds between provider status polls
+            fallback_workers: Concurrency limit for the direct-call fallback
+            lease: Seconds a batch stays claimed by this process without a renewal
+        """
+        self.adapter = adapter
+        self.build_params = build_params
+        self.fallback_generate = fallback_generate
+        self.db_path = db_path or os.getenv('BATCH_DB_PATH', 'data/batches.sqlite3')
+        self.poll_interval = poll_interval or float(os.getenv('BATCH_POLL_INTERVAL', '30'))
+        self.lease = lease or float(os.getenv('BATCH_LEASE_SECONDS', '300'))
+        self.instance_id = uuid.uuid4().hex[:12]
+        self.executor = ThreadPoolExecutor(
+            max_workers=fallback_workers or int(os.getenv('BATCH_FALLBACK_WORKERS', '4')),
+            thread_name_prefix='batch-fallback'
+        )
+
+        self._poller: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._wakeup = threading.Event()
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._init_db()
+
+    # =========================================================================
+    # STORAGE
+    # =========================================================================
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS batches (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    mode TEXT NOT NULL,
+                    provider_batch_id TEXT,
+                    error TEXT,
+                    owner TEXT,
+                    locked_until REAL,
+                    created_at REAL NOT NULL,
+                    finished_at REAL
+                )
+            """)
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(batches)')}
+            for column, kind in (('owner', 'TEXT'), ('locked_until', 'REAL')):
+                if column not in columns:
+                    # Databases created before batches were leased
+                    conn.execute(f'ALTER TABLE batches ADD COLUMN {column} {kind}')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS batch_items (
+                    batch_id TEXT NOT NULL,
+                    custom_id TEXT NOT NULL,
+                    brief_id TEXT NOT NULL,
+                    deliverable TEXT NOT NULL,
+                    client_data TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    response TEXT,
+                    usage TEXT,
+                    error TEXT,
+                    PRIMARY KEY (batch_id, custom_id)
+                )
+            """)
+
+    # =========================================================================
+    # PUBLIC API
+    # =========================================================================
+
+    def submit(self, briefs: List[Dict[str, Any]], deliverables: List[str]) -> str:
+        """
+        Queue deliverables for many client briefs
+
+        Args:
+            briefs: List of {'id': optional client reference, 'client_data': {...}}
+            deliverables: Deliverable keys to generate for every brief
+
+        Returns:
+            Batch id
+        """
+        batch_id = uuid.uuid4().hex
+        items = []
+        for index, brief in enumerate(briefs):
+            brief_id = str(brief.get('id') or index)
+            for deliverable in deliverables:
+                items.append({
+                    'custom_id': f"{index}-{deliverable}",
+                    'brief_id': brief_id,
+                    'deliverable': deliverable,
+                    'client_data': brief.get('client_data', {})
+                })
+
+        mode = 'batch_api'
+        provider_batch_id = None
+        error = None
+        if self.adapter and self.adapter.is_available():
+            try:
+                provider_batch_id = self.adapter.submit([
+                    {'custom_id': item['custom_id'],
+                     'params': self.build_params(item['deliverable'], item['client_data'])}
+                    for item in items
+                ])
+            except Exception as e:
+                logger.warning(f"Batch API submit failed, using direct calls: {e}")
+                error = f"Batch API unavailable: {e}"
+                mode = 'direct'
+        else:
+            mode = 'direct'
+
+        with self._connect() as conn:
+            now = time.time()
+            conn.execute(
+                'INSERT INTO batches (id, status, mode, provider_batch_id, error, owner, locked_until, created_at) '
+                "VALUES (?, 'in_progress', ?, ?, ?, ?, ?, ?)",
+                (batch_id, mode, provider_batch_id, error, self.instance_id, now + self.lease, now)
+            )
+            conn.executemany(
+                'INSERT INTO batch_items (batch_id, custom_id, brief_id, deliverable, client_data, status) '
+                "VALUES (?, ?, ?, ?, ?, 'pending')",
+                [(batch_id, item['custom_id'], item['brief_id'], item['deliverable'],
+                  json.dumps(item['client_data'], default=str)) for item in items]
+            )
+
+        logger.info(f"Batch {batch_id} submitted ({mode}, {len(items)} requests)")
+        if mode == 'direct':
+            self._run_direct(batch_id)
+        else:
+            self.start()
+            self._wakeup.set()
+        return batch_id
+
+    def get(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Batch status with results grouped by brief"""
+        with self._connect() as conn:
+            batch = conn.execute('SELECT * FROM batches WHERE id = ?', (batch_id,)).fetchone()
+            if not batch:
+                return None
+            items = conn.execute(
+                'SELECT * FROM batch_items WHERE batch_id = ? ORDER BY rowid', (batch_id,)
+            ).fetchall()
+
+        briefs: Dict[str, Dict[str, Any]] = {}
+        counts = {'pending': 0, 'succeeded': 0, 'failed': 0}
+        for item in items:
+            counts[item['status']] = counts.get(item['status'], 0) + 1
+            entry = briefs.setdefault(item['brief_id'], {
+                'brief_id': item['brief_id'], 'deliverables': {}, 'errors': {}
+            })
+            if item['status'] == 'succeeded':
+                entry['deliverables'][item['deliverable']] = {
+                    'content': item['response'],
+                    'usage': json.loads(item['usage'] or '{}')
+                }
+            elif item['status'] == 'failed':
+                entry['errors'][item['deliverable']] = item['error']
+
+        return {
+            'batch_id': batch['id'],
+            'status': batch['status'],
+            'mode': batch['mode'],
+            'error': batch['error'],
+            'counts': counts,
+            'created_at': datetime.utcfromtimestamp(batch['created_at']).isoformat() + 'Z',
+            'finished_at': (datetime.utcfromtimestamp(batch['finished_at']).isoformat() + 'Z'
+                            if batch['finished_at'] else None),
+            'results': list(briefs.values())
+        }
+
+    def start(self):
+        """Start the poller (which also resumes direct-mode batches whose lease expired)"""
+        if self._poller and self._poller.is_alive():
+            return
+        self._stopping.clear()
+        self._poller = threading.Thread(target=self._poll_loop, name='batch-poller', daemon=True)
+        self._poller.start()
+
+    def shutdown(self):
+        """Stop polling and wait for direct-mode work in flight"""
+        self._stopping.set()
+        self._wakeup.set()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    # =========================================================================
+    # LEASES
+    # =========================================================================
+
+    def _claim(self, batch_id: str) -> bool:
+        """Take over an in-progress batch that nobody holds a live lease on"""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE batches SET owner = ?, locked_until = ? "
+                "WHERE id = ? AND status = 'in_progress' "
+                "AND (owner = ? OR owner IS NULL OR COALESCE(locked_until, 0) < ?)",
+                (self.instance_id, now + self.lease, batch_id, self.instance_id, now)
+            )
+        return bool(cursor.rowcount)
+
+    def _renew_leases(self):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE batches SET locked_until = ? WHERE owner = ? AND status = 'in_progress'",
+                (time.time() + self.lease, self.instance_id)
+            )
+
+    def _resume_direct(self):
+        """Run direct-mode batches abandoned by a stopped process"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id FROM batches WHERE status = 'in_progress' AND mode = 'direct' "
+                "AND (owner IS NULL OR COALESCE(locked_until, 0) < ?)",
+                (time.time(),)
+            ).fetchall()
+        for row in rows:
+            if self._claim(row['id']):
+                logger.info(f"Resuming direct-mode batch {row['id']}")
+                self._run_direct(row['id'])
+
+    # =========================================================================
+    # PROCESSING
+    # =========================================================================
+
+    def _store_result(self, batch_id: str, custom_id: str, result: Dict[str, Any]):
+        with self._connect() as conn:
+            if result.get('success'):
+                conn.execute(
+                    "UPDATE batch_items SET status = 'succeeded', response = ?, usage = ?, error = NULL "
+                    'WHERE batch_id = ? AND custom_id = ?',
+                    (result.get('response', ''), json.dumps(result.get('usage', {})), batch_id, custom_id)
+                )
+            else:
+                conn.execute(
+                    "UPDATE batch_items SET status = 'failed', error = ? WHERE batch_id = ? AND custom_id = ?",
+                    (result.get('error', 'Unknown error'), batch_id, custom_id)
+                )
+
+    def _finish(self, batch_id: str):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE batch_items SET status = 'failed', error = 'No result returned' "
+                "WHERE batch_id = ? AND status = 'pending'",
+                (batch_id,)
+            )
+            conn.execute(
+                "UPDATE batches SET status = 'ended', finished_at = ? WHERE id = ?",
+                (time.time(), batch_id)
+            )
+        logger.info(f"Batch {batch_id} ended")
+
+    def _run_direct(self, batch_id: str):
+        """Generate pending items with regular calls through the bounded executor"""
+        with self._connect() as conn:
+            items = conn.execute(
+                "SELECT custom_id, deliverable, client_data FROM batch_items "
+                "WHERE batch_id = ? AND status = 'pending'",
+                (batch_id,)
+            ).fetchall()
+
+        remaining = [len(items)]
+        lock = threading.Lock()
+
+        def run(custom_id: str, deliverable: str, client_data: Dict):
+            try:
+                result = self.fallback_generate(deliverable, client_data)
+            except Exception as e:
+                result = {'success': False, 'error': str(e)}
+            self._store_result(batch_id, custom_id, result)
+            with lock:
+                remaining[0] -= 1
+                done = remaining[0] == 0
+            if done:
+                self._finish(batch_id)
+
+        if not items:
+            self._finish(batch_id)
+            return
+        for item in items:
+            self.executor.submit(run, item['custom_id'], item['deliverable'], json.loads(item['client_data']))
+
+    def _poll_once(self):
+        """Renew our leases, resume abandoned direct batches and collect finished provider batches"""
+        self._renew_leases()
+        self._resume_direct()
+        if not self.adapter:
+            return
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, provider_batch_id FROM batches "
+                "WHERE status = 'in_progress' AND mode = 'batch_api'"
+            ).fetchall()
+
+        for row in rows:
+            # One failing provider batch must not hold up the others
+            try:
+                if not self._claim(row['id']) or not self.adapter.is_finished(row['provider_batch_id']):
+                    continue
+                for custom_id, result in self.adapter.results(row['provider_batch_id']):
+                    self._store_result(row['id'], custom_id, result)
+                self._finish(row['id'])
+            except Exception as e:
+                logger.error(f"Batch {row['id']} poll error: {e}")
+
+    def _poll_loop(self):
+        while not self._stopping.is_set():
+            try:
+                self._poll_once()
+            except Exception as e:
+                logger.error(f"Batch poll error: {e}")
+
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
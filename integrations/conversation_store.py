@@ -0,0 +1,404 @@
+"""
+Conversation Store
+Write-behind persistence for Slack conversations with bulk inserts and a local SQLite journal
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timezone
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def _transaction(conn: sqlite3.Connection):
+    """One transaction for a multi-row statement (autocommit would commit every row)"""
+    conn.execute('BEGIN')
+    try:
+        yield conn
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+
+
+class SupabaseConversationRepository:
+    """Conversation rows in the Supabase 'conversations' table"""
+
+    def __init__(self, client, table: str = 'conversations'):
+        self.client = client
+        self.table = table
+
+    def insert_many(self, rows: List[Dict[str, Any]]):
+        """Insert rows in one request (raises on failure)"""
+        self.client.table(self.table).insert(rows).execute()
+
+
+class SQLiteConversationRepository:
+    """Conversation rows in a local SQLite table (tests and local development)"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS conversations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    channel_id TEXT,
+                    thread_ts TEXT,
+                    user_id TEXT,
+                    user_message TEXT,
+                    assistant_response TEXT,
+                    actions_taken TEXT,
+                    metadata TEXT,
+                    created_at TEXT
+                )
+            """)
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(conversations)')}
+            if 'created_at' not in columns:
+                conn.execute('ALTER TABLE conversations ADD COLUMN created_at TEXT')
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def insert_many(self, rows: List[Dict[str, Any]]):
+        with self._connect() as conn, _transaction(conn):
+            conn.executemany(
+                'INSERT INTO conversations (channel_id, thread_ts, user_id, user_message, '
+                'assistant_response, actions_taken, metadata, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (row.get('channel_id'), row.get('thread_ts'), row.get('user_id'), row.get('user_message'),
+                     row.get('assistant_response'), json.dumps(row.get('actions_taken', [])),
+                     json.dumps(row.get('metadata', {})), row.get('created_at'))
+                    for row in rows
+                ]
+            )
+
+    def list_recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent rows first"""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT * FROM conversations ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+        return [
+            {**dict(row), 'actions_taken': json.loads(row['actions_taken']), 'metadata': json.loads(row['metadata'])}
+            for row in rows
+        ]
+
+
+class ConversationWriter:
+    """
+    Buffers conversation rows and writes them in bulk from a background thread
+
+    A batch is flushed when batch_size rows are waiting or flush_interval
+    seconds have passed. Failed inserts are retried with backoff; a batch
+    that still fails is split in halves until the rows the repository
+    rejects on their own are isolated, so one bad row does not hold back
+    the rest. Rows that could not be written are spilled to a SQLite
+    journal, which is replayed once the repository accepts writes again
+    (and on the next start); a row rejected max_row_attempts times is kept
+    there as 'dead' instead of being retried. shutdown() flushes whatever
+    is buffered.
+    """
+
+    # Failed inserts in a row while splitting a batch before the repository is assumed down
+    SPLIT_FAILURE_LIMIT = 4
+
+    def __init__(self, repository, journal_path: str = None, batch_size: int = None,
+                 flush_interval: float = None, max_attempts: int = 3, max_buffer: int = 1000,
+                 retry_backoff: float = 0.5, journal_retry_max: float = 300.0, max_row_attempts: int = None):
+        """
+        Args:
+            repository: Object with insert_many(rows) (Supabase or SQLite repository)
+            journal_path: SQLite file for rows that could not be written
+            batch_size: Rows per bulk insert
+            flush_interval: Seconds a row may wait in the buffer
+            max_attempts: Insert attempts per batch before it is journaled
+            max_buffer: Buffered rows before the oldest are journaled directly
+            retry_backoff: Seconds before the first retry (doubles each attempt)
+            journal_retry_max: Upper bound on the delay between journal replays
+            max_row_attempts: Times a row may be rejected on its own before it is dead-lettered
+        """
+        self.repository = repository
+        self.journal_path = journal_path or os.getenv('CONVERSATION_JOURNAL_PATH', 'data/conversations.sqlite3')
+        self.batch_size = batch_size or int(os.getenv('CONVERSATION_BATCH_SIZE', '50'))
+        self.flush_interval = flush_interval or float(os.getenv('CONVERSATION_FLUSH_INTERVAL', '5'))
+        self.max_attempts = max_attempts
+        self.max_buffer = max_buffer
+        self.retry_backoff = retry_backoff
+        self.journal_retry_max = journal_retry_max
+        self.max_row_attempts = max_row_attempts or int(os.getenv('CONVERSATION_MAX_ROW_ATTEMPTS', '5'))
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._journal_retry_at = 0.0
+        self._journal_failures = 0
+        self._stats = {'written': 0, 'batches': 0, 'retries': 0, 'journaled': 0, 'replayed': 0,
+                       'rejected': 0, 'dead_lettered': 0}
+
+        directory = os.path.dirname(self.journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS journal (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    row TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL DEFAULT 'pending'
+                )
+            """)
+            # Journals written before rows were retried individually lack these columns
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(journal)')}
+            if 'attempts' not in columns:
+                conn.execute('ALTER TABLE journal ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0')
+            if 'status' not in columns:
+                conn.execute("ALTER TABLE journal ADD COLUMN status TEXT NOT NULL DEFAULT 'pending'")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.journal_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # =========================================================================
+    # PUBLIC API
+    # =========================================================================
+
+    def write(self, row: Dict[str, Any]):
+        """Queue a row (returns immediately; the row is JSON-normalized and timestamped now)"""
+        # Stamped here so a row replayed from the journal keeps the time of the conversation
+        row = {**row, 'created_at': row.get('created_at') or datetime.now(timezone.utc).isoformat()}
+        row = json.loads(json.dumps(row, default=str))
+        overflow = []
+        with self._cond:
+            self._buffer.append(row)
+            if len(self._buffer) > self.max_buffer:
+                overflow = self._buffer[:self.batch_size]
+                del self._buffer[:len(overflow)]
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+        if overflow:
+            self._spill(overflow)
+        self.start()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            counts = dict(conn.execute('SELECT status, COUNT(*) FROM journal GROUP BY status').fetchall())
+        with self._cond:
+            stats = dict(self._stats)
+            stats['buffered'] = len(self._buffer)
+        stats['journal_pending'] = counts.get('pending', 0)
+        stats['journal_dead'] = counts.get('dead', 0)
+        return stats
+
+    def start(self):
+        """Start the writer thread (also replays rows journaled by an earlier run)"""
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='conversation-writer', daemon=True)
+            self._thread.start()
+
+    def shutdown(self, timeout: float = 10.0):
+        """Flush buffered rows (journaling any that can't be written) and stop"""
+        if not self._thread:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        self._thread = None
+
+        # Anything left (e.g. the join timed out) goes to the journal, not the void
+        with self._cond:
+            leftover, self._buffer = self._buffer, []
+        if leftover:
+            self._spill(leftover)
+
+    # =========================================================================
+    # WRITER
+    # =========================================================================
+
+    def _next_batch(self) -> Tuple[List[Dict[str, Any]], bool]:
+        with self._cond:
+            deadline = time.monotonic() + self.flush_interval
+            while len(self._buffer) < self.batch_size and not self._stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._buffer[:self.batch_size]
+            del self._buffer[:len(batch)]
+            return batch, self._stopping and not self._buffer
+
+    def _insert(self, rows: List[Dict[str, Any]], attempts: int) -> bool:
+        for attempt in range(attempts):
+            try:
+                self.repository.insert_many(rows)
+                return True
+            except Exception as e:
+                if attempt + 1 < attempts:
+                    with self._cond:
+                        self._stats['retries'] += 1
+                    time.sleep(self.retry_backoff * (2 ** attempt))
+                else:
+                    logger.warning(f"Conversation insert of {len(rows)} rows failed: {e}")
+        return False
+
+    def _split_insert(self, items: List[Tuple[Optional[int], Dict[str, Any]]]) -> Tuple[list, list, list]:
+        """
+        Insert a failed batch in halves, isolating the rows the repository rejects
+
+        Args:
+            items: (journal id or None, row) pairs
+
+        Returns:
+            (written, rejected, unresolved) item lists; rejected rows failed on
+            their own, unresolved ones were not tried because the repository
+            looks down (SPLIT_FAILURE_LIMIT failures in a row)
+        """
+        written, rejected, unresolved = [], [], []
+        parts = [items]
+        failures = 0
+        while parts:
+            part = parts.pop(0)
+            if failures >= self.SPLIT_FAILURE_LIMIT:
+                unresolved.extend(part)
+                continue
+            if self._insert([row for _, row in part], attempts=1):
+                written.extend(part)
+                failures = 0
+                continue
+            failures += 1
+            if len(part) == 1:
+                rejected.extend(part)
+            else:
+                middle = len(part) // 2
+                parts[:0] = [part[:middle], part[middle:]]
+        if rejected:
+            with self._cond:
+                self._stats['rejected'] += len(rejected)
+        return written, rejected, unresolved
+
+    def _spill(self, rows: List[Dict[str, Any]], attempts: int = 0):
+        now = time.time()
+        status = 'dead' if attempts >= self.max_row_attempts else 'pending'
+        with self._connect() as conn, _transaction(conn):
+            conn.executemany(
+                'INSERT INTO journal (row, created_at, attempts, status) VALUES (?, ?, ?, ?)',
+                [(json.dumps(row), now, attempts, status) for row in rows]
+            )
+        with self._cond:
+            self._stats['journaled'] += len(rows)
+            if status == 'dead':
+                self._stats['dead_lettered'] += len(rows)
+        logger.info(f"Journaled {len(rows)} conversation rows ({status})")
+
+    def _reject_journaled(self, journal_ids: List[int]):
+        """Count a failed attempt for journaled rows, dead-lettering those out of attempts"""
+        with self._connect() as conn:
+            with _transaction(conn):
+                conn.executemany(
+                    "UPDATE journal SET attempts = attempts + 1, "
+                    "status = CASE WHEN attempts + 1 >= ? THEN 'dead' ELSE status END WHERE id = ?",
+                    [(self.max_row_attempts, journal_id) for journal_id in journal_ids]
+                )
+            dead = conn.execute(
+                "SELECT COUNT(*) FROM journal WHERE status = 'dead' AND id IN (%s)" % ','.join('?' * len(journal_ids)),
+                journal_ids
+            ).fetchone()[0]
+        if dead:
+            with self._cond:
+                self._stats['dead_lettered'] += dead
+            logger.warning(f"Dead-lettered {dead} conversation rows after {self.max_row_attempts} rejected attempts")
+
+    def _replay_journal(self, max_batches: int = 20):
+        """Re-send journaled rows, oldest first, backing off while the repository is down"""
+        if time.monotonic() < self._journal_retry_at:
+            return
+        for _ in range(max_batches):
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT id, row FROM journal WHERE status = 'pending' ORDER BY id LIMIT ?", (self.batch_size,)
+                ).fetchall()
+            if not rows:
+                return
+
+            items = [(r['id'], json.loads(r['row'])) for r in rows]
+            if self._insert([row for _, row in items], attempts=1):
+                written, rejected, unresolved = items, [], []
+            else:
+                written, rejected, unresolved = self._split_insert(items)
+
+            if written:
+                with self._connect() as conn, _transaction(conn):
+                    conn.executemany('DELETE FROM journal WHERE id = ?', [(journal_id,) for journal_id, _ in written])
+                with self._cond:
+                    self._stats['replayed'] += len(written)
+            if rejected:
+                self._reject_journaled([journal_id for journal_id, _ in rejected])
+
+            if unresolved:
+                self._journal_failures += 1
+                delay = min(self.journal_retry_max, self.flush_interval * (2 ** self._journal_failures))
+                self._journal_retry_at = time.monotonic() + delay
+                return
+            self._journal_failures = 0
+            if rejected:
+                # Rejected rows are retried on a later pass, not immediately
+                self._journal_retry_at = time.monotonic() + self.flush_interval
+                return
+
+    def _run(self):
+        while True:
+            batch, done = self._next_batch()
+            if batch:
+                attempts = 1 if done else self.max_attempts
+                if self._insert(batch, attempts):
+                    written, rejected, unresolved = batch, [], []
+                elif done:
+                    # Shutting down - journal the batch rather than splitting it now
+                    written, rejected, unresolved = [], [], batch
+                else:
+                    split = self._split_insert([(None, row) for row in batch])
+                    written, rejected, unresolved = ([row for _, row in part] for part in split)
+                if written:
+                    with self._cond:
+                        self._stats['written'] += len(written)
+                        self._stats['batches'] += 1
+                if rejected:
+                    self._spill(rejected, attempts=1)
+                if unresolved:
+                    self._spill(unresolved)
+                if rejected or unresolved:
+                    # Give the repository a moment before the journal is replayed
+                    self._journal_retry_at = max(self._journal_retry_at, time.monotonic() + self.flush_interval)
+
+            try:
+                self._replay_journal()
+            except Exception as e:
+                logger.error(f"Conversation journal replay error: {e}")
+
+            if done:
+                return
@@ -0,0 +1,284 @@
+"""
+Concurrent Deliverable Engine
+Fans strategy prompts out to Claude in parallel with a bounded worker pool,
+or asks for every section in one combined generation and splits the result
+"""
+
+import os
+import re
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+class DeliverableEngine:
+    """Generates several deliverables at once and collects them as they complete"""
+
+    def __init__(self, generate_fn: Callable[[str, Any], Dict[str, Any]],
+                 max_workers: int = None, section_timeout: float = None):
+        """
+        Args:
+            generate_fn: Callable taking (prompt, client_data) and returning a
+                call_claude-style result dict
+            max_workers: Size of the shared worker pool
+            section_timeout: Seconds each section may take before it is reported as timed out
+        """
+        self.generate_fn = generate_fn
+        self.max_workers = max_workers or int(os.getenv('DELIVERABLE_WORKERS', '8'))
+        self.section_timeout = section_timeout or float(os.getenv('DELIVERABLE_TIMEOUT', '120'))
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='deliverable'
+        )
+
+    def generate(self, sections: Dict[str, str], client_data: Any,
+                 section_timeout: float = None, on_result: Callable[[str, Dict], None] = None) -> Dict[str, Any]:
+        """
+        Generate all sections concurrently
+
+        Args:
+            sections: Mapping of section key to prompt (e.g. {'branding': BRANDING_PROMPT})
+            client_data: Client brief passed to every prompt
+            section_timeout: Override the per-section timeout for this call
+            on_result: Optional callback(key, result) invoked as each section finishes
+
+        Returns:
+            Dict with 'deliverables' (successful results in section order),
+            'errors' (section -> error message) and 'timings' (section -> seconds)
+        """
+        timeout = section_timeout or self.section_timeout
+        started = time.monotonic()
+
+        futures = {}
+        deadlines = {}
+        for key, prompt in sections.items():
+            future = self.executor.submit(self.generate_fn, prompt, client_data)
+            futures[future] = key
+            deadlines[future] = time.monotonic() + timeout
+
+        results = {}
+        errors = {}
+        timings = {}
+        pending = set(futures)
+
+        while pending:
+            next_deadline = min(deadlines[f] for f in pending)
+            done, pending = wait(
+                pending,
+                timeout=max(0, next_deadline - time.monotonic()),
+                return_when=FIRST_COMPLETED
+            )
+
+            for future in done:
+                key = futures[future]
+                timings[key] = round(time.monotonic() - started, 3)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Deliverable {key} failed: {e}")
+                    errors[key] = str(e)
+                    continue
+
+                if result.get('success'):
+                    results[key] = result
+                    _notify(on_result, key, result)
+                else:
+                    errors[key] = result.get('error', 'Unknown error')
+
+            # Give up on sections that have exceeded their own deadline
+            now = time.monotonic()
+            for future in [f for f in pending if deadlines[f] <= now]:
+                key = futures[future]
+                future.cancel()
+                pending.discard(future)
+                timings[key] = round(now - started, 3)
+                errors[key] = f'Timed out after {timeout:g}s'
+                logger.warning(f"Deliverable {key} timed out after {timeout:g}s")
+
+        deliverables = {key: results[key] for key in sections if key in results}
+        return {
+            'mode': 'fanout',
+            'deliverables': deliverables,
+            'errors': {key: errors[key] for key in sections if key in errors},
+            'timings': timings,
+            'elapsed': round(time.monotonic() - started, 3),
+            'usage': sum_usage(d.get('usage', {}) for d in deliverables.values())
+        }
+
+    def generate_combined(self, sections: Dict[str, str], client_data: Any,
+                          max_tokens: int = None, on_result: Callable[[str, Dict], None] = None) -> Dict[str, Any]:
+        """
+        Generate all sections in a single structured generation
+
+        Args:
+            sections: Mapping of section key to prompt
+            client_data: Client brief
+            max_tokens: Output budget for the combined response
+            on_result: Optional callback(key, result) invoked for each section once split
+
+        Returns:
+            Same shape as generate(); per-section usage is empty and the single
+            call's usage is reported in 'usage'
+        """
+        started = time.monotonic()
+        max_tokens = max_tokens or min(16384, 4096 * len(sections))
+
+        try:
+            result = self.generate_fn(build_combined_prompt(sections), client_data, max_tokens=max_tokens)
+        except Exception as e:
+            logger.error(f"Combined deliverables failed: {e}")
+            result = {'success': False, 'error': str(e)}
+
+        elapsed = round(time.monotonic() - started, 3)
+        if not result.get('success'):
+            error = result.get('error', 'Unknown error')
+            return {
+                'mode': 'combined',
+                'deliverables': {},
+                'errors': {key: error for key in sections},
+                'timings': {key: elapsed for key in sections},
+                'elapsed': elapsed,
+                'usage': {}
+            }
+
+        split = split_combined_deliverables(result.get('response', ''), list(sections))
+        deliverables = {
+            key: {'success': True, 'response': content, 'usage': {}, 'cached': result.get('cached', False)}
+            for key, content in split.items()
+        }
+        for key, value in deliverables.items():
+            _notify(on_result, key, value)
+        return {
+            'mode': 'combined',
+            'deliverables': deliverables,
+            'errors': {key: 'Section missing from combined response' for key in sections if key not in split},
+            'timings': {key: elapsed for key in sections},
+            'elapsed': elapsed,
+            'usage': result.get('usage', {})
+        }
+
+    def shutdown(self, wait_for_running: bool = True):
+        """Stop accepting work and optionally wait for running generations"""
+        self.executor.shutdown(wait=wait_for_running, cancel_futures=True)
+
+
+def _notify(on_result: Callable, key: str, result: Dict[str, Any]):
+    """Invoke a per-section callback without letting it break generation"""
+    if not on_result:
+        return
+    try:
+        on_result(key, result)
+    except Exception as e:
+        logger.error(f"Deliverable callback for {key} failed: {e}")
+
+
+def build_combined_prompt(sections: Dict[str, str]) -> str:
+    """Build one prompt asking for every section as a key of a single JSON object"""
+    keys = ', '.join(f'"{key}"' for key in sections)
+    parts = [
+        "Create ALL of the following deliverables for this client in a single response.",
+        f"Return ONE JSON object whose top-level keys are exactly: {keys}.",
+        "The value of each key is the structured JSON object for that deliverable.",
+        "Do not wrap the JSON in markdown and do not add commentary outside it."
+    ]
+    for key, prompt in sections.items():
+        parts.append(f"\n### Deliverable: {key}\n{prompt}")
+    return "\n".join(parts)
+
+
+def split_combined_deliverables(text: str, sections: List[str]) -> Dict[str, str]:
+    """
+    Split a combined generation into per-section content
+
+    Tolerant of markdown code fences, prose around the JSON, invalid or
+    truncated JSON (sections decoded before the break are kept) and of
+    responses that fall back to markdown headings per section.
+
+    Returns:
+        Mapping of section key to content string (missing sections are omitted)
+    """
+    cleaned = re.sub(r'```(?:json)?', '', text or '')
+    found: Dict[str, str] = {}
+
+    # 1. Whole response is a JSON object
+    start = cleaned.find('{')
+    end = cleaned.rfind('}') + 1
+    if start != -1 and end > start:
+        try:
+            data = json.loads(cleaned[start:end])
+            if isinstance(data, dict):
+                for key in sections:
+                    if key in data:
+                        found[key] = _section_text(data[key])
+                if found:
+                    return found
+        except json.JSONDecodeError:
+            pass
+
+    # 2. Decode top-level members one by one until the JSON breaks off
+    if start != -1:
+        for key, value in _top_level_members(cleaned, start):
+            if key in sections:
+                found[key] = _section_text(value)
+        if found:
+            return found
+
+    # 3. Markdown headings naming each section
+    heading = re.compile(r'^#{1,6}\s*(?:deliverable:\s*)?(%s)\b.*$' % '|'.join(map(re.escape, sections)),
+                         re.IGNORECASE | re.MULTILINE)
+    matches = list(heading.finditer(cleaned))
+    for i, match in enumerate(matches):
+        body_end = matches[i + 1].start() if i + 1 < len(matches) else len(cleaned)
+        body = cleaned[match.end():body_end].strip()
+        if body:
+            found[match.group(1).lower()] = body
+    return found
+
+
+def _top_level_members(text: str, start: int):
+    """
+    Yield (key, value) pairs of the JSON object opening at text[start]
+
+    Members are decoded in order, so a section key that only appears nested
+    inside another section is never mistaken for a top-level one. Stops at
+    the first member that does not decode (e.g. truncated output).
+    """
+    decoder = json.JSONDecoder()
+    whitespace = re.compile(r'\s*')
+    pos = start + 1
+    while True:
+        pos = whitespace.match(text, pos).end()
+        if pos >= len(text) or text[pos] != '"':
+            return
+        try:
+            key, pos = decoder.raw_decode(text, pos)
+            pos = whitespace.match(text, pos).end()
+            if pos >= len(text) or text[pos] != ':':
+                return
+            value, pos = decoder.raw_decode(text, whitespace.match(text, pos + 1).end())
+        except json.JSONDecodeError:
+            return
+        yield key, value
+        pos = whitespace.match(text, pos).end()
+        if pos < len(text) and text[pos] == ',':
+            pos += 1
+
+
+def _section_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, indent=2, ensure_ascii=False)
+
+
+def sum_usage(usages) -> Dict[str, int]:
+    """Add up token usage dicts from several calls"""
+    total: Dict[str, int] = {}
+    for usage in usages:
+        for key, value in (usage or {}).items():
+            if isinstance(value, (int, float)):
+                total[key] = total.get(key, 0) + value
+    return total
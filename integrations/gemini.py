@@ -10,7 +10,7 @@ Gemini 3 Features (November 2025):
 
 import os
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional, Union
 
 logger = logging.getLogger(__name__)
 
@@ -34,19 +34,25 @@ class GeminiClient:
         self.model_flash = 'gemini-2.0-flash-exp'  # Fallback for simpler tasks
 
         if GENAI_AVAILABLE and self.api_key:
-            self.client = genai.Client(api_key=self.api_key)
+            # Bounded so a hung call frees its orchestration worker (timeout is in ms)
+            self.client = genai.Client(
+                api_key=self.api_key,
+                http_options=types.HttpOptions(timeout=int(float(os.getenv('PROVIDER_TIMEOUT', '80')) * 1000))
+            )
 
     def is_configured(self) -> bool:
         """Check if client is properly configured"""
         return GENAI_AVAILABLE and bool(self.api_key) and self.client is not None
 
-    def generate_meeting_notes(self, transcript: str, participants: list = None) -> Dict[str, Any]:
+    def generate_meeting_notes(self, transcript: str, participants: list = None,
+                               stream: bool = False) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
         """
         Generate structured meeting notes from transcript
 
         Args:
             transcript: Raw meeting transcript
             participants: List of participant names
+            stream: Return an iterator of stream events instead of the full result
 
         Returns:
             Structured meeting notes with summary, action items, decisions
@@ -71,6 +77,9 @@ Create a JSON response with:
 
 Return only valid JSON."""
 
+        if stream:
+            return self._stream(prompt, temperature=0.3, max_output_tokens=4096)
+
         try:
             response = self.client.models.generate_content(
                 model=self.model,
@@ -94,13 +103,15 @@ Return only valid JSON."""
             logger.error(f"Gemini meeting notes error: {e}")
             return {'success': False, 'error': str(e)}
 
-    def summarize_document(self, content: str, doc_type: str = 'general') -> Dict[str, Any]:
+    def summarize_document(self, content: str, doc_type: str = 'general',
+                           stream: bool = False) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
         """
         Summarize a document
 
         Args:
             content: Document content
             doc_type: Type of document (general, contract, proposal, report)
+            stream: Return an iterator of stream events instead of the full result
 
         Returns:
             Document summary
@@ -125,6 +136,10 @@ Provide a structured summary with:
 3. Important Dates/Deadlines
 4. Action Required (if any)"""
 
+        if stream:
+            return self._stream(prompt, temperature=0.3, max_output_tokens=2048,
+                                extra={'doc_type': doc_type})
+
         try:
             response = self.client.models.generate_content(
                 model=self.model,
@@ -178,13 +193,15 @@ Provide a structured summary with:
             logger.error(f"Gemini generate error: {e}")
             return {'success': False, 'error': str(e)}
 
-    def orchestrate_workflow(self, task: str, context: Dict) -> Dict[str, Any]:
+    def orchestrate_workflow(self, task: str, context: Dict,
+                             stream: bool = False) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
         """
         Orchestrate multi-AI workflow based on task
 
         Args:
             task: Task description
             context: Context including client info, previous outputs
+            stream: Return an iterator of stream events instead of the full result
 
         Returns:
             Workflow orchestration plan
@@ -211,6 +228,10 @@ Return a JSON workflow plan with:
 - "data_flow": How data passes between steps
 - "expected_outputs": What each step produces"""
 
+        if stream:
+            return self._stream(prompt, temperature=0.5, max_output_tokens=4096,
+                                extra={'task': task})
+
         try:
             response = self.client.models.generate_content(
                 model=self.model,
@@ -230,3 +251,47 @@ Return a JSON workflow plan with:
         except Exception as e:
             logger.error(f"Gemini orchestrate error: {e}")
             return {'success': False, 'error': str(e)}
+
+    def _stream(self, prompt: str, temperature: float, max_output_tokens: int,
+                extra: Dict[str, Any] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a generation as chunk events followed by a final 'done' event
+
+        Args:
+            prompt: The prompt to send
+            temperature: Creativity level (0-1)
+            max_output_tokens: Output token limit
+            extra: Additional fields for the final event
+
+        Yields:
+            {'type': 'chunk', 'text': ...} then {'type': 'done', 'model': ..., 'usage': ...}
+        """
+        usage_metadata = None
+        try:
+            for chunk in self.client.models.generate_content_stream(
+                model=self.model,
+                contents=prompt,
+                config=types.GenerateContentConfig(
+                    temperature=temperature,
+                    max_output_tokens=max_output_tokens,
+                )
+            ):
+                if chunk.usage_metadata:
+                    usage_metadata = chunk.usage_metadata
+                if chunk.text:
+                    yield {'type': 'chunk', 'text': chunk.text}
+        except Exception as e:
+            logger.error(f"Gemini stream error: {e}")
+            yield {'type': 'error', 'success': False, 'error': str(e)}
+            return
+
+        yield {
+            'type': 'done',
+            'success': True,
+            'model': self.model,
+            'usage': {
+                'prompt_tokens': getattr(usage_metadata, 'prompt_token_count', 0) or 0,
+                'completion_tokens': getattr(usage_metadata, 'candidates_token_count', 0) or 0,
+            },
+            **(extra or {})
+        }
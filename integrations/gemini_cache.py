@@ -0,0 +1,216 @@
+"""
+Gemini Prompt Cache
+Registers static system prompts (and tool declarations) as Gemini cached content and keeps them fresh
+"""
+
+import os
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    from google.genai import types
+    GENAI_AVAILABLE = True
+except ImportError:
+    GENAI_AVAILABLE = False
+
+
+class LocalCacheClient:
+    """In-memory stand-in for genai.Client().caches (tests and local development)"""
+
+    def __init__(self):
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.caches = self
+        self.calls: List[str] = []
+
+    def create(self, model: str, config: Any):
+        self.calls.append('create')
+        name = f'cachedContents/{uuid.uuid4().hex[:12]}'
+        self.entries[name] = {'model': model, 'config': config}
+        return SimpleNamespace(name=name, model=model)
+
+    def update(self, name: str, config: Any):
+        self.calls.append('update')
+        if name not in self.entries:
+            raise KeyError(f'{name} not found')
+        return SimpleNamespace(name=name)
+
+    def delete(self, name: str):
+        self.calls.append('delete')
+        self.entries.pop(name, None)
+
+
+class GeminiPromptCache:
+    """
+    Explicit Gemini context caches keyed by prompt content
+
+    get() never blocks on the network: it returns the cache name to pass as
+    cached_content when one is ready and None (send the prompt inline)
+    otherwise. Creating, extending and replacing caches happens on a
+    background thread. Prompts below the model's minimum cacheable size are
+    never sent to the caches API; a failed creation is retried after
+    retry_after seconds.
+    """
+
+    def __init__(self, client, model: str, ttl: int = None, refresh_margin: int = None,
+                 retry_after: float = 600.0, min_tokens: int = None):
+        """
+        Args:
+            client: genai.Client (or LocalCacheClient)
+            model: Model the cached content is created for
+            ttl: Seconds a cache lives after creation or refresh
+            refresh_margin: Refresh caches this many seconds before they expire
+            retry_after: Seconds to wait before retrying a failed creation
+            min_tokens: Smallest prompt (estimated tokens) the model accepts as cached content
+        """
+        self.client = client
+        self.model = model
+        self.ttl = ttl or int(os.getenv('GEMINI_CACHE_TTL', '3600'))
+        self.refresh_margin = refresh_margin or int(os.getenv('GEMINI_CACHE_REFRESH_MARGIN', '300'))
+        self.retry_after = retry_after
+        self.min_tokens = min_tokens if min_tokens is not None else int(os.getenv('GEMINI_CACHE_MIN_TOKENS', '4096'))
+
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'creates': 0, 'refreshes': 0, 'recreates': 0, 'failures': 0, 'inline': 0,
+                       'too_small': 0}
+
+    def get(self, key: str, system_instruction: str, tools: List[Any] = None,
+            tool_config: Any = None) -> Optional[str]:
+        """
+        Cache name for this prompt; schedules creation or refresh in the background when needed
+
+        Args:
+            key: Stable name for the prompt (e.g. 'orchestrator-plan')
+            system_instruction: Static system prompt
+            tools: Tool declarations to cache with it
+            tool_config: Function calling config to cache with it
+
+        Returns:
+            cachedContents/... name, or None to send the prompt inline
+        """
+        parts = self._parts(system_instruction, tools, tool_config)
+        digest = hashlib.sha256('\x00'.join(parts).encode()).hexdigest()
+        now = time.time()
+        stale = None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['hash'] != digest:
+                if entry and entry.get('name'):
+                    self._stats['recreates'] += 1
+                    stale = entry['name']
+                # Rough estimate (~4 characters per token) - below the minimum the API always refuses
+                too_small = sum(len(part) for part in parts[1:]) // 4 < self.min_tokens
+                entry = {'hash': digest, 'name': None, 'expires_at': 0.0, 'failed_at': None,
+                         'pending': False, 'too_small': too_small}
+                self._entries[key] = entry
+                if too_small:
+                    logger.info(f"Gemini cache skipped for {key}: prompt is below {self.min_tokens} tokens")
+
+            if entry['too_small']:
+                self._stats['too_small'] += 1
+                name = None
+            else:
+                name = entry['name'] if entry['name'] and entry['expires_at'] > now else None
+                if not entry['pending'] and self._needs_work(entry, name, now):
+                    entry['pending'] = True
+                    self._spawn(key, self._maintain, key, entry, system_instruction, tools, tool_config)
+                self._stats['hits' if name else 'inline'] += 1
+
+        if stale:
+            self._spawn(key, self._delete, stale)
+        return name
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['caches'] = sum(1 for e in self._entries.values() if e.get('name'))
+            stats['pending'] = sum(1 for e in self._entries.values() if e.get('pending'))
+        return stats
+
+    # =========================================================================
+    # INTERNALS
+    # =========================================================================
+
+    def _parts(self, system_instruction: str, tools: List[Any], tool_config: Any) -> List[str]:
+        parts = [self.model, system_instruction]
+        parts += [t.model_dump_json() if hasattr(t, 'model_dump_json') else repr(t) for t in tools or []]
+        if tool_config is not None:
+            parts.append(tool_config.model_dump_json() if hasattr(tool_config, 'model_dump_json') else repr(tool_config))
+        return parts
+
+    def _needs_work(self, entry: Dict[str, Any], name: Optional[str], now: float) -> bool:
+        """Called with the lock held"""
+        if name:
+            return entry['expires_at'] - now <= self.refresh_margin
+        return not entry['failed_at'] or now - entry['failed_at'] >= self.retry_after
+
+    def _spawn(self, key: str, target, *args):
+        threading.Thread(target=target, args=args, name=f'gemini-cache-{key}', daemon=True).start()
+
+    def _maintain(self, key: str, entry: Dict[str, Any], system_instruction: str,
+                  tools: List[Any], tool_config: Any):
+        """Extend the entry's cache, or create one (background thread; network calls outside the lock)"""
+        if entry['name'] and self._refresh(entry['name']):
+            with self._lock:
+                entry['expires_at'] = time.time() + self.ttl
+                entry['pending'] = False
+                self._stats['refreshes'] += 1
+            return
+        if entry['name']:
+            with self._lock:
+                entry['name'] = None
+
+        try:
+            cache = self.client.caches.create(
+                model=self.model,
+                config=types.CreateCachedContentConfig(
+                    display_name=f"mwd-{key}-{entry['hash'][:8]}",
+                    system_instruction=system_instruction,
+                    tools=tools,
+                    tool_config=tool_config,
+                    ttl=f'{self.ttl}s'
+                )
+            )
+        except Exception as e:
+            logger.warning(f"Gemini cache create for {key} failed, sending prompt inline: {e}")
+            with self._lock:
+                entry.update(name=None, failed_at=time.time(), pending=False)
+                self._stats['failures'] += 1
+            return
+
+        with self._lock:
+            current = self._entries.get(key) is entry
+            if current:
+                entry.update(name=cache.name, expires_at=time.time() + self.ttl, failed_at=None, pending=False)
+                self._stats['creates'] += 1
+        if current:
+            logger.info(f"Gemini cache {cache.name} created for {key}")
+        else:
+            # The prompt changed while this cache was being created
+            self._delete(cache.name)
+
+    def _refresh(self, name: str) -> bool:
+        try:
+            self.client.caches.update(
+                name=name,
+                config=types.UpdateCachedContentConfig(ttl=f'{self.ttl}s')
+            )
+        except Exception as e:
+            # Expired or deleted server-side - fall through to a fresh create
+            logger.warning(f"Gemini cache {name} refresh failed: {e}")
+            return False
+        return True
+
+    def _delete(self, name: str):
+        try:
+            self.client.caches.delete(name=name)
+        except Exception as e:
+            logger.warning(f"Gemini cache {name} delete failed: {e}")
@@ -0,0 +1,296 @@
+"""
+Idempotency Store
+Deduplicates retried webhook deliveries by holding in-flight and completed results
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryIdempotencyBackend:
+    """In-process backend - fast, but not shared between worker processes"""
+
+    def __init__(self):
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def try_begin(self, key: str, in_flight_ttl: float) -> Optional[Dict[str, Any]]:
+        """Atomically mark key in flight; returns the existing record if one is live"""
+        now = time.time()
+        with self._lock:
+            record = self._records.get(key)
+            if record and record['expires_at'] > now:
+                return dict(record)
+            self._records[key] = {'state': 'in_flight', 'expires_at': now + in_flight_ttl}
+            self._purge(now)
+            return None
+
+    def complete(self, key: str, response: Any, status_code: int, ttl: float):
+        with self._lock:
+            self._records[key] = {
+                'state': 'completed',
+                'response': response,
+                'status_code': status_code,
+                'expires_at': time.time() + ttl
+            }
+
+    def release(self, key: str):
+        with self._lock:
+            self._records.pop(key, None)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._records.get(key)
+            if record and record['expires_at'] > time.time():
+                return dict(record)
+            return None
+
+    def _purge(self, now: float):
+        expired = [k for k, r in self._records.items() if r['expires_at'] <= now]
+        for key in expired:
+            del self._records[key]
+
+
+class SQLiteIdempotencyBackend:
+    """SQLite backend - shared by every worker process on the same host"""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or os.getenv('IDEMPOTENCY_DB_PATH', 'data/idempotency.sqlite3')
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS idempotency_keys (
+                    key TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    response TEXT,
+                    status_code INTEGER,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            'state': row['state'],
+            'response': json.loads(row['response']) if row['response'] else None,
+            'status_code': row['status_code'],
+            'expires_at': row['expires_at']
+        }
+
+    def try_begin(self, key: str, in_flight_ttl: float) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute(
+                    'SELECT * FROM idempotency_keys WHERE key = ? AND expires_at > ?', (key, now)
+                ).fetchone()
+                if row:
+                    conn.execute('COMMIT')
+                    return self._to_record(row)
+
+                conn.execute('DELETE FROM idempotency_keys WHERE expires_at <= ?', (now,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO idempotency_keys (key, state, expires_at) "
+                    "VALUES (?, 'in_flight', ?)",
+                    (key, now + in_flight_ttl)
+                )
+                conn.execute('COMMIT')
+                return None
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def complete(self, key: str, response: Any, status_code: int, ttl: float):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO idempotency_keys (key, state, response, status_code, expires_at) "
+                "VALUES (?, 'completed', ?, ?, ?)",
+                (key, json.dumps(response, default=str), status_code, time.time() + ttl)
+            )
+
+    def release(self, key: str):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM idempotency_keys WHERE key = ?', (key,))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT * FROM idempotency_keys WHERE key = ? AND expires_at > ?', (key, time.time())
+            ).fetchone()
+        return self._to_record(row) if row else None
+
+
+def default_backend():
+    """Backend selected by IDEMPOTENCY_BACKEND (memory or sqlite)"""
+    if os.getenv('IDEMPOTENCY_BACKEND', 'memory').lower() == 'sqlite':
+        return SQLiteIdempotencyBackend()
+    return MemoryIdempotencyBackend()
+
+
+class IdempotencyStore:
+    """Claims request keys so duplicates replay a stored response instead of re-running"""
+
+    def __init__(self, backend=None, ttl: float = None, in_flight_ttl: float = None):
+        """
+        Args:
+            backend: Storage backend (defaults from IDEMPOTENCY_BACKEND: memory or sqlite)
+            ttl: Seconds a completed response is replayed
+            in_flight_ttl: Seconds an in-flight claim is held before it may be retaken
+        """
+        self.backend = backend or default_backend()
+        self.ttl = ttl or float(os.getenv('IDEMPOTENCY_TTL', '86400'))
+        self.in_flight_ttl = in_flight_ttl or float(os.getenv('IDEMPOTENCY_IN_FLIGHT_TTL', '600'))
+        self._stats = {'new': 0, 'replayed': 0, 'waited': 0, 'conflicts': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def begin(self, key: str) -> Dict[str, Any]:
+        """
+        Claim a key before processing
+
+        Returns:
+            {'state': 'new'} if the caller should process the request, otherwise the
+            existing record with state 'in_flight' or 'completed'
+        """
+        record = self.backend.try_begin(key, self.in_flight_ttl)
+        if record is None:
+            self._count('new')
+            return {'state': 'new'}
+        if record['state'] == 'completed':
+            self._count('replayed')
+        return record
+
+    def complete(self, key: str, response: Any, status_code: int = 200):
+        """Store the final response for replay"""
+        self.backend.complete(key, response, status_code, self.ttl)
+
+    def release(self, key: str):
+        """Drop an in-flight claim (e.g. processing failed) so a retry can run"""
+        self.backend.release(key)
+
+    def wait(self, key: str, timeout: float, poll_interval: float = 0.25) -> Optional[Dict[str, Any]]:
+        """
+        Wait for an in-flight request with the same key to finish
+
+        Returns:
+            The completed record, or None if it did not finish (or was released) in time
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            record = self.backend.get(key)
+            if record is None:
+                break
+            if record['state'] == 'completed':
+                self._count('waited')
+                return record
+            time.sleep(poll_interval)
+
+        self._count('conflicts')
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for monitoring"""
+        with self._stats_lock:
+            return dict(self._stats)
+
+
+class EventDeduplicator:
+    """Drops redelivered webhook events (e.g. Slack retries) before any work is done"""
+
+    def __init__(self, backend=None, ttl: float = None):
+        """
+        Args:
+            backend: Storage backend shared by every worker (defaults from IDEMPOTENCY_BACKEND)
+            ttl: Seconds an event id is remembered
+        """
+        self.backend = backend or default_backend()
+        self.ttl = ttl or float(os.getenv('SLACK_DEDUP_TTL', '3600'))
+        self._stats = {'checked': 0, 'duplicates': 0, 'retries': 0, 'duplicate_retries': 0}
+        self._retry_reasons: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
+
+    def is_duplicate(self, keys: List[str], retry_num: str = '', retry_reason: str = '') -> bool:
+        """
+        Claim every key of an event; the event is a duplicate if any key was already claimed
+
+        Args:
+            keys: Identifiers of the event (envelope event_id, client_msg_id, ...)
+            retry_num: X-Slack-Retry-Num header (empty on first delivery)
+            retry_reason: X-Slack-Retry-Reason header
+
+        Returns:
+            True if the event was already accepted and should be dropped
+        """
+        keys = [key for key in keys if key]
+        duplicate = False
+        for key in keys:
+            if self.backend.try_begin(key, self.ttl) is not None:
+                duplicate = True
+
+        with self._stats_lock:
+            self._stats['checked'] += 1
+            if duplicate:
+                self._stats['duplicates'] += 1
+            if retry_num:
+                self._stats['retries'] += 1
+                reason = retry_reason or 'unknown'
+                self._retry_reasons[reason] = self._retry_reasons.get(reason, 0) + 1
+                if duplicate:
+                    self._stats['duplicate_retries'] += 1
+        return duplicate
+
+    def release(self, keys: List[str]):
+        """Forget an event that was not processed so its redelivery is accepted"""
+        for key in keys:
+            if key:
+                self.backend.release(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Dedup hit counters for monitoring"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats['retry_reasons'] = dict(self._retry_reasons)
+        return stats
+
+
+def idempotency_key(scope: str, header_key: str, body: bytes) -> str:
+    """
+    Build a store key from an Idempotency-Key header or, failing that, the payload hash
+
+    Args:
+        scope: Endpoint scope so keys from different routes never collide
+        header_key: Value of the Idempotency-Key header (may be empty)
+        body: Raw (signed) request body
+
+    Returns:
+        Namespaced idempotency key
+    """
+    if header_key:
+        return f"{scope}:key:{header_key.strip()}"
+    return f"{scope}:body:{hashlib.sha256(body or b'').hexdigest()}"
@@ -0,0 +1,430 @@
+"""
+Intent Router
+Local fast path for Slack messages - rules plus a small naive Bayes classifier decide
+whether a message can be answered without the Gemini planning call
+"""
+
+import os
+import re
+import math
+import time
+import logging
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+
+from integrations.strategy import load_knowledge_base
+
+logger = logging.getLogger(__name__)
+
+
+# Labelled examples the classifier is trained on at startup
+TRAINING_EXAMPLES: Dict[str, List[str]] = {
+    'GREETING': [
+        'hi', 'hello', 'hey there', 'good morning', 'good afternoon team', 'hey assistant',
+        'hello how are you', 'hi hope you are well', 'yo', 'morning everyone'
+    ],
+    'THANKS': [
+        'thanks', 'thank you', 'thanks so much', 'thx', 'appreciate it', 'thank you that helps',
+        'perfect thanks', 'great thank you', 'awesome thanks for the help'
+    ],
+    'SERVICES': [
+        'what services do we offer', 'list our services', 'which services are available',
+        'what do we offer clients', 'remind me of our service catalog', 'what packages do we have',
+        'do we still offer print advertising', 'what services are coming soon', 'do we do notary services'
+    ],
+    'PRICING': [
+        'how much is branding', 'what does a website cost', 'pricing for social media management',
+        'how much do we charge for copywriting', 'what is the price of the brand launch package',
+        'photography rates', 'how much is website hosting per month', 'cost of the starter website',
+        'what are our prices', 'how much for a logo'
+    ],
+    'NOTION_SEARCH': [
+        'search notion for acme', 'find the bakery project in notion', 'look up meeting notes in notion',
+        'search notion for onboarding checklist', 'find client portal for smith co in notion',
+        'notion search brand guidelines', 'look in notion for the q3 roadmap'
+    ],
+    'RESEARCH': [
+        'research the coffee shop industry', 'research trends in boutique fitness',
+        'what are the latest trends in wedding photography', 'research market for vegan bakeries',
+        'do some research on local restaurant marketing', 'industry research for dental practices'
+    ],
+    'COMPETITORS': [
+        'analyze competitors for acme bakery', 'who are the competitors of blue bottle',
+        'competitor analysis for our new client', 'compare this client to their competitors'
+    ],
+    'TEAM_MESSAGE': [
+        'draft a team update about the website launch', 'write a message to tierra about the deadline',
+        'draft an internal announcement', 'write a team message about the new process'
+    ],
+    'CLIENT_EMAIL': [
+        'draft an email to the client about the delay', 'write a follow up email to acme',
+        'email the client a project update', 'draft a proposal email for the bakery'
+    ],
+    'STRATEGY': [
+        'create a branding strategy for acme', 'make a website plan for the bakery',
+        'social media strategy for our new client', 'write taglines for the coffee shop',
+        'build a brand identity for the gym'
+    ],
+    'OTHER': [
+        'what should we prioritize this week', 'can you summarize this meeting transcript',
+        'create a client portal for acme', 'update the project status to done',
+        'any advice on handling a difficult client', 'how do i set up the crm',
+        'what is on the schedule today', 'help me plan the launch',
+        'how much time will the branding project take', 'how long does a website build take',
+        'how much work is left on the bakery site', 'how much budget is left on the project',
+        'who is in charge of the bakery project', 'what is the conversion rate on the client site',
+        'what did the client say about cost in the meeting notes', 'what services does the client offer'
+    ]
+}
+
+# Intents the router can complete on its own; everything else falls through to Gemini
+FAST_INTENTS = {'GREETING', 'THANKS', 'SERVICES', 'PRICING', 'NOTION_SEARCH', 'RESEARCH'}
+
+# Keywords mapping pricing questions to a SERVICES.md section title
+SERVICE_KEYWORDS = {
+    'Branding': ['brand', 'branding', 'logo', 'identity'],
+    'Website': ['website', 'site', 'web', 'hosting'],
+    'Social Media': ['social', 'instagram', 'tiktok', 'facebook'],
+    'Copywriting': ['copy', 'copywriting', 'copywriter', 'tagline'],
+    'Photography': ['photo', 'photos', 'photography', 'photoshoot', 'headshots'],
+    'Google Business': ['google business', 'gbp', 'google profile'],
+    'Automation': ['automation', 'workflow', 'workflows']
+}
+
+GREETING_RE = re.compile(
+    r"^(hi|hello|hey|howdy|yo|good (morning|afternoon|evening)|morning)\b[\s,!.]*"
+    r"(there|team|all|everyone|assistant)?[\s!.]*$", re.IGNORECASE
+)
+# The whole message must be an acknowledgement - "thanks! now draft the email" is a request
+THANKS_RE = re.compile(
+    r"^(?:(?:great|perfect|awesome|amazing|cool|nice|ok|okay|got it)[\s,!.]+)?"
+    r"(?:thanks|thank you|thx|ty|cheers|appreciate it)"
+    r"(?:\s+(?:so much|a lot|a ton|again|team|everyone|all|for (?:the|your) help|for that|that helps))*"
+    r"(?:[\s,!.]|:[a-z0-9_+\-]+:)*$", re.IGNORECASE
+)
+# Asks for something - a message containing one of these is never a bare acknowledgement
+REQUEST_RE = re.compile(
+    r"\?|\b(can|could|would|will) you\b|\b(please|now|next|also|draft|write|research|create|make|build|find|"
+    r"search|send|email|update|help me|look up|check)\b", re.IGNORECASE
+)
+# A second clause or request after the first ("... and compare", "... then draft", ", create ...")
+# means more than one step, which only the Gemini plan can do
+COMPOUND_RE = re.compile(
+    r"(?:\b(?:and|then|also|plus)\b|[,;.]|\s-)\s+(?:(?:and|then|also|please|can you|could you)\s+)*"
+    r"(?:draft|write|create|make|build|send|email|research|compare|contrast|analy[sz]e|summari[sz]e|find|"
+    r"search|look up|update|add|schedule|check|tell|give|list|plan|generate|prepare|put together|set up|"
+    r"turn|use|share)\b", re.IGNORECASE
+)
+NOTION_SEARCH_RES = [
+    re.compile(r"\b(?:search|look up|look in|find)\s+(?:in\s+)?notion\s+(?:for\s+)?(?P<query>.+)$", re.IGNORECASE),
+    re.compile(r"\b(?:search|look up|find)\s+(?:for\s+)?(?P<query>.+?)\s+in\s+notion\b", re.IGNORECASE),
+    re.compile(r"^notion search\s+(?P<query>.+)$", re.IGNORECASE)
+]
+# Pricing questions must be about us: "what do you charge", "our rates", or a pricing phrase
+# plus one of our services ("how much is branding"). Bare cost/rate/charge/budget is not enough.
+OUR_PRICING_RE = re.compile(
+    r"\b(?:you|we)\s+(?:charge|bill)\b|\b(?:your|our)\s+(?:rates?|prices?|pricing|fees?)\b", re.IGNORECASE
+)
+PRICING_PHRASE_RE = re.compile(
+    r"\bhow much (?:is|are|for|does|do|would|will)\b(?! (?:it|that|this) take)|\b(?:price|prices|pricing)\b|"
+    r"\b(?:cost|costs|rates?) (?:of|for)\b|\bwhat (?:does|do|would|will)\b.{1,40}\bcost\b", re.IGNORECASE
+)
+SERVICES_RE = re.compile(r"\b(what|which|list)\b.*\b(services|packages|offer)\b", re.IGNORECASE)
+# "What services does Acme offer?" is about a client, not our catalog
+OURS_RE = re.compile(r"\b(we|us|our|ours|you|your)\b", re.IGNORECASE)
+RESEARCH_RE = re.compile(r"^(?:please\s+)?(?:research|do (?:some )?research on)\s+(?P<topic>.+)$", re.IGNORECASE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word unigrams plus bigrams"""
+    words = re.findall(r"[a-z0-9$']+", text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class NaiveBayesClassifier:
+    """Multinomial naive Bayes with Laplace smoothing"""
+
+    def __init__(self, examples: Dict[str, List[str]]):
+        self.labels = list(examples)
+        self.word_counts: Dict[str, Counter] = {}
+        self.totals: Dict[str, int] = {}
+        self.priors: Dict[str, float] = {}
+        vocabulary = set()
+
+        total_docs = sum(len(docs) for docs in examples.values())
+        for label, docs in examples.items():
+            counts = Counter()
+            for doc in docs:
+                counts.update(tokenize(doc))
+            self.word_counts[label] = counts
+            self.totals[label] = sum(counts.values())
+            self.priors[label] = math.log(len(docs) / total_docs)
+            vocabulary.update(counts)
+        self.vocabulary_size = len(vocabulary)
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """
+        Returns:
+            (label, posterior probability)
+        """
+        tokens = tokenize(text)
+        scores = {}
+        for label in self.labels:
+            denominator = self.totals[label] + self.vocabulary_size
+            score = self.priors[label]
+            for token in tokens:
+                score += math.log((self.word_counts[label][token] + 1) / denominator)
+            scores[label] = score
+
+        best = max(scores, key=scores.get)
+        normalizer = sum(math.exp(s - scores[best]) for s in scores.values())
+        return best, 1.0 / normalizer
+
+
+class IntentRouter:
+    """Routes high-confidence intents to a direct action or a canned knowledge-base answer"""
+
+    def __init__(self, threshold: float = None, services_doc: str = None, knowledge=None):
+        """
+        Args:
+            threshold: Minimum classifier probability for a fast-path route
+            services_doc: SERVICES.md contents (loaded from the knowledge base by default)
+            knowledge: KnowledgeIndex to read the catalog from; edits to SERVICES.md are
+                picked up when the index reloads
+        """
+        self.threshold = threshold or float(os.getenv('INTENT_ROUTER_THRESHOLD', '0.85'))
+        self.classifier = NaiveBayesClassifier(TRAINING_EXAMPLES)
+        self.knowledge = knowledge
+        self._catalog_version = None
+        if knowledge is not None and services_doc is None:
+            self.sections: Dict[str, str] = {}
+        else:
+            self.sections = self._parse_services(
+                services_doc if services_doc is not None else load_knowledge_base('SERVICES.md')
+            )
+
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'hits': 0, 'fallthrough': 0, 'fast_path_failures': 0}
+        self._by_intent: Dict[str, int] = defaultdict(int)
+        self._router_seconds = 0.0
+        self._llm_runs = 0
+        self._llm_seconds = 0.0
+
+    # =========================================================================
+    # KNOWLEDGE BASE
+    # =========================================================================
+
+    @staticmethod
+    def _parse_services(doc: str) -> Dict[str, str]:
+        """Map '### N. Title' sections of SERVICES.md to their body text"""
+        sections = {}
+        for match in re.finditer(r"^###\s+(?:\d+\.\s+)?(?P<title>.+?)\n(?P<body>.*?)(?=^#{2,3}\s|\Z)",
+                                 doc or '', re.MULTILINE | re.DOTALL):
+            body = match.group('body').strip().rstrip('-').strip()
+            sections[match.group('title').strip()] = body
+        return sections
+
+    def _catalog(self) -> Dict[str, str]:
+        """SERVICES.md sections, rebuilt from the knowledge index whenever its files change"""
+        if self.knowledge is None:
+            return self.sections
+        try:
+            chunks = self.knowledge.chunks('SERVICES.md')
+            version = self.knowledge.version
+        except Exception as e:
+            logger.warning(f"Knowledge index unavailable, using the last loaded catalog: {e}")
+            return self.sections
+        if version != self._catalog_version:
+            sections: Dict[str, str] = {}
+            for chunk in chunks:
+                if chunk.get('level') != 3:
+                    continue
+                title = re.sub(r"^\d+\.\s+", '', chunk['heading'].rsplit(' > ', 1)[-1])
+                # Long sections are split into several chunks under the same heading
+                sections[title] = f"{sections[title]}\n\n{chunk['text']}" if title in sections else chunk['text']
+            self.sections = sections
+            self._catalog_version = version
+        return self.sections
+
+    @staticmethod
+    def _service_for(text: str) -> Optional[str]:
+        lowered = text.lower()
+        for service, keywords in SERVICE_KEYWORDS.items():
+            if any(re.search(rf"\b{re.escape(k)}\b", lowered) for k in keywords):
+                return service
+        return None
+
+    def _section_for(self, text: str, sections: Dict[str, str]) -> Optional[str]:
+        service = self._service_for(text)
+        if service:
+            for title in sections:
+                if service.lower() in title.lower():
+                    return title
+        return None
+
+    def _pricing_answer(self, text: str) -> Optional[str]:
+        sections = self._catalog()
+        title = self._section_for(text, sections)
+        if title:
+            return f"*{title}*\n\n{sections[title]}\n\n_Prices are starting points; final quotes depend on scope._"
+
+        lines = []
+        for title, body in sections.items():
+            packages = re.findall(r"^\|\s*\*\*(.+?)\*\*\s*\|\s*([^|]+?)\s*\|", body, re.MULTILINE)
+            if packages:
+                lines.append(f"*{title}*: " + ', '.join(f"{name} ({price})" for name, price in packages))
+        if not lines:
+            return None
+        return "Here's our current pricing:\n\n" + "\n".join(f"• {line}" for line in lines) + \
+            "\n\n_Prices are starting points; final quotes depend on scope._"
+
+    def _services_answer(self) -> Optional[str]:
+        sections = self._catalog()
+        if not sections:
+            return None
+        titles = [title for title in sections if 'Automation' not in title and 'Nationwide' not in title
+                  and 'Local' not in title]
+        answer = "Our active services:\n" + "\n".join(f"• {title}" for title in titles)
+        if any('Automation' in title for title in sections):
+            answer += "\n\n_Automation & Workflow Services are coming soon._"
+        return answer
+
+    # =========================================================================
+    # ROUTING
+    # =========================================================================
+
+    def route(self, message: str, history: List[Dict] = None) -> Optional[Dict[str, Any]]:
+        """
+        Decide whether a message can skip the Gemini planning call
+
+        Only the opening message of a thread is routed; a follow-up depends on
+        the conversation before it, so it always goes to Gemini.
+
+        Args:
+            message: The user's message
+            history: Earlier messages of the thread (not including this one)
+
+        Returns:
+            None to fall through, otherwise a route dict with 'intent', 'confidence',
+            'source' ('rule' or 'classifier') and either 'answer' (canned text) or
+            'action' (a single orchestration action to run)
+        """
+        started = time.perf_counter()
+        route = None if history else self._route(message.strip())
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self._stats['requests'] += 1
+            self._router_seconds += elapsed
+            if route:
+                self._stats['hits'] += 1
+                self._by_intent[route['intent']] += 1
+            else:
+                self._stats['fallthrough'] += 1
+        return route
+
+    def _route(self, text: str) -> Optional[Dict[str, Any]]:
+        if not text or COMPOUND_RE.search(text):
+            return None
+
+        # 1. Rules - unambiguous phrasings
+        if GREETING_RE.match(text):
+            return self._build('GREETING', 1.0, 'rule', text)
+        if THANKS_RE.match(text) and not REQUEST_RE.search(text):
+            return self._build('THANKS', 1.0, 'rule', text)
+        for pattern in NOTION_SEARCH_RES:
+            match = pattern.search(text)
+            if match:
+                return self._build('NOTION_SEARCH', 1.0, 'rule', text, query=match.group('query'))
+        if self._asks_our_pricing(text) and len(text) < 120:
+            return self._build('PRICING', 1.0, 'rule', text)
+        if self._asks_our_services(text) and len(text) < 120:
+            return self._build('SERVICES', 1.0, 'rule', text)
+        match = RESEARCH_RE.match(text)
+        if match:
+            return self._build('RESEARCH', 1.0, 'rule', text, topic=match.group('topic'))
+
+        # 2. Classifier - only confident predictions of intents we can complete locally,
+        # and only when the message also passes that intent's guard
+        label, confidence = self.classifier.predict(text)
+        if label in FAST_INTENTS and confidence >= self.threshold and self._guard(label, text):
+            return self._build(label, confidence, 'classifier', text)
+        return None
+
+    def _asks_our_pricing(self, text: str) -> bool:
+        if OUR_PRICING_RE.search(text):
+            return True
+        return bool(PRICING_PHRASE_RE.search(text)) and self._service_for(text) is not None
+
+    @staticmethod
+    def _asks_our_services(text: str) -> bool:
+        return bool(SERVICES_RE.search(text)) and bool(OURS_RE.search(text))
+
+    def _guard(self, intent: str, text: str) -> bool:
+        """Checks a classifier prediction must also pass before it is answered locally"""
+        if intent in ('GREETING', 'THANKS'):
+            return not REQUEST_RE.search(text)
+        if intent == 'PRICING':
+            return self._asks_our_pricing(text)
+        if intent == 'SERVICES':
+            return bool(OURS_RE.search(text)) and bool(re.search(r"\b(services?|offer|packages?|catalog)\b", text, re.I))
+        return True
+
+    def _build(self, intent: str, confidence: float, source: str, text: str,
+               query: str = None, topic: str = None) -> Optional[Dict[str, Any]]:
+        route = {'intent': intent, 'confidence': round(confidence, 3), 'source': source}
+
+        if intent == 'GREETING':
+            route['answer'] = "Hey! :wave: What can I help you with? I can research, draft messages, search Notion or put together strategy docs."
+        elif intent == 'THANKS':
+            route['answer'] = "Anytime! :raised_hands:"
+        elif intent == 'PRICING':
+            route['answer'] = self._pricing_answer(text)
+        elif intent == 'SERVICES':
+            route['answer'] = self._services_answer()
+        elif intent == 'NOTION_SEARCH':
+            if query is None:
+                # Classifier hit - strip the lead-in phrasing to get the query
+                query = re.sub(r"\b(search|look up|look in|find|notion|in|for)\b", ' ', text, flags=re.IGNORECASE)
+            query = query.strip(' ?.!"\'')
+            if not query:
+                return None
+            route['action'] = {'type': 'NOTION', 'params': {'operation': 'search', 'query': query, 'page_size': 10}}
+        elif intent == 'RESEARCH':
+            topic = (topic or text).strip(' ?.!')
+            route['action'] = {'type': 'RESEARCH', 'params': {'topic': topic, 'depth': 'comprehensive'}}
+
+        if not route.get('answer') and not route.get('action'):
+            return None
+        return route
+
+    # =========================================================================
+    # METRICS
+    # =========================================================================
+
+    def record_fast_path_failure(self):
+        """Count a routed action that failed and was handed back to Gemini"""
+        with self._lock:
+            self._stats['fast_path_failures'] += 1
+
+    def record_orchestration(self, seconds: float):
+        """Record how long a full Gemini orchestration took (baseline for savings)"""
+        with self._lock:
+            self._llm_runs += 1
+            self._llm_seconds += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate, per-intent counts and estimated latency saved"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['by_intent'] = dict(self._by_intent)
+            avg_orchestration = self._llm_seconds / self._llm_runs if self._llm_runs else 0.0
+            avg_router = self._router_seconds / stats['requests'] if stats['requests'] else 0.0
+        stats['hit_rate'] = round(stats['hits'] / stats['requests'], 3) if stats['requests'] else 0.0
+        stats['avg_router_ms'] = round(avg_router * 1000, 3)
+        stats['avg_orchestration_seconds'] = round(avg_orchestration, 3)
+        stats['estimated_seconds_saved'] = round(
+            max(0, stats['hits'] - stats['fast_path_failures']) * avg_orchestration, 1
+        )
+        return stats
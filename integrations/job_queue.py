@@ -0,0 +1,373 @@
+"""
+Persistent Job Queue
+SQLite-backed background job queue with a worker pool and stage-by-stage progress
+"""
+
+import os
+import json
+import uuid
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+FINISHED_STATUSES = ('completed', 'failed', 'dead')
+
+
+class JobQueue:
+    """
+    Durable job queue - queued jobs survive restarts, shutdown drains in-flight work
+
+    A running job whose worker stops heartbeating is requeued, up to the job's
+    max_attempts; after that it is dead-lettered (status 'dead') so a job that
+    keeps crashing its worker is not retried forever. Finished jobs are
+    deleted once they are older than retention seconds.
+    """
+
+    def __init__(self, db_path: str = None, workers: int = None,
+                 poll_interval: float = 1.0, stale_after: float = 60.0,
+                 max_attempts: int = None, retention: float = None):
+        """
+        Args:
+            db_path: SQLite database file (created if missing)
+            workers: Number of worker threads
+            poll_interval: Seconds between queue polls when idle
+            stale_after: Seconds without a heartbeat before a running job is requeued
+            max_attempts: Default number of times a job may be claimed
+            retention: Seconds finished jobs are kept before they are deleted
+        """
+        self.db_path = db_path or os.getenv('JOB_QUEUE_PATH', 'data/jobs.sqlite3')
+        self.num_workers = workers or int(os.getenv('JOB_QUEUE_WORKERS', '2'))
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts or int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+        self.retention = retention or float(os.getenv('JOB_RETENTION_DAYS', '7')) * 86400
+        self.instance_id = uuid.uuid4().hex[:12]
+        self._swept_at = 0.0
+
+        self._handlers: Dict[str, Callable] = {}
+        self._threads: List[threading.Thread] = []
+        self._running_jobs = set()
+        self._running_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._started = False
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._init_db()
+
+    # =========================================================================
+    # STORAGE
+    # =========================================================================
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stages TEXT NOT NULL DEFAULT '{}',
+                    result TEXT,
+                    error TEXT,
+                    owner TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL DEFAULT 3,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    heartbeat_at REAL
+                )
+            """)
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}
+            if 'max_attempts' not in columns:
+                # Databases created before attempts were capped
+                conn.execute('ALTER TABLE jobs ADD COLUMN max_attempts INTEGER NOT NULL DEFAULT 3')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)')
+
+    @staticmethod
+    def _iso(ts: Optional[float]) -> Optional[str]:
+        return datetime.utcfromtimestamp(ts).isoformat() + 'Z' if ts else None
+
+    # =========================================================================
+    # PUBLIC API
+    # =========================================================================
+
+    def register_handler(self, kind: str, handler: Callable[[Dict, Callable], Dict]):
+        """
+        Register the function that processes jobs of a given kind
+
+        Args:
+            kind: Job kind (e.g. 'contact')
+            handler: Callable taking (payload, progress) and returning a JSON-serializable
+                result. progress(stage, status, detail=None) records stage updates.
+        """
+        self._handlers[kind] = handler
+
+    def enqueue(self, kind: str, payload: Dict, max_attempts: int = None) -> str:
+        """
+        Persist a new job and wake a worker
+
+        Args:
+            kind: Job kind (selects the handler)
+            payload: JSON-serializable handler input
+            max_attempts: Claims allowed before the job is dead-lettered
+
+        Returns:
+            The new job id
+        """
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO jobs (id, kind, payload, status, max_attempts, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, kind, json.dumps(payload, default=str), 'queued',
+                 max_attempts or self.max_attempts, time.time())
+            )
+        self._wakeup.set()
+        logger.info(f"Job {job_id} ({kind}) queued")
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get job status, stage progress and result"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+
+        if not row:
+            return None
+
+        return {
+            'job_id': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'stages': json.loads(row['stages'] or '{}'),
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'attempts': row['attempts'],
+            'max_attempts': row['max_attempts'],
+            'created_at': self._iso(row['created_at']),
+            'started_at': self._iso(row['started_at']),
+            'finished_at': self._iso(row['finished_at'])
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Job counts by status"""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT status, COUNT(*) AS n FROM jobs GROUP BY status').fetchall()
+        with self._running_lock:
+            in_flight = len(self._running_jobs)
+        return {
+            'counts': {row['status']: row['n'] for row in rows},
+            'in_flight': in_flight,
+            'workers': self.num_workers
+        }
+
+    def start(self):
+        """Recover interrupted jobs and start the worker pool"""
+        if self._started:
+            return
+        self._started = True
+        self._requeue_stale()
+
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._worker_loop, name=f'job-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name='job-heartbeat', daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+
+        logger.info(f"Job queue started with {self.num_workers} workers ({self.db_path})")
+
+    def shutdown(self, timeout: float = 30.0):
+        """
+        Stop claiming new jobs and wait for in-flight jobs to finish
+
+        Jobs still running after the timeout keep their 'running' status and are
+        requeued by the next process once their heartbeat goes stale.
+        """
+        if not self._started:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0, deadline - time.monotonic()))
+
+        with self._running_lock:
+            remaining = len(self._running_jobs)
+        if remaining:
+            logger.warning(f"Job queue shutdown timed out with {remaining} job(s) in flight")
+        else:
+            logger.info("Job queue drained")
+        self._started = False
+
+    # =========================================================================
+    # WORKERS
+    # =========================================================================
+
+    def _requeue_stale(self):
+        """Return jobs whose worker stopped heartbeating to the queue (or dead-letter them)"""
+        now = time.time()
+        cutoff = now - self.stale_after
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            dead = conn.execute(
+                "UPDATE jobs SET status = 'dead', owner = NULL, finished_at = ?, "
+                "error = 'Worker stopped during each of ' || attempts || ' attempt(s)' "
+                "WHERE status = 'running' AND COALESCE(heartbeat_at, started_at, 0) < ? "
+                "AND attempts >= max_attempts",
+                (now, cutoff)
+            ).rowcount
+            requeued = conn.execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL "
+                "WHERE status = 'running' AND COALESCE(heartbeat_at, started_at, 0) < ?",
+                (cutoff,)
+            ).rowcount
+            conn.execute('COMMIT')
+        if dead:
+            logger.error(f"Dead-lettered {dead} job(s) that exhausted their attempts")
+        if requeued:
+            logger.warning(f"Requeued {requeued} interrupted job(s)")
+            self._wakeup.set()
+
+    def _sweep_finished(self):
+        """Delete finished jobs older than the retention period (at most hourly)"""
+        now = time.time()
+        if now - self._swept_at < 3600:
+            return
+        self._swept_at = now
+        placeholders = ', '.join('?' for _ in FINISHED_STATUSES)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f'DELETE FROM jobs WHERE status IN ({placeholders}) AND finished_at < ?',
+                (*FINISHED_STATUSES, now - self.retention)
+            )
+        if cursor.rowcount:
+            logger.info(f"Pruned {cursor.rowcount} finished job(s)")
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row:
+                    now = time.time()
+                    conn.execute(
+                        "UPDATE jobs SET status = 'running', owner = ?, attempts = attempts + 1, "
+                        "started_at = ?, heartbeat_at = ? WHERE id = ?",
+                        (self.instance_id, now, now, row['id'])
+                    )
+                conn.execute('COMMIT')
+                return row
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            try:
+                row = self._claim()
+            except Exception as e:
+                logger.error(f"Job queue claim error: {e}")
+                row = None
+
+            if not row:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            self._run_job(row)
+
+    def _heartbeat_loop(self):
+        interval = max(1.0, self.stale_after / 4)
+        while not self._stopping.wait(interval):
+            with self._running_lock:
+                job_ids = list(self._running_jobs)
+            try:
+                if job_ids:
+                    with self._connect() as conn:
+                        conn.executemany(
+                            'UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND owner = ?',
+                            [(time.time(), job_id, self.instance_id) for job_id in job_ids]
+                        )
+                # Also pick up jobs abandoned by other (crashed) processes
+                self._requeue_stale()
+                self._sweep_finished()
+            except Exception as e:
+                logger.error(f"Job queue heartbeat error: {e}")
+
+    def _run_job(self, row: sqlite3.Row):
+        job_id = row['id']
+        kind = row['kind']
+        handler = self._handlers.get(kind)
+        stages = json.loads(row['stages'] or '{}')
+        stages_lock = threading.Lock()
+
+        def progress(stage: str, status: str, detail: Any = None):
+            with stages_lock:
+                stages[stage] = {
+                    'status': status,
+                    'updated_at': datetime.utcnow().isoformat() + 'Z'
+                }
+                if detail is not None:
+                    stages[stage]['detail'] = detail
+                snapshot = json.dumps(stages, default=str)
+            with self._connect() as conn:
+                conn.execute(
+                    'UPDATE jobs SET stages = ?, heartbeat_at = ? WHERE id = ? AND owner = ?',
+                    (snapshot, time.time(), job_id, self.instance_id)
+                )
+
+        with self._running_lock:
+            self._running_jobs.add(job_id)
+
+        logger.info(f"Job {job_id} ({kind}) started")
+        try:
+            if not handler:
+                raise ValueError(f'No handler registered for job kind: {kind}')
+
+            result = handler(json.loads(row['payload']), progress)
+            if self._finish(job_id, 'completed', result=json.dumps(result, default=str)):
+                logger.info(f"Job {job_id} ({kind}) completed")
+
+        except Exception as e:
+            logger.error(f"Job {job_id} ({kind}) failed: {e}")
+            self._finish(job_id, 'failed', error=str(e))
+        finally:
+            with self._running_lock:
+                self._running_jobs.discard(job_id)
+
+    def _finish(self, job_id: str, status: str, result: str = None, error: str = None) -> bool:
+        """Record the outcome - only while this instance still owns the job"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? "
+                "WHERE id = ? AND owner = ? AND status = 'running'",
+                (status, result, error, time.time(), job_id, self.instance_id)
+            )
+        if not cursor.rowcount:
+            logger.warning(f"Job {job_id} was requeued while running; discarding this {status} result")
+        return bool(cursor.rowcount)
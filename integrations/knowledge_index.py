@@ -0,0 +1,274 @@
+"""
+Knowledge Index
+BM25 retrieval over the knowledge-base markdown files, persisted to disk and reloaded when files change
+"""
+
+import os
+import re
+import json
+import math
+import time
+import hashlib
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+from integrations.strategy import KNOWLEDGE_BASE_DIR
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'[a-z0-9$][a-z0-9$,.\-]*[a-z0-9]|[a-z0-9$]')
+HEADING_RE = re.compile(r'^(#{1,3})\s+(.*)$')
+
+# Bumped whenever chunking or tokenization changes so stale index files are rebuilt
+INDEX_FORMAT = 2
+
+STOPWORDS = frozenset(
+    'a an and are as at be by can do does for from has have how i in is it its of on or our '
+    'the their this to was we what when where which who will with you your'.split()
+)
+
+
+def _stem(term: str) -> str:
+    """Light suffix stripping so 'printing'/'print' and 'packages'/'package' match"""
+    if len(term) > 5 and term.endswith('ing'):
+        return term[:-3]
+    if len(term) > 4 and term.endswith('ed'):
+        return term[:-2]
+    if len(term) > 3 and term.endswith('s') and not term.endswith('ss'):
+        return term[:-1]
+    return term
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, lightly stemmed terms (prices like $1,250 stay whole) without stopwords"""
+    return [_stem(t.rstrip('.,')) for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def chunk_markdown(text: str, source: str, max_chars: int = 1200) -> List[Dict[str, str]]:
+    """
+    Split a markdown document into heading sections
+
+    Each chunk carries its heading path (e.g. 'SERVICES.md > Active Services >
+    1. Branding & Identity Services') and heading level; sections longer than
+    max_chars are split on blank lines.
+    """
+    chunks = []
+    path: List[str] = []
+    lines: List[str] = []
+    level = 0
+
+    def flush():
+        body = '\n'.join(lines).strip().strip('-').strip()
+        if not body:
+            return
+        heading = ' > '.join([source] + path)
+        piece = ''
+        for paragraph in re.split(r'\n\s*\n', body):
+            if piece and len(piece) + len(paragraph) > max_chars:
+                chunks.append({'source': source, 'heading': heading, 'level': level, 'text': piece})
+                piece = ''
+            piece = f'{piece}\n\n{paragraph}' if piece else paragraph
+        if piece:
+            chunks.append({'source': source, 'heading': heading, 'level': level, 'text': piece})
+
+    for line in text.splitlines():
+        match = HEADING_RE.match(line)
+        if match:
+            flush()
+            lines = []
+            level = len(match.group(1))
+            path = path[:level - 1] + [match.group(2).strip()]
+        else:
+            lines.append(line)
+    flush()
+    return chunks
+
+
+class KnowledgeIndex:
+    """
+    Sparse BM25 index over knowledge-base/*.md
+
+    The index (chunks + postings) is written to index_path as JSON together
+    with a manifest of the source files' mtimes and sizes. Startup loads it
+    when the manifest still matches; otherwise it is rebuilt. Searches
+    re-check the manifest every check_interval seconds, so edited files are
+    picked up without a restart.
+    """
+
+    def __init__(self, directory: str = None, index_path: str = None, check_interval: float = None,
+                 top_k: int = None, k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            directory: Knowledge-base directory
+            index_path: JSON file the index is persisted to
+            check_interval: Seconds between checks for changed files
+            top_k: Default number of chunks returned
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+        """
+        self.directory = directory or KNOWLEDGE_BASE_DIR
+        self.index_path = index_path or os.getenv('KNOWLEDGE_INDEX_PATH', 'data/knowledge_index.json')
+        self.check_interval = check_interval if check_interval is not None else float(
+            os.getenv('KNOWLEDGE_RELOAD_INTERVAL', '30'))
+        self.top_k = top_k or int(os.getenv('KNOWLEDGE_TOP_K', '4'))
+        self.k1 = k1
+        self.b = b
+
+        self._index: Dict[str, Any] = {'manifest': {}, 'chunks': [], 'postings': {}, 'lengths': [], 'avg_length': 0}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {'builds': 0, 'loads': 0, 'searches': 0, 'search_ms': 0.0}
+        self.refresh(force=True)
+
+    # =========================================================================
+    # PUBLIC API
+    # =========================================================================
+
+    @property
+    def version(self) -> str:
+        """Short hash of the indexed files (changes whenever the knowledge base does)"""
+        manifest = json.dumps(self._index['manifest'], sort_keys=True)
+        return hashlib.sha256(manifest.encode('utf-8')).hexdigest()[:12]
+
+    def search(self, query: str, k: int = None) -> List[Dict[str, Any]]:
+        """
+        Top-k chunks for a query
+
+        Returns:
+            Chunks ({'source', 'heading', 'text', 'score'}), best first
+        """
+        self.refresh()
+        started = time.monotonic()
+        index = self._index
+        scores: Dict[int, float] = {}
+        total = len(index['chunks'])
+
+        for term in set(tokenize(query)):
+            postings = index['postings'].get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * index['lengths'][chunk_id] / (index['avg_length'] or 1))
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k or self.top_k]
+        with self._lock:
+            self._stats['searches'] += 1
+            self._stats['search_ms'] += (time.monotonic() - started) * 1000
+        return [{**index['chunks'][chunk_id], 'score': round(score, 3)} for chunk_id, score in best]
+
+    def chunks(self, source: str = None) -> List[Dict[str, Any]]:
+        """All chunks in document order, optionally only those of one file (e.g. 'SERVICES.md')"""
+        self.refresh()
+        return [chunk for chunk in self._index['chunks'] if source is None or chunk['source'] == source]
+
+    def context(self, query: str, k: int = None) -> str:
+        """Top-k chunks formatted as a prompt block (empty string if nothing matches)"""
+        return '\n\n'.join(
+            f"### {chunk['heading']}\n{chunk['text']}" for chunk in self.search(query, k)
+        )
+
+    def refresh(self, force: bool = False):
+        """Rebuild (or reload from disk) if the knowledge-base files changed"""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if not force and now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            manifest = self._manifest()
+            if manifest == self._index['manifest'] and self._index['chunks']:
+                return
+
+            index = self._read_index()
+            if index and index.get('format') == INDEX_FORMAT and index.get('manifest') == manifest:
+                self._stats['loads'] += 1
+            else:
+                index = self._build(manifest)
+                self._write_index(index)
+                self._stats['builds'] += 1
+                logger.info(f"Knowledge index built: {len(index['chunks'])} chunks from {len(manifest)} files")
+            self._index = index
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        searches = stats.pop('search_ms')
+        stats.update({
+            'files': len(self._index['manifest']),
+            'chunks': len(self._index['chunks']),
+            'version': self.version,
+            'avg_search_ms': round(searches / stats['searches'], 3) if stats['searches'] else 0.0
+        })
+        return stats
+
+    # =========================================================================
+    # BUILD / PERSIST
+    # =========================================================================
+
+    def _manifest(self) -> Dict[str, List[float]]:
+        try:
+            names = sorted(name for name in os.listdir(self.directory) if name.endswith('.md'))
+        except OSError as e:
+            logger.warning(f"Knowledge base directory not available: {e}")
+            return {}
+        manifest = {}
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                # Removed (or being replaced) since listdir - picked up on the next check
+                continue
+            manifest[name] = [stat.st_mtime, stat.st_size]
+        return manifest
+
+    def _build(self, manifest: Dict[str, List[float]]) -> Dict[str, Any]:
+        chunks = []
+        for name in manifest:
+            try:
+                with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                    chunks.extend(chunk_markdown(f.read(), name))
+            except OSError as e:
+                logger.warning(f"Knowledge base file not available: {name} ({e})")
+
+        postings: Dict[str, List[List[int]]] = {}
+        lengths = []
+        for chunk_id, chunk in enumerate(chunks):
+            # The section title counts twice - it names what the chunk is about
+            title = chunk['heading'].rsplit(' > ', 1)[-1]
+            terms = tokenize(f"{chunk['heading']}\n{title}\n{chunk['text']}")
+            lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                postings.setdefault(term, []).append([chunk_id, tf])
+
+        return {
+            'format': INDEX_FORMAT,
+            'manifest': manifest,
+            'chunks': chunks,
+            'postings': postings,
+            'lengths': lengths,
+            'avg_length': sum(lengths) / len(lengths) if lengths else 0
+        }
+
+    def _read_index(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_index(self, index: Dict[str, Any]):
+        directory = os.path.dirname(self.index_path)
+        try:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f'{self.index_path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"Could not persist knowledge index: {e}")
@@ -5,7 +5,8 @@ Project management and documentation
 
 import os
 import logging
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Iterator
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -26,7 +27,11 @@ class NotionClient:
         self.client = None
 
         if NOTION_AVAILABLE and self.api_key:
-            self.client = Client(auth=self.api_key)
+            # Bounded so a hung call frees its orchestration worker
+            self.client = Client(auth=self.api_key, timeout_ms=int(float(os.getenv('PROVIDER_TIMEOUT', '80')) * 1000))
+
+        # Fetches the next page of iter_database while the caller processes the current one
+        self._prefetch = ThreadPoolExecutor(max_workers=2, thread_name_prefix='notion-prefetch')
 
     def is_configured(self) -> bool:
         """Check if client is properly configured"""
@@ -260,26 +265,7 @@ class NotionClient:
 
             response = self.client.databases.query(**query_params)
 
-            results = []
-            for page in response['results']:
-                # Extract title from properties
-                title = ''
-                props = page.get('properties', {})
-                for key in ['Name', 'Title', 'name', 'title']:
-                    if key in props:
-                        title_prop = props[key]
-                        if title_prop.get('title'):
-                            title = ''.join([t.get('plain_text', '') for t in title_prop['title']])
-                            break
-
-                results.append({
-                    'id': page['id'],
-                    'url': page['url'],
-                    'title': title,
-                    'properties': page['properties'],
-                    'created_time': page['created_time'],
-                    'last_edited_time': page['last_edited_time']
-                })
+            results = [self._database_row(page) for page in response['results']]
 
             return {
                 'success': True,
@@ -292,6 +278,89 @@ class NotionClient:
             logger.error(f"Notion query database error: {e}")
             return {'success': False, 'error': str(e)}
 
+    @staticmethod
+    def _database_row(page: Dict) -> Dict[str, Any]:
+        """Flatten a database query page into the row shape returned by query_database"""
+        # Extract title from properties
+        title = ''
+        props = page.get('properties', {})
+        for key in ['Name', 'Title', 'name', 'title']:
+            if key in props:
+                title_prop = props[key]
+                if title_prop.get('title'):
+                    title = ''.join([t.get('plain_text', '') for t in title_prop['title']])
+                    break
+
+        return {
+            'id': page['id'],
+            'url': page['url'],
+            'title': title,
+            'properties': page['properties'],
+            'created_time': page['created_time'],
+            'last_edited_time': page['last_edited_time']
+        }
+
+    def iter_database(self, database_id: str, filters: Dict = None,
+                      sorts: List[Dict] = None, page_size: int = 100,
+                      limit: int = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream every row of a database query, following next_cursor
+
+        The next page is requested in the background as soon as the current
+        one arrives, so at most two pages are held in memory at a time.
+
+        Args:
+            database_id: Database to query
+            filters: Filter conditions (Notion filter object)
+            sorts: Sort conditions (list of sort objects)
+            page_size: Rows per request (max 100)
+            limit: Stop after this many rows (None for all); a warning is logged
+                when rows beyond the limit were left unread
+
+        Yields:
+            Rows in the same shape as query_database results
+
+        Raises:
+            RuntimeError: If the client is not configured
+        """
+        if not self.is_configured():
+            raise RuntimeError('Notion client not configured')
+
+        query_params = {'database_id': database_id, 'page_size': min(page_size, limit or 100, 100)}
+        if filters:
+            query_params['filter'] = filters
+        if sorts:
+            query_params['sorts'] = sorts
+
+        def fetch(cursor: Optional[str]) -> Dict:
+            params = dict(query_params, start_cursor=cursor) if cursor else query_params
+            return self.client.databases.query(**params)
+
+        pending = self._prefetch.submit(fetch, None)
+        yielded = 0
+        try:
+            while pending is not None:
+                response = pending.result()
+                pages = response.get('results', [])
+                more = bool(response.get('has_more') and response.get('next_cursor'))
+                pending = None
+                if more and (limit is None or yielded + len(pages) < limit):
+                    pending = self._prefetch.submit(fetch, response['next_cursor'])
+
+                batch = pages if limit is None else pages[:limit - yielded]
+                for page in batch:
+                    yield self._database_row(page)
+                    yielded += 1
+
+                if len(batch) < len(pages) or (more and pending is None):
+                    logger.warning(f"Notion database {database_id} query stopped at the {limit}-row limit; "
+                                   f"more rows were not read")
+                    return
+        finally:
+            # Caller stopped early - don't start a page nobody will read
+            if pending is not None:
+                pending.cancel()
+
     def search_all(self, query: str, filter_type: str = None, max_results: int = 500) -> Dict[str, Any]:
         """
         Search across Notion workspace and fetch all results (handles pagination automatically)
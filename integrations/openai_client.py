@@ -10,7 +10,7 @@ GPT-5.1 Features (November 2025):
 
 import os
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Union
 
 logger = logging.getLogger(__name__)
 
@@ -32,14 +32,20 @@ class OpenAIClient:
         self.model_instant = 'gpt-5.1-instant'  # Faster variant for simple tasks
 
         if OPENAI_AVAILABLE and self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
+            # Bounded so a hung call frees its orchestration worker
+            self.client = OpenAI(
+                api_key=self.api_key,
+                timeout=float(os.getenv('PROVIDER_TIMEOUT', '80')),
+                max_retries=1
+            )
 
     def is_configured(self) -> bool:
         """Check if client is properly configured"""
         return OPENAI_AVAILABLE and bool(self.api_key) and self.client is not None
 
     def draft_team_message(self, context: str, message_type: str = 'update',
-                          tone: str = 'professional') -> Dict[str, Any]:
+                          tone: str = 'professional',
+                          stream: bool = False) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
         """
         Draft internal team communication
 
@@ -47,6 +53,7 @@ class OpenAIClient:
             context: Context for the message
             message_type: Type (update, request, announcement, feedback)
             tone: Tone (professional, casual, urgent)
+            stream: Return an iterator of stream events instead of the full result
 
         Returns:
             Drafted message
@@ -86,13 +93,19 @@ Subject: [subject line]
 
 [message body]"""
 
+        messages = [
+            {"role": "system", "content": "You are a professional communication assistant helping draft clear, effective internal team messages."},
+            {"role": "user", "content": prompt}
+        ]
+
+        if stream:
+            return self._stream(messages, self.model, temperature=0.7, max_tokens=1024,
+                                extra={'message_type': message_type})
+
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a professional communication assistant helping draft clear, effective internal team messages."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=messages,
                 temperature=0.7,
                 max_tokens=1024
             )
@@ -112,13 +125,15 @@ Subject: [subject line]
             logger.error(f"OpenAI team message error: {e}")
             return {'success': False, 'error': str(e)}
 
-    def draft_slack_message(self, context: str, channel_type: str = 'project') -> Dict[str, Any]:
+    def draft_slack_message(self, context: str, channel_type: str = 'project',
+                            stream: bool = False) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
         """
         Draft a Slack message
 
         Args:
             context: Message context
             channel_type: Type of channel (project, general, client)
+            stream: Return an iterator of stream events instead of the full result
 
         Returns:
             Drafted Slack message with formatting
@@ -140,14 +155,20 @@ Format the message using Slack markdown:
 
 Keep it concise and scannable."""
 
+        messages = [
+            {"role": "system", "content": "You are a Slack communication expert. Create clear, well-formatted messages."},
+            {"role": "user", "content": prompt}
+        ]
+
+        if stream:
+            return self._stream(messages, self.model_instant, temperature=0.7, max_tokens=512,
+                                extra={'channel_type': channel_type})
+
         try:
             # Use instant model for simple drafting tasks
             response = self.client.chat.completions.create(
                 model=self.model_instant,
-                messages=[
-                    {"role": "system", "content": "You are a Slack communication expert. Create clear, well-formatted messages."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=messages,
                 temperature=0.7,
                 max_tokens=512
             )
@@ -162,12 +183,14 @@ Keep it concise and scannable."""
             logger.error(f"OpenAI Slack message error: {e}")
             return {'success': False, 'error': str(e)}
 
-    def summarize_thread(self, messages: List[Dict]) -> Dict[str, Any]:
+    def summarize_thread(self, messages: List[Dict],
+                         stream: bool = False) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
         """
         Summarize a conversation thread
 
         Args:
             messages: List of messages with 'author' and 'content'
+            stream: Return an iterator of stream events instead of the full result
 
         Returns:
             Thread summary with key points and action items
@@ -191,13 +214,19 @@ Provide:
 4. Unresolved questions
 5. Recommended next steps"""
 
+        chat_messages = [
+            {"role": "system", "content": "You are an expert at summarizing team conversations and extracting actionable insights."},
+            {"role": "user", "content": prompt}
+        ]
+
+        if stream:
+            return self._stream(chat_messages, self.model, temperature=0.3, max_tokens=1024,
+                                extra={'message_count': len(messages)})
+
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert at summarizing team conversations and extracting actionable insights."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=chat_messages,
                 temperature=0.3,
                 max_tokens=1024
             )
@@ -253,13 +282,15 @@ Provide:
             logger.error(f"OpenAI generate error: {e}")
             return {'success': False, 'error': str(e)}
 
-    def analyze_feedback(self, feedback: str, source: str = 'client') -> Dict[str, Any]:
+    def analyze_feedback(self, feedback: str, source: str = 'client',
+                         stream: bool = False) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
         """
         Analyze feedback and extract insights
 
         Args:
             feedback: Feedback text
             source: Source of feedback (client, team, stakeholder)
+            stream: Return an iterator of stream events instead of the full result
 
         Returns:
             Analyzed feedback with sentiment and recommendations
@@ -281,13 +312,19 @@ Provide:
 
 Return as structured analysis."""
 
+        messages = [
+            {"role": "system", "content": "You are an expert at analyzing feedback and extracting actionable insights."},
+            {"role": "user", "content": prompt}
+        ]
+
+        if stream:
+            return self._stream(messages, self.model, temperature=0.3, max_tokens=1024,
+                                extra={'source': source})
+
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert at analyzing feedback and extracting actionable insights."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=messages,
                 temperature=0.3,
                 max_tokens=1024
             )
@@ -301,3 +338,50 @@ Return as structured analysis."""
         except Exception as e:
             logger.error(f"OpenAI analyze feedback error: {e}")
             return {'success': False, 'error': str(e)}
+
+    def _stream(self, messages: List[Dict], model: str, temperature: float,
+                max_tokens: int, extra: Dict[str, Any] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a chat completion as chunk events followed by a final 'done' event
+
+        Args:
+            messages: Chat messages to send
+            model: Model to use
+            temperature: Creativity level (0-1)
+            max_tokens: Output token limit
+            extra: Additional fields for the final event
+
+        Yields:
+            {'type': 'chunk', 'text': ...} then {'type': 'done', 'model': ..., 'usage': ...}
+        """
+        usage = {}
+        try:
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={'include_usage': True}
+            )
+            for chunk in response:
+                if chunk.usage:
+                    usage = {
+                        'prompt_tokens': chunk.usage.prompt_tokens,
+                        'completion_tokens': chunk.usage.completion_tokens,
+                        'total_tokens': chunk.usage.total_tokens
+                    }
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield {'type': 'chunk', 'text': chunk.choices[0].delta.content}
+        except Exception as e:
+            logger.error(f"OpenAI stream error: {e}")
+            yield {'type': 'error', 'success': False, 'error': str(e)}
+            return
+
+        yield {
+            'type': 'done',
+            'success': True,
+            'model': model,
+            'usage': usage,
+            **(extra or {})
+        }
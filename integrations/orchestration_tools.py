@@ -0,0 +1,169 @@
+"""
+Orchestration Tools
+Gemini function declarations for the orchestrator's actions (used by ORCHESTRATION_ENGINE=tools)
+"""
+
+from typing import Dict, Any, List
+
+try:
+    from google.genai import types
+    GENAI_AVAILABLE = True
+except ImportError:
+    GENAI_AVAILABLE = False
+
+
+TOOLS_INSTRUCTIONS = """**Response Format:**
+
+If you can answer directly (questions, advice, chat, explanations), just reply in text.
+If you need real data or need to create something, call the matching tool(s). Calls made
+in the same turn run in parallel, so request everything you need at once.
+
+## Important Notes
+- Be conversational and helpful, not robotic
+- Answer questions directly when you can - don't always reach for tools
+- When unsure, ask clarifying questions
+- Remember you're helping the MWD team manage their work and clients
+"""
+
+_STRING = {'type': 'string'}
+_STRING_LIST = {'type': 'array', 'items': {'type': 'string'}}
+
+_CLIENT_BRIEF = {
+    'type': 'object',
+    'properties': {
+        'company_name': _STRING,
+        'industry': _STRING,
+        'target_audience': _STRING,
+        'key_services': _STRING_LIST,
+        'brand_values': _STRING_LIST,
+        'project_goals': _STRING_LIST,
+        'notes': {'type': 'string', 'description': 'Anything else from the request that matters'}
+    },
+    'required': ['company_name']
+}
+
+# Tool name -> (action type, description, JSON schema for the action params)
+TOOL_ACTIONS: Dict[str, tuple] = {
+    'research': ('RESEARCH', 'Deep industry research, market trends or any question needing current web data (Perplexity)', {
+        'type': 'object',
+        'properties': {
+            'topic': _STRING,
+            'depth': {'type': 'string', 'enum': ['quick', 'comprehensive']}
+        },
+        'required': ['topic']
+    }),
+    'competitors': ('COMPETITORS', 'Competitor analysis for a company (Perplexity)', {
+        'type': 'object',
+        'properties': {
+            'company': _STRING,
+            'competitors': _STRING_LIST,
+            'industry': _STRING
+        },
+        'required': ['company']
+    }),
+    'branding': ('BRANDING', 'Brand strategy, positioning and identity concepts for a client (Claude)', _CLIENT_BRIEF),
+    'website': ('WEBSITE', 'Website strategy, UX recommendations and site planning for a client (Claude)', _CLIENT_BRIEF),
+    'social': ('SOCIAL', 'Social media strategy, content calendars and platform recommendations (Claude)', _CLIENT_BRIEF),
+    'copywriting': ('COPYWRITING', 'Marketing copy, taglines and messaging for a client (Claude)', _CLIENT_BRIEF),
+    'client_email': ('CLIENT_EMAIL', 'Draft a professional client email', {
+        'type': 'object',
+        'properties': {
+            'context': _STRING,
+            'email_type': {'type': 'string', 'description': 'e.g. update, proposal, follow_up, onboarding'},
+            'client_name': _STRING
+        },
+        'required': ['context']
+    }),
+    'team_message': ('TEAM_MESSAGE', 'Draft an internal team message', {
+        'type': 'object',
+        'properties': {
+            'context': _STRING,
+            'message_type': {'type': 'string', 'description': 'e.g. update, announcement, reminder'},
+            'tone': _STRING
+        },
+        'required': ['context']
+    }),
+    'meeting_notes': ('MEETING_NOTES', 'Process and summarize a meeting transcript', {
+        'type': 'object',
+        'properties': {
+            'transcript': _STRING,
+            'participants': _STRING_LIST
+        },
+        'required': ['transcript']
+    }),
+    'notion': ('NOTION', 'Work with the Notion workspace: search, overview, query databases, create/update projects, meeting notes', {
+        'type': 'object',
+        'properties': {
+            'operation': {'type': 'string', 'enum': [
+                'workspace_overview', 'search', 'search_all', 'query_database', 'get_database_schema',
+                'create_project', 'update_status', 'create_meeting_notes', 'create_client_portal'
+            ]},
+            'query': _STRING,
+            'filter_type': {'type': 'string', 'enum': ['page', 'database']},
+            'database_id': _STRING,
+            'page_id': _STRING,
+            'status': _STRING,
+            'notes': _STRING,
+            'filters': {'type': 'object'},
+            'sorts': {'type': 'array', 'items': {'type': 'object'}},
+            'project_data': {'type': 'object'},
+            'meeting_data': {'type': 'object'}
+        },
+        'required': ['operation']
+    }),
+    'client_portal': ('CLIENT_PORTAL', 'Build a Notion portal for a new client', {
+        'type': 'object',
+        'properties': {
+            'company_name': _STRING,
+            'contact_name': _STRING,
+            'contact_email': _STRING,
+            'services': _STRING_LIST,
+            'industry': _STRING,
+            'project_timeline': _STRING,
+            'budget': _STRING,
+            'goals': _STRING
+        },
+        'required': ['company_name']
+    })
+}
+
+
+def build_tools() -> List[Any]:
+    """Gemini Tool list declaring every orchestrator action"""
+    return [types.Tool(function_declarations=[
+        types.FunctionDeclaration(name=name, description=description, parameters_json_schema=schema)
+        for name, (_, description, schema) in TOOL_ACTIONS.items()
+    ])]
+
+
+def call_to_action(call: Any, index: int) -> Dict[str, Any]:
+    """
+    Convert a Gemini function call into an orchestrator action
+
+    Args:
+        call: types.FunctionCall from the model response
+        index: Position of the call in the response (used as the action id)
+
+    Returns:
+        Action dict accepted by SlackBot._execute_actions
+    """
+    entry = TOOL_ACTIONS.get(call.name)
+    return {
+        'id': f'{call.name}_{index}',
+        'type': entry[0] if entry else call.name.upper(),
+        'params': dict(call.args or {}),
+        'tool': call.name,
+        'call_id': call.id
+    }
+
+
+def function_response_part(action: Dict[str, Any], result: Dict[str, Any]) -> Any:
+    """Wrap an action result as the function_response part sent back to Gemini"""
+    if result.get('success'):
+        payload = {'output': result.get('result', {})}
+    else:
+        payload = {'error': result.get('error') or result.get('result', {}).get('error', 'Action failed')}
+    part = types.Part.from_function_response(name=action['tool'], response=payload)
+    if action.get('call_id'):
+        part.function_response.id = action['call_id']
+    return part
@@ -0,0 +1,400 @@
+"""
+Email Outbox
+Durable outgoing email queue delivered by background senders over pooled SMTP connections
+"""
+
+import os
+import uuid
+import time
+import queue
+import smtplib
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPConnectionPool:
+    """Keeps logged-in SMTP connections open and health-checks them before reuse"""
+
+    def __init__(self, host: str = None, port: int = None, user: str = None, password: str = None,
+                 use_tls: bool = None, size: int = None, idle_timeout: float = None):
+        """
+        Args:
+            host: SMTP server host
+            port: SMTP server port
+            user: Login user (login is skipped when empty, e.g. a local aiosmtpd server)
+            password: Login password
+            use_tls: Upgrade with STARTTLS after connecting
+            size: Maximum idle connections kept open
+            idle_timeout: Seconds an idle connection is trusted before it is re-checked with NOOP
+        """
+        self.host = host if host is not None else os.getenv('SMTP_HOST', '')
+        self.port = port or int(os.getenv('SMTP_PORT', '587'))
+        self.user = user if user is not None else os.getenv('SMTP_USER', '')
+        self.password = password if password is not None else os.getenv('SMTP_PASSWORD', '')
+        self.use_tls = use_tls if use_tls is not None else os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
+        self.idle_timeout = idle_timeout or float(os.getenv('SMTP_IDLE_TIMEOUT', '60'))
+        self.size = size or int(os.getenv('SMTP_POOL_SIZE', '2'))
+
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=self.size)
+        self._stats = {'connects': 0, 'reuses': 0, 'reconnects': 0}
+        self._stats_lock = threading.Lock()
+
+    def is_configured(self) -> bool:
+        """A host is required; credentials are optional for local relays"""
+        return bool(self.host)
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _open(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
+            server.starttls()
+        if self.user:
+            server.login(self.user, self.password)
+        self._count('connects')
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _is_healthy(self, server: smtplib.SMTP, idle_since: float) -> bool:
+        if time.monotonic() - idle_since < self.idle_timeout:
+            return True
+        # Servers drop idle sessions - probe before trusting an old connection
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a ready-to-use connection
+
+        Connections that raise while borrowed are discarded instead of returned.
+        """
+        server = None
+        while server is None:
+            try:
+                candidate, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                server = self._open()
+                break
+            if self._is_healthy(candidate, idle_since):
+                server = candidate
+                self._count('reuses')
+            else:
+                self._close(candidate)
+                self._count('reconnects')
+
+        try:
+            yield server
+        except Exception:
+            self._close(server)
+            raise
+
+        try:
+            self._idle.put_nowait((server, time.monotonic()))
+        except queue.Full:
+            self._close(server)
+
+    def close_all(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['idle'] = self._idle.qsize()
+        return stats
+
+
+class EmailOutbox:
+    """
+    SQLite outbox - emails are queued instantly and delivered with retries by sender threads
+
+    A sender leases each email it claims (owner + locked_until). An email left
+    in 'sending' is only reclaimed once its lease has expired, so a second
+    process sharing the database never re-sends mail that is being sent
+    right now. One sender thread runs per pooled SMTP connection.
+    """
+
+    def __init__(self, pool: SMTPConnectionPool = None, db_path: str = None, max_attempts: int = None,
+                 backoff_base: float = None, backoff_max: float = 900.0, poll_interval: float = 1.0,
+                 senders: int = None, lease: float = None):
+        """
+        Args:
+            pool: SMTP connection pool
+            db_path: SQLite database file (created if missing)
+            max_attempts: Delivery attempts before an email is marked failed
+            backoff_base: Seconds before the first retry (doubles each attempt)
+            backoff_max: Upper bound on the retry delay
+            poll_interval: Seconds between outbox polls when idle
+            senders: Concurrent sender threads (defaults to the pool size)
+            lease: Seconds a claimed email stays reserved for its sender
+        """
+        self.pool = pool or SMTPConnectionPool()
+        self.db_path = db_path or os.getenv('EMAIL_OUTBOX_PATH', 'data/outbox.sqlite3')
+        self.max_attempts = max_attempts or int(os.getenv('EMAIL_MAX_ATTEMPTS', '5'))
+        self.backoff_base = backoff_base or float(os.getenv('EMAIL_RETRY_BACKOFF', '30'))
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+        self.senders = senders or self.pool.size
+        self.lease = lease or float(os.getenv('EMAIL_SEND_LEASE', '120'))
+        self.instance_id = uuid.uuid4().hex[:12]
+        self.from_email = os.getenv('SMTP_FROM_EMAIL', self.pool.user)
+        self.from_name = os.getenv('SMTP_FROM_NAME', 'MW Design Studio')
+
+        self._threads: List[threading.Thread] = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._init_db()
+
+    # =========================================================================
+    # STORAGE
+    # =========================================================================
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS emails (
+                    id TEXT PRIMARY KEY,
+                    to_email TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    html_body TEXT NOT NULL,
+                    text_body TEXT,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    last_error TEXT,
+                    owner TEXT,
+                    locked_until REAL,
+                    created_at REAL NOT NULL,
+                    sent_at REAL
+                )
+            """)
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(emails)')}
+            for column, kind in (('owner', 'TEXT'), ('locked_until', 'REAL')):
+                if column not in columns:
+                    # Databases created before sends were leased
+                    conn.execute(f'ALTER TABLE emails ADD COLUMN {column} {kind}')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_emails_due ON emails (status, next_attempt_at)')
+
+    @staticmethod
+    def _iso(ts: Optional[float]) -> Optional[str]:
+        return datetime.utcfromtimestamp(ts).isoformat() + 'Z' if ts else None
+
+    # =========================================================================
+    # PUBLIC API
+    # =========================================================================
+
+    def is_configured(self) -> bool:
+        return self.pool.is_configured()
+
+    def enqueue(self, to_email: str, subject: str, html_body: str, text_body: str = None) -> str:
+        """
+        Queue an email for background delivery
+
+        Returns:
+            The email id for status lookups
+        """
+        email_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO emails (id, to_email, subject, html_body, text_body, status, next_attempt_at, created_at) '
+                "VALUES (?, ?, ?, ?, ?, 'queued', ?, ?)",
+                (email_id, to_email, subject, html_body, text_body, now, now)
+            )
+        self._wakeup.set()
+        logger.info(f"Email {email_id} to {to_email} queued")
+        return email_id
+
+    def get(self, email_id: str) -> Optional[Dict[str, Any]]:
+        """Delivery status of a queued email"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM emails WHERE id = ?', (email_id,)).fetchone()
+        if not row:
+            return None
+        return {
+            'email_id': row['id'],
+            'to': row['to_email'],
+            'subject': row['subject'],
+            'status': row['status'],
+            'attempts': row['attempts'],
+            'last_error': row['last_error'],
+            'next_attempt_at': self._iso(row['next_attempt_at']) if row['status'] == 'retrying' else None,
+            'created_at': self._iso(row['created_at']),
+            'sent_at': self._iso(row['sent_at'])
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Email counts by status plus pool counters"""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT status, COUNT(*) AS n FROM emails GROUP BY status').fetchall()
+        return {
+            'counts': {row['status']: row['n'] for row in rows},
+            'senders': self.senders,
+            'pool': self.pool.stats()
+        }
+
+    def start(self):
+        """Start the sender threads (emails interrupted mid-send are reclaimed once their lease expires)"""
+        if any(thread.is_alive() for thread in self._threads):
+            return
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(target=self._sender_loop, name=f'email-outbox-{i}', daemon=True)
+            for i in range(self.senders)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def shutdown(self, timeout: float = 30.0):
+        """Deliver what is already due, then stop the senders and close connections"""
+        if not self._threads:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0, deadline - time.monotonic()))
+        self.pool.close_all()
+        self._threads = []
+
+    # =========================================================================
+    # SENDER
+    # =========================================================================
+
+    def _build_message(self, row: sqlite3.Row) -> MIMEMultipart:
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = row['subject']
+        msg['From'] = f"{self.from_name} <{self.from_email}>"
+        msg['To'] = row['to_email']
+
+        # Add plain text part
+        if row['text_body']:
+            msg.attach(MIMEText(row['text_body'], 'plain'))
+
+        # Add HTML part
+        msg.attach(MIMEText(row['html_body'], 'html'))
+        return msg
+
+    def _claim_due(self, limit: int = 1) -> List[sqlite3.Row]:
+        """Lease due emails (and 'sending' ones whose sender's lease ran out) to this instance"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = conn.execute(
+                    "SELECT * FROM emails WHERE (status IN ('queued', 'retrying') AND next_attempt_at <= ?) "
+                    "OR (status = 'sending' AND COALESCE(locked_until, 0) < ?) "
+                    'ORDER BY next_attempt_at LIMIT ?',
+                    (now, now, limit)
+                ).fetchall()
+                conn.executemany(
+                    "UPDATE emails SET status = 'sending', attempts = attempts + 1, owner = ?, locked_until = ? "
+                    'WHERE id = ?',
+                    [(self.instance_id, now + self.lease, row['id']) for row in rows]
+                )
+                conn.execute('COMMIT')
+                return rows
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def _renew_lease(self, email_id: str) -> bool:
+        """Extend this sender's lease right before sending (False if another sender has taken over)"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE emails SET locked_until = ? WHERE id = ? AND owner = ? AND status = 'sending'",
+                (time.time() + self.lease, email_id, self.instance_id)
+            )
+        return cursor.rowcount == 1
+
+    def _deliver(self, row: sqlite3.Row):
+        attempts = row['attempts'] + 1
+        try:
+            with self.pool.connection() as server:
+                # Borrowing a connection can take a while (reconnect, NOOP probe) - the lease
+                # may have run out and the email been reclaimed by another sender meanwhile
+                if not self._renew_lease(row['id']):
+                    logger.warning(f"Email {row['id']} lease lost before sending, leaving it to its new owner")
+                    return
+                server.send_message(self._build_message(row))
+        except Exception as e:
+            if attempts >= self.max_attempts:
+                status, next_attempt_at = 'failed', time.time()
+                logger.error(f"Email {row['id']} to {row['to_email']} failed permanently: {e}")
+            else:
+                delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+                status, next_attempt_at = 'retrying', time.time() + delay
+                logger.warning(f"Email {row['id']} attempt {attempts} failed, retrying in {delay:.0f}s: {e}")
+            with self._connect() as conn:
+                conn.execute(
+                    'UPDATE emails SET status = ?, next_attempt_at = ?, last_error = ?, owner = NULL '
+                    'WHERE id = ? AND owner = ?',
+                    (status, next_attempt_at, str(e), row['id'], self.instance_id)
+                )
+            return
+
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE emails SET status = 'sent', sent_at = ?, last_error = NULL, owner = NULL "
+                'WHERE id = ? AND owner = ?',
+                (time.time(), row['id'], self.instance_id)
+            )
+        logger.info(f"Email sent successfully to {row['to_email']}")
+
+    def _sender_loop(self):
+        while True:
+            try:
+                rows = self._claim_due()
+            except Exception as e:
+                logger.error(f"Email outbox claim error: {e}")
+                rows = []
+
+            for row in rows:
+                self._deliver(row)
+
+            if not rows:
+                if self._stopping.is_set():
+                    return
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
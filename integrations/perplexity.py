@@ -4,9 +4,10 @@ Perplexity Sonar Pro - Client communication and research
 """
 
 import os
+import json
 import logging
 import requests
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Union
 
 logger = logging.getLogger(__name__)
 
@@ -22,18 +23,22 @@ class PerplexityClient:
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
         }
+        # Reused across calls so TLS connections to the API stay pooled
+        self.session = requests.Session()
 
     def is_configured(self) -> bool:
         """Check if client is properly configured"""
         return bool(self.api_key)
 
-    def research_industry(self, industry: str, focus_areas: List[str] = None) -> Dict[str, Any]:
+    def research_industry(self, industry: str, focus_areas: List[str] = None,
+                          stream: bool = False) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
         """
         Research an industry for client work
 
         Args:
             industry: Industry to research
             focus_areas: Specific areas to focus on
+            stream: Return an iterator of stream events instead of the full result
 
         Returns:
             Research findings with citations
@@ -56,22 +61,27 @@ Provide:
 
 Include specific data, statistics, and cite sources."""
 
+        payload = {
+            'model': self.model,
+            'messages': [
+                {
+                    'role': 'system',
+                    'content': 'You are a market research expert. Provide detailed, data-driven insights with citations.'
+                },
+                {'role': 'user', 'content': prompt}
+            ],
+            'temperature': 0.3,
+            'max_tokens': 4096
+        }
+
+        if stream:
+            return self._stream(payload, timeout=60, extra={'industry': industry})
+
         try:
-            response = requests.post(
+            response = self.session.post(
                 f'{self.base_url}/chat/completions',
                 headers=self.headers,
-                json={
-                    'model': self.model,
-                    'messages': [
-                        {
-                            'role': 'system',
-                            'content': 'You are a market research expert. Provide detailed, data-driven insights with citations.'
-                        },
-                        {'role': 'user', 'content': prompt}
-                    ],
-                    'temperature': 0.3,
-                    'max_tokens': 4096
-                },
+                json=payload,
                 timeout=60
             )
             response.raise_for_status()
@@ -89,7 +99,8 @@ Include specific data, statistics, and cite sources."""
             return {'success': False, 'error': str(e)}
 
     def research_competitors(self, company: str, competitors: List[str] = None,
-                            industry: str = None) -> Dict[str, Any]:
+                            industry: str = None,
+                            stream: bool = False) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
         """
         Research competitors for a client
 
@@ -97,6 +108,7 @@ Include specific data, statistics, and cite sources."""
             company: Client company name
             competitors: Known competitors to research
             industry: Industry context
+            stream: Return an iterator of stream events instead of the full result
 
         Returns:
             Competitive analysis with citations
@@ -127,22 +139,27 @@ Then provide:
 
 Include specific data and cite sources."""
 
+        payload = {
+            'model': self.model,
+            'messages': [
+                {
+                    'role': 'system',
+                    'content': 'You are a competitive intelligence analyst. Provide thorough, factual analysis with citations.'
+                },
+                {'role': 'user', 'content': prompt}
+            ],
+            'temperature': 0.3,
+            'max_tokens': 4096
+        }
+
+        if stream:
+            return self._stream(payload, timeout=60, extra={'company': company})
+
         try:
-            response = requests.post(
+            response = self.session.post(
                 f'{self.base_url}/chat/completions',
                 headers=self.headers,
-                json={
-                    'model': self.model,
-                    'messages': [
-                        {
-                            'role': 'system',
-                            'content': 'You are a competitive intelligence analyst. Provide thorough, factual analysis with citations.'
-                        },
-                        {'role': 'user', 'content': prompt}
-                    ],
-                    'temperature': 0.3,
-                    'max_tokens': 4096
-                },
+                json=payload,
                 timeout=60
             )
             response.raise_for_status()
@@ -160,7 +177,8 @@ Include specific data and cite sources."""
             return {'success': False, 'error': str(e)}
 
     def draft_client_email(self, context: str, email_type: str = 'update',
-                          client_name: str = None) -> Dict[str, Any]:
+                          client_name: str = None,
+                          stream: bool = False) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
         """
         Draft client-facing email with current best practices
 
@@ -168,6 +186,7 @@ Include specific data and cite sources."""
             context: Email context and content needed
             email_type: Type (update, proposal, follow_up, introduction)
             client_name: Client name for personalization
+            stream: Return an iterator of stream events instead of the full result
 
         Returns:
             Professional client email
@@ -200,22 +219,27 @@ Subject: [subject line]
 
 [email body]"""
 
+        payload = {
+            'model': self.model,
+            'messages': [
+                {
+                    'role': 'system',
+                    'content': 'You are an expert at client communication. Write professional, effective emails that build relationships.'
+                },
+                {'role': 'user', 'content': prompt}
+            ],
+            'temperature': 0.7,
+            'max_tokens': 1024
+        }
+
+        if stream:
+            return self._stream(payload, timeout=30, extra={'email_type': email_type})
+
         try:
-            response = requests.post(
+            response = self.session.post(
                 f'{self.base_url}/chat/completions',
                 headers=self.headers,
-                json={
-                    'model': self.model,
-                    'messages': [
-                        {
-                            'role': 'system',
-                            'content': 'You are an expert at client communication. Write professional, effective emails that build relationships.'
-                        },
-                        {'role': 'user', 'content': prompt}
-                    ],
-                    'temperature': 0.7,
-                    'max_tokens': 1024
-                },
+                json=payload,
                 timeout=30
             )
             response.raise_for_status()
@@ -231,13 +255,15 @@ Subject: [subject line]
             logger.error(f"Perplexity client email error: {e}")
             return {'success': False, 'error': str(e)}
 
-    def research_topic(self, topic: str, depth: str = 'comprehensive') -> Dict[str, Any]:
+    def research_topic(self, topic: str, depth: str = 'comprehensive',
+                       stream: bool = False) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
         """
         General research on any topic
 
         Args:
             topic: Topic to research
             depth: Research depth (quick, moderate, comprehensive)
+            stream: Return an iterator of stream events instead of the full result
 
         Returns:
             Research findings with citations
@@ -262,22 +288,27 @@ Provide a {'brief overview' if depth == 'quick' else 'comprehensive analysis'} i
 
 Cite all sources."""
 
+        payload = {
+            'model': self.model,
+            'messages': [
+                {
+                    'role': 'system',
+                    'content': 'You are a research assistant. Provide accurate, well-sourced information.'
+                },
+                {'role': 'user', 'content': prompt}
+            ],
+            'temperature': 0.3,
+            'max_tokens': depth_tokens.get(depth, 2048)
+        }
+
+        if stream:
+            return self._stream(payload, timeout=60, extra={'topic': topic})
+
         try:
-            response = requests.post(
+            response = self.session.post(
                 f'{self.base_url}/chat/completions',
                 headers=self.headers,
-                json={
-                    'model': self.model,
-                    'messages': [
-                        {
-                            'role': 'system',
-                            'content': 'You are a research assistant. Provide accurate, well-sourced information.'
-                        },
-                        {'role': 'user', 'content': prompt}
-                    ],
-                    'temperature': 0.3,
-                    'max_tokens': depth_tokens.get(depth, 2048)
-                },
+                json=payload,
                 timeout=60
             )
             response.raise_for_status()
@@ -294,12 +325,14 @@ Cite all sources."""
             logger.error(f"Perplexity research error: {e}")
             return {'success': False, 'error': str(e)}
 
-    def get_market_data(self, query: str) -> Dict[str, Any]:
+    def get_market_data(self, query: str,
+                        stream: bool = False) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
         """
         Get current market data and statistics
 
         Args:
             query: Specific data or statistics needed
+            stream: Return an iterator of stream events instead of the full result
 
         Returns:
             Market data with sources
@@ -318,22 +351,27 @@ Provide:
 
 Only include data from reliable sources. Cite all sources with dates."""
 
+        payload = {
+            'model': self.model,
+            'messages': [
+                {
+                    'role': 'system',
+                    'content': 'You are a market data analyst. Provide accurate statistics with proper citations.'
+                },
+                {'role': 'user', 'content': prompt}
+            ],
+            'temperature': 0.1,
+            'max_tokens': 2048
+        }
+
+        if stream:
+            return self._stream(payload, timeout=30, extra={'query': query})
+
         try:
-            response = requests.post(
+            response = self.session.post(
                 f'{self.base_url}/chat/completions',
                 headers=self.headers,
-                json={
-                    'model': self.model,
-                    'messages': [
-                        {
-                            'role': 'system',
-                            'content': 'You are a market data analyst. Provide accurate statistics with proper citations.'
-                        },
-                        {'role': 'user', 'content': prompt}
-                    ],
-                    'temperature': 0.1,
-                    'max_tokens': 2048
-                },
+                json=payload,
                 timeout=30
             )
             response.raise_for_status()
@@ -349,3 +387,57 @@ Only include data from reliable sources. Cite all sources with dates."""
         except Exception as e:
             logger.error(f"Perplexity market data error: {e}")
             return {'success': False, 'error': str(e)}
+
+    def _stream(self, payload: Dict[str, Any], timeout: int,
+                extra: Dict[str, Any] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a chat completion as chunk events followed by a final 'done' event
+
+        Args:
+            payload: Chat completions request body
+            timeout: Seconds to wait between streamed bytes
+            extra: Additional fields for the final event
+
+        Yields:
+            {'type': 'chunk', 'text': ...} then {'type': 'done', 'citations': ..., 'usage': ...}
+        """
+        citations = []
+        usage = {}
+        try:
+            # Closed on exit - including when the consumer stops iterating early
+            with self.session.post(
+                f'{self.base_url}/chat/completions',
+                headers=self.headers,
+                json={**payload, 'stream': True},
+                timeout=timeout,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith('data:'):
+                        continue
+                    data = line[len('data:'):].strip()
+                    if data == '[DONE]':
+                        break
+
+                    chunk = json.loads(data)
+                    citations = chunk.get('citations') or citations
+                    usage = chunk.get('usage') or usage
+                    choices = chunk.get('choices') or [{}]
+                    text = choices[0].get('delta', {}).get('content')
+                    if text:
+                        yield {'type': 'chunk', 'text': text}
+        except Exception as e:
+            logger.error(f"Perplexity stream error: {e}")
+            yield {'type': 'error', 'success': False, 'error': str(e)}
+            return
+
+        yield {
+            'type': 'done',
+            'success': True,
+            'model': self.model,
+            'citations': citations,
+            'usage': usage,
+            **(extra or {})
+        }
@@ -0,0 +1,126 @@
+"""
+Provider Registry
+Process-wide, thread-safe home for shared provider clients (SDK clients and HTTP sessions)
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+def _default_factories() -> Dict[str, Callable[[], Any]]:
+    """Lazy constructors used when a provider was not registered explicitly"""
+    # Imported on demand to avoid circular imports with slack_bot
+    def gemini():
+        from integrations.gemini import GeminiClient
+        return GeminiClient()
+
+    def openai():
+        from integrations.openai_client import OpenAIClient
+        return OpenAIClient()
+
+    def perplexity():
+        from integrations.perplexity import PerplexityClient
+        return PerplexityClient()
+
+    def notion():
+        from integrations.notion import NotionClient
+        return NotionClient()
+
+    def knowledge():
+        from integrations.knowledge_index import KnowledgeIndex
+        return KnowledgeIndex()
+
+    def strategy():
+        from integrations.strategy import StrategyService, create_anthropic_client
+        return StrategyService(create_anthropic_client())
+
+    return {
+        'gemini': gemini,
+        'openai': openai,
+        'perplexity': perplexity,
+        'notion': notion,
+        'knowledge': knowledge,
+        'strategy': strategy
+    }
+
+
+class ProviderRegistry:
+    """Hands out one shared instance per provider so connection pools stay warm"""
+
+    def __init__(self, providers: Dict[str, Any] = None, use_defaults: bool = True):
+        """
+        Args:
+            providers: Already-built instances keyed by name (e.g. {'notion': notion_client})
+            use_defaults: Build missing providers on first use with their default constructor
+        """
+        self._instances: Dict[str, Any] = dict(providers or {})
+        self._factories: Dict[str, Callable[[], Any]] = _default_factories() if use_defaults else {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def testing(cls, **fakes) -> 'ProviderRegistry':
+        """
+        Registry holding only the given fakes - any other provider lookup raises
+
+        Example:
+            registry = ProviderRegistry.testing(perplexity=FakePerplexity())
+            bot = SlackBot(providers=registry)
+        """
+        return cls(providers=fakes, use_defaults=False)
+
+    def register(self, name: str, instance: Any):
+        """Register (or replace) the shared instance for a provider"""
+        with self._lock:
+            self._instances[name] = instance
+
+    def register_factory(self, name: str, factory: Callable[[], Any]):
+        """Register a constructor used the first time a provider is requested"""
+        with self._lock:
+            self._factories[name] = factory
+
+    def get(self, name: str) -> Any:
+        """
+        Get the shared instance for a provider, building it once if needed
+
+        Raises:
+            KeyError: If the provider is neither registered nor has a factory
+        """
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                factory = self._factories.get(name)
+                if factory is None:
+                    raise KeyError(f'Unknown provider: {name}')
+                instance = factory()
+                self._instances[name] = instance
+                logger.info(f"Provider {name} initialized")
+            return instance
+
+    @contextmanager
+    def override(self, **fakes):
+        """Temporarily swap providers (e.g. local fakes in tests), restoring them on exit"""
+        with self._lock:
+            previous = {name: self._instances.get(name) for name in fakes}
+            self._instances.update(fakes)
+        try:
+            yield self
+        finally:
+            with self._lock:
+                for name, instance in previous.items():
+                    if instance is None:
+                        self._instances.pop(name, None)
+                    else:
+                        self._instances[name] = instance
+
+    def names(self) -> List[str]:
+        """Providers currently built or buildable"""
+        with self._lock:
+            return sorted(set(self._instances) | set(self._factories))
@@ -0,0 +1,164 @@
+"""
+Response Cache
+Content-addressed LRU cache for AI responses with TTL and an optional on-disk tier
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """LRU + TTL response cache keyed on (template, model, canonical payload)"""
+
+    def __init__(self, max_entries: int = None, ttl: float = None, disk_path: str = None):
+        """
+        Args:
+            max_entries: Maximum in-memory entries before LRU eviction
+            ttl: Seconds an entry stays valid
+            disk_path: SQLite file for the on-disk tier (disabled when empty)
+        """
+        self.max_entries = max_entries or int(os.getenv('RESPONSE_CACHE_SIZE', '256'))
+        self.ttl = ttl or float(os.getenv('RESPONSE_CACHE_TTL', '86400'))
+        self.disk_path = disk_path if disk_path is not None else os.getenv('RESPONSE_CACHE_PATH', '')
+
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'bypassed': 0, 'evictions': 0, 'stores': 0}
+
+        if self.disk_path:
+            directory = os.path.dirname(self.disk_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS response_cache (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        expires_at REAL NOT NULL
+                    )
+                """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.disk_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(template_id: str, model: str, payload: Any) -> str:
+        """
+        Build a content-addressed cache key
+
+        The payload is canonicalized (sorted keys, compact separators) so that
+        semantically identical client briefs map to the same key.
+        """
+        canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'),
+                               ensure_ascii=False, default=str)
+        digest = hashlib.sha256(f"{template_id}\x00{model}\x00{canonical}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached response (memory first, then disk)"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry[1]
+                del self._entries[key]
+
+        value = self._disk_get(key, now)
+        with self._lock:
+            if value is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['disk_hits'] += 1
+            self._store_memory(key, value, now + self.ttl)
+        return value
+
+    def contains(self, key: str) -> bool:
+        """Check for a live entry without counting a hit or miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return True
+        return self._disk_get(key, now) is not None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Store a response in memory and (if enabled) on disk"""
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store_memory(key, value, expires_at)
+            self._stats['stores'] += 1
+
+        if self.disk_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO response_cache (key, value, expires_at) VALUES (?, ?, ?)',
+                        (key, json.dumps(value, default=str), expires_at)
+                    )
+                    conn.execute('DELETE FROM response_cache WHERE expires_at <= ?', (time.time(),))
+            except Exception as e:
+                logger.error(f"Response cache disk write error: {e}")
+
+    def record_bypass(self):
+        """Count a request that skipped the cache"""
+        with self._lock:
+            self._stats['bypassed'] += 1
+
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+        if self.disk_path:
+            with self._connect() as conn:
+                conn.execute('DELETE FROM response_cache')
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['disk_hits']) / lookups, 3) if lookups else 0.0
+        stats['max_entries'] = self.max_entries
+        stats['disk_tier'] = bool(self.disk_path)
+        return stats
+
+    def _store_memory(self, key: str, value: Dict[str, Any], expires_at: float):
+        # Caller holds self._lock
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _disk_get(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        if not self.disk_path:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    'SELECT value FROM response_cache WHERE key = ? AND expires_at > ?', (key, now)
+                ).fetchone()
+            return json.loads(row[0]) if row else None
+        except Exception as e:
+            logger.error(f"Response cache disk read error: {e}")
+            return None
@@ -9,8 +9,22 @@ import logging
 import hashlib
 import hmac
 import time
+import asyncio
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
 
+from integrations.registry import ProviderRegistry
+from integrations.intent_router import IntentRouter
+from integrations.orchestration_tools import TOOLS_INSTRUCTIONS, build_tools, call_to_action, function_response_part
+from integrations.slack_stream import SlackReplyStream
+from integrations.thread_history import ThreadHistoryCache
+from integrations.thread_memory import ThreadMemory
+from integrations.gemini_cache import GeminiPromptCache
+from integrations.conversation_store import ConversationWriter, SupabaseConversationRepository
+from integrations.strategy import load_knowledge_base
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -29,10 +43,139 @@ except ImportError:
     GENAI_AVAILABLE = False
 
 
+# Orchestrator actions served by the shared StrategyService
+STRATEGY_ACTIONS = {
+    'BRANDING': 'branding',
+    'WEBSITE': 'website',
+    'SOCIAL': 'social',
+    'COPYWRITING': 'copywriting'
+}
+
+# Actions whose result is already a conversational, plain-text reply. Anything else
+# (structured strategy JSON, Notion records, meeting notes) goes through synthesis.
+TEMPLATED_ACTIONS = {'RESEARCH', 'COMPETITORS', 'TEAM_MESSAGE', 'CLIENT_EMAIL'}
+
+# Status lines shown in a streamed reply while each action runs
+ACTION_STAGES = {
+    'RESEARCH': 'Researching',
+    'COMPETITORS': 'Analyzing competitors',
+    'BRANDING': 'Drafting brand strategy',
+    'WEBSITE': 'Planning website strategy',
+    'SOCIAL': 'Building social media strategy',
+    'COPYWRITING': 'Writing copy',
+    'CLIENT_EMAIL': 'Drafting client email',
+    'TEAM_MESSAGE': 'Drafting team message',
+    'MEETING_NOTES': 'Summarizing meeting notes',
+    'NOTION': 'Querying Notion',
+    'CLIENT_PORTAL': 'Building client portal'
+}
+
+
+# Feature reference included in the orchestrator's static prompt prefix
+CAPABILITIES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 'MWD_ASSISTANT_CAPABILITIES.md')
+
+# Shared orchestrator persona and capabilities (both engines)
+ORCHESTRATOR_CONTEXT = """You are the MWD Assistant - the internal AI assistant for MW Design Studio.
+
+## About MW Design Studio
+MW Design Studio was founded by Sheri McDowell and Tierra White to empower small businesses with big ideas.
+Mission: Help businesses look professional, feel authentic, and grow sustainably.
+
+## The Team
+
+**Sheri McDowell** - Co-Founder
+- Expertise: Brand strategy, visual design, identity systems
+- Handles: Branding projects, logo design, brand guidelines, website design
+- Style: Strategic, detail-oriented, design-focused
+
+**Tierra White** - Co-Founder
+- Expertise: Marketing, photography, social media, content creation
+- Handles: Social media strategy, content creation, photography, marketing campaigns
+- Style: Creative, community-focused, storytelling
+
+## Services & Pricing
+Branding, Website Development & Hosting, Social Media Management, Copywriting, Photography and
+(coming soon) Automation Systems. Current packages, prices and availability are in the Knowledge Base
+section below - quote only those and never invent prices.
+
+## Your Role
+You're the team's helpful assistant. You can chat naturally, answer questions, give advice, and execute tasks.
+Be casual yet professional - you're talking to teammates (Sheri and Tierra), not clients.
+Be proactive and helpful. If you can answer something directly, do it. Only use tools when actually needed.
+Know who handles what - route questions to the right person when needed.
+
+## Your Capabilities
+
+**AI-Powered Tools:**
+1. RESEARCH - Deep industry research, competitor analysis, market trends (via Perplexity)
+2. BRANDING - Brand strategy, positioning, identity concepts (via Claude)
+3. WEBSITE - Website strategy, UX recommendations, site planning (via Claude)
+4. SOCIAL - Social media strategy, content calendars, platform recommendations (via Claude)
+5. COPYWRITING - Marketing copy, taglines, messaging (via Claude)
+6. CLIENT_EMAIL - Draft professional client emails (via Perplexity)
+7. MEETING_NOTES - Process and summarize meeting transcripts (via Gemini)
+
+**Workspace Tools:**
+8. NOTION - Search workspace, get overview, query databases, create/update projects, meeting notes
+9. CLIENT_PORTAL - Build comprehensive Notion portals for clients
+
+**Communication:**
+10. TEAM_MESSAGE - Draft internal team messages (via GPT)
+
+## How to Respond
+
+**For general questions, advice, or conversation:**
+Respond directly! You know about design, marketing, project management, client relations. Share your knowledge.
+
+**For tasks that need tools:**
+Use the appropriate action(s) to get real data or create things.
+
+"""
+
+# Plan engine: Gemini answers with a JSON plan that is executed, then summarized
+PLAN_INSTRUCTIONS = """**Response Format:**
+
+If you can answer directly (questions, advice, chat, explanations):
+{
+    "understanding": "What they're asking/saying",
+    "actions": [],
+    "direct_response": "Your helpful, conversational response. Be natural and informative."
+}
+
+If you need to use tools:
+{
+    "understanding": "What they want to accomplish",
+    "actions": [
+        {
+            "id": "short_unique_id",
+            "type": "ACTION_TYPE",
+            "params": {"key": "value"},
+            "depends_on": [],
+            "reason": "Why this helps"
+        }
+    ],
+    "response_plan": "How to present the results"
+}
+
+Independent actions run in parallel. Only list ids in "depends_on" when an
+action needs another action's output (it is added to that action's context).
+
+## Important Notes
+- Be conversational and helpful, not robotic
+- Answer questions directly when you can - don't always reach for tools
+- For BRANDING, WEBSITE, SOCIAL and COPYWRITING, put the client brief in params (company_name, industry, target_audience, key_services, ...)
+- For Notion operations, include the specific operation in params: "operation": "workspace_overview" / "search" / "query_database" etc.
+- When unsure, ask clarifying questions
+- Remember you're helping the MWD team manage their work and clients
+"""
+
+
 class SlackBot:
     """Conversational Slack bot with Gemini orchestration"""
 
-    def __init__(self, supabase_client=None):
+    def __init__(self, supabase_client=None, providers: ProviderRegistry = None,
+                 conversations: ConversationWriter = None):
         self.bot_token = os.getenv('SLACK_BOT_TOKEN', '')
         self.signing_secret = os.getenv('SLACK_SIGNING_SECRET', '')
         self.app_token = os.getenv('SLACK_APP_TOKEN', '')
@@ -40,7 +183,44 @@ class SlackBot:
         self.client = None
         self.gemini_client = None
         self.supabase = supabase_client
+        # Conversation log written behind the reply path in bulk
+        self.conversations = conversations
+        if self.conversations is None and supabase_client is not None:
+            self.conversations = ConversationWriter(SupabaseConversationRepository(supabase_client))
         self.bot_user_id = None
+        # Shared provider clients (built once, reused by every action)
+        self.providers = providers or ProviderRegistry()
+        # Local fast path in front of the Gemini planning call
+        self.router = None
+        if os.getenv('INTENT_ROUTER', 'true').lower() == 'true':
+            try:
+                knowledge = self.providers.get('knowledge')
+            except KeyError:
+                knowledge = None
+            self.router = IntentRouter(knowledge=knowledge)
+
+        # Reply through one placeholder message edited in place instead of reactions
+        self.streaming = os.getenv('SLACK_STREAM_REPLIES', 'true').lower() == 'true'
+        # 'plan' (JSON plan + summary call) or 'tools' (native function calling)
+        self.engine = os.getenv('ORCHESTRATION_ENGINE', 'plan').lower()
+        if self.engine not in ('plan', 'tools'):
+            logger.warning(f"Unknown ORCHESTRATION_ENGINE {self.engine}, using plan")
+            self.engine = 'plan'
+        self.orchestration_tools = build_tools() if GENAI_AVAILABLE else None
+        self._engine_stats: Dict[str, Dict[str, Any]] = {}
+        self._engine_lock = threading.Lock()
+
+        # Shared pool for orchestration actions (kept outside the per-message event loop).
+        # Provider clients time out after PROVIDER_TIMEOUT, so an action abandoned by
+        # ORCHESTRATION_ACTION_TIMEOUT releases its thread shortly afterwards.
+        self.action_workers = int(os.getenv('ORCHESTRATION_ACTION_WORKERS', '8'))
+        self.action_executor = ThreadPoolExecutor(
+            max_workers=self.action_workers,
+            thread_name_prefix='orchestration-action'
+        )
+        self._actions_inflight: Dict[int, Dict[str, Any]] = {}
+        self._action_tokens = itertools.count()
+        self._action_stats = {'started': 0, 'timeouts': 0, 'saturated': 0}
 
         # Initialize Slack client
         if SLACK_SDK_AVAILABLE and self.bot_token:
@@ -52,11 +232,34 @@ class SlackBot:
             except SlackApiError as e:
                 logger.error(f"Slack auth failed: {e}")
 
+        # Thread messages cached between turns (filled from events and our replies)
+        self.history = ThreadHistoryCache(self.client, self.bot_user_id)
+        # Rolling summary + recent turns keeps the orchestration prompt bounded
+        self.memory = ThreadMemory(self._summarize_thread) if os.getenv(
+            'THREAD_MEMORY', 'true').lower() == 'true' else None
+        self.summary_model = os.getenv('THREAD_SUMMARY_MODEL', 'gemini-2.0-flash-exp')
+
         # Initialize Gemini for orchestration
         if GENAI_AVAILABLE:
             api_key = os.getenv('GEMINI_API_KEY', '')
             if api_key:
-                self.gemini_client = genai.Client(api_key=api_key)
+                self.gemini_client = genai.Client(
+                    api_key=api_key,
+                    http_options=types.HttpOptions(timeout=int(float(os.getenv('PROVIDER_TIMEOUT', '80')) * 1000))
+                )
+
+        # Feature reference for "can you..." questions, part of the static orchestrator prefix
+        try:
+            with open(CAPABILITIES_PATH, encoding='utf-8') as f:
+                self.capabilities = f.read()
+        except OSError as e:
+            logger.warning(f"Capabilities reference not available: {e}")
+            self.capabilities = ''
+
+        # Static orchestrator prompts large enough to cache are sent once as Gemini cached content
+        self.prompt_cache = None
+        if self.gemini_client and os.getenv('GEMINI_CONTEXT_CACHE', 'true').lower() == 'true':
+            self.prompt_cache = GeminiPromptCache(self.gemini_client, 'gemini-3-pro-preview')
 
     def is_configured(self) -> bool:
         """Check if bot is properly configured for basic Slack operations"""
@@ -123,31 +326,47 @@ class SlackBot:
             return {'success': True, 'limited_mode': True}
 
         # Get conversation history for context
+        self.history.observe(channel_id, thread_ts, event)
         conversation_history = await self._get_conversation_history(
             channel_id,
             thread_ts or message_ts
         )
 
-        # Send thinking indicator
-        self._send_reaction(channel_id, message_ts, 'thinking_face')
+        # Show progress: a placeholder reply that is edited in place, or reactions
+        stream = None
+        if self.streaming:
+            stream = SlackReplyStream(self.client, channel_id, thread_ts or message_ts)
+            if not stream.start():
+                stream = None
+        if not stream:
+            self._send_reaction(channel_id, message_ts, 'thinking_face')
 
         try:
             # Orchestrate with Gemini
             response = await self._orchestrate_request(
                 user_message,
                 conversation_history,
-                user_id
+                user_id,
+                stream=stream,
+                thread_key=f'{channel_id}:{thread_ts or message_ts}',
+                message_ts=message_ts
             )
 
             # Send response to Slack
-            result = self._send_message(
-                channel_id,
-                response['message'],
-                thread_ts=thread_ts or message_ts
-            )
+            if stream:
+                sent = stream.finish(response['message'])
+            else:
+                sent = self._send_message(
+                    channel_id,
+                    response['message'],
+                    thread_ts=thread_ts or message_ts
+                )
+            self.history.observe(channel_id, thread_ts or message_ts, {
+                'user': self.bot_user_id, 'text': response['message'], 'ts': sent.get('ts')
+            })
 
-            # Store conversation in Supabase
-            if self.supabase:
+            # Store conversation (buffered - never blocks the reply)
+            if self.conversations:
                 await self._store_conversation(
                     channel_id,
                     thread_ts or message_ts,
@@ -157,19 +376,25 @@ class SlackBot:
                 )
 
             # Remove thinking reaction
-            self._remove_reaction(channel_id, message_ts, 'thinking_face')
-            self._send_reaction(channel_id, message_ts, 'white_check_mark')
+            if not stream:
+                self._remove_reaction(channel_id, message_ts, 'thinking_face')
+                self._send_reaction(channel_id, message_ts, 'white_check_mark')
 
             return {'success': True, 'response': response}
 
         except Exception as e:
             logger.error(f"Error handling message: {e}")
+            error_text = f"Sorry, I encountered an error: {str(e)}"
+            if stream:
+                stream.finish(error_text)
+                return {'success': False, 'error': str(e)}
+
             self._remove_reaction(channel_id, message_ts, 'thinking_face')
             self._send_reaction(channel_id, message_ts, 'x')
 
             self._send_message(
                 channel_id,
-                f"Sorry, I encountered an error: {str(e)}",
+                error_text,
                 thread_ts=thread_ts or message_ts
             )
 
@@ -177,181 +402,317 @@ class SlackBot:
 
     async def _orchestrate_request(self, message: str,
                                    history: List[Dict],
-                                   user_id: str) -> Dict[str, Any]:
+                                   user_id: str,
+                                   stream: SlackReplyStream = None,
+                                   thread_key: str = None,
+                                   message_ts: str = None) -> Dict[str, Any]:
         """
         Use Gemini to orchestrate the request
 
-        Gemini analyzes the request and decides which tools/AIs to use
+        Gemini analyzes the request and decides which tools/AIs to use.
+        Opening messages the intent router recognizes with high confidence
+        skip Gemini and are answered directly. When a stream is given, action
+        status and the final response text are shown in it as they arrive.
         """
+        if self.router:
+            # The fetched history includes the message being answered
+            earlier = [msg for msg in history if not message_ts or msg.get('ts') != message_ts]
+            route = self.router.route(message, history=earlier)
+            if route:
+                routed = await self._run_routed(route, stream)
+                if routed:
+                    return routed
+                self.router.record_fast_path_failure()
+
+        started = time.monotonic()
 
         # Build conversation context
-        context_messages = "\n".join([
-            f"{msg['role']}: {msg['content']}"
-            for msg in history[-10:]  # Last 10 messages for context
-        ])
-
-        # System prompt for MWD Assistant
-        system_prompt = """You are the MWD Assistant - the internal AI assistant for MW Design Studio.
+        if self.memory and thread_key:
+            context_messages = self.memory.context(thread_key, history)
+        else:
+            context_messages = "\n".join([
+                f"{msg['role']}: {msg['content']}"
+                for msg in history[-10:]  # Last 10 messages for context
+            ])
 
-## About MW Design Studio
-MW Design Studio was founded by Sheri McDowell and Tierra White to empower small businesses with big ideas.
-Mission: Help businesses look professional, feel authentic, and grow sustainably.
+        prompt = f"""Previous conversation:
+{context_messages}
 
-## The Team
+Current request from user: {message}"""
 
-**Sheri McDowell** - Co-Founder
-- Expertise: Brand strategy, visual design, identity systems
-- Handles: Branding projects, logo design, brand guidelines, website design
-- Style: Strategic, detail-oriented, design-focused
+        try:
+            if self.engine == 'tools':
+                response = await self._orchestrate_with_tools(prompt, stream)
+            else:
+                response = await self._orchestrate_with_plan(message, prompt, stream)
+        except Exception as e:
+            logger.error(f"Orchestration error: {e}")
+            raise
 
-**Tierra White** - Co-Founder
-- Expertise: Marketing, photography, social media, content creation
-- Handles: Social media strategy, content creation, photography, marketing campaigns
-- Style: Creative, community-focused, storytelling
+        elapsed = time.monotonic() - started
+        self._record_engine_run(response['plan'], elapsed)
+        if self.router:
+            self.router.record_orchestration(elapsed)
+        return response
 
-## Services & Pricing
+    async def _orchestrate_with_plan(self, message: str, prompt: str,
+                                     stream: SlackReplyStream = None) -> Dict[str, Any]:
+        """
+        Plan engine: Gemini returns a JSON plan, the actions run, and a second
+        Gemini call turns the results into the reply
+        """
+        response = self.gemini_client.models.generate_content(
+            model='gemini-3-pro-preview',
+            contents=prompt + "\n\nAnalyze this request and provide your orchestration plan.",
+            config=self._prompt_config(
+                'orchestrator-plan',
+                self._orchestrator_context() + PLAN_INSTRUCTIONS,
+                temperature=0.3,
+                max_output_tokens=2048
+            )
+        )
 
-**Branding** (from $750)
-- Logo design & brand identity
-- Color palette & typography
-- Brand guidelines
-- Social media assets
-- Voice & messaging framework
-
-**Website Design** (custom quote)
-- Responsive, hand-coded sites
-- User journey optimization
-- SEO-friendly structure
-- Reliable hosting included
-- Conversion-focused design
-
-**Social Media** (from $350)
-- Platform strategy
-- Content creation
-- Community management
-- Scheduling & analytics
-- Engagement strategies
-
-**Content Creation**
-- Copywriting (from $250): Brand storytelling, website copy, email sequences
-- Photography (from $200): Brand photos, product shots, lifestyle imagery
-
-**Automation Systems** (from $500)
-- Lead nurturing workflows
-- Appointment scheduling
-- Email automation
-- CRM setup
-- Operations streamlining
+        # Parse Gemini's orchestration plan
+        plan = self._parse_orchestration_plan(response.text)
+        plan.update({'engine': 'plan', 'model_calls': 1})
 
-## Your Role
-You're the team's helpful assistant. You can chat naturally, answer questions, give advice, and execute tasks.
-Be casual yet professional - you're talking to teammates (Sheri and Tierra), not clients.
-Be proactive and helpful. If you can answer something directly, do it. Only use tools when actually needed.
-Know who handles what - route questions to the right person when needed.
+        # Execute the plan
+        if plan.get('direct_response'):
+            return {
+                'message': plan['direct_response'],
+                'actions_taken': [],
+                'plan': plan
+            }
 
-## Your Capabilities
+        # Execute actions and collect results
+        results = await self._execute_actions(plan.get('actions', []), stream)
 
-**AI-Powered Tools:**
-1. RESEARCH - Deep industry research, competitor analysis, market trends (via Perplexity)
-2. BRANDING - Brand strategy, positioning, identity concepts (via Claude)
-3. WEBSITE - Website strategy, UX recommendations, site planning (via Claude)
-4. SOCIAL - Social media strategy, content calendars, platform recommendations (via Claude)
-5. COPYWRITING - Marketing copy, taglines, messaging (via Claude)
-6. CLIENT_EMAIL - Draft professional client emails (via Perplexity)
-7. MEETING_NOTES - Process and summarize meeting transcripts (via Gemini)
+        # Generate final response
+        final_response = await self._generate_final_response(
+            message, plan, results, stream
+        )
+        plan['model_calls'] = 2
 
-**Workspace Tools:**
-8. NOTION - Search workspace, get overview, query databases, create/update projects, meeting notes
-9. CLIENT_PORTAL - Build comprehensive Notion portals for clients
+        return {
+            'message': final_response,
+            'actions_taken': [a['type'] for a in plan.get('actions', [])],
+            'results': results,
+            'plan': plan
+        }
 
-**Communication:**
-10. TEAM_MESSAGE - Draft internal team messages (via GPT)
+    async def _orchestrate_with_tools(self, prompt: str,
+                                      stream: SlackReplyStream = None) -> Dict[str, Any]:
+        """
+        Tools engine: Gemini native function calling
 
-## How to Respond
+        One model turn either answers directly or calls tools (run in
+        parallel). A single successful plain-text result is templated
+        straight into the reply; anything else (including a turn with
+        neither calls nor text) goes through one synthesis turn.
+        """
+        contents = [types.Content(role='user', parts=[types.Part.from_text(text=prompt)])]
+        system_prompt = self._orchestrator_context() + TOOLS_INSTRUCTIONS
+        response = self.gemini_client.models.generate_content(
+            model='gemini-3-pro-preview',
+            contents=contents,
+            config=self._prompt_config(
+                'orchestrator-tools',
+                system_prompt,
+                tools=self.orchestration_tools,
+                temperature=0.3,
+                max_output_tokens=2048,
+                automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=True)
+            )
+        )
 
-**For general questions, advice, or conversation:**
-Respond directly! You know about design, marketing, project management, client relations. Share your knowledge.
+        calls = response.function_calls or []
+        plan = {'understanding': 'Native function calling', 'engine': 'tools', 'model_calls': 1}
+        if not calls and response.text:
+            return {'message': response.text, 'actions_taken': [], 'plan': plan}
 
-**For tasks that need tools:**
-Use the appropriate action(s) to get real data or create things.
+        actions = [call_to_action(call, index) for index, call in enumerate(calls)]
+        plan['actions'] = actions
+        results = await self._execute_actions(actions, stream) if actions else []
 
-**Response Format:**
+        if len(results) == 1 and results[0].get('success'):
+            templated = self._format_action_result(actions[0], results[0]['result'])
+            if templated:
+                plan['templated'] = True
+                return {
+                    'message': templated,
+                    'actions_taken': [actions[0]['type']],
+                    'results': results,
+                    'plan': plan
+                }
 
-If you can answer directly (questions, advice, chat, explanations):
-{
-    "understanding": "What they're asking/saying",
-    "actions": [],
-    "direct_response": "Your helpful, conversational response. Be natural and informative."
-}
+        # Synthesis turn - the model sees its own calls plus their results, no further tool use.
+        # An empty first turn (no calls, no text) is simply asked again for a text reply.
+        if actions:
+            contents.append(response.candidates[0].content)
+            contents.append(types.Content(role='user', parts=[
+                function_response_part(action, result) for action, result in zip(actions, results)
+            ]))
+        if stream:
+            stream.stage('reply', 'Writing the reply')
+        final_text = self._generate_text(contents, self._prompt_config(
+            'orchestrator-tools-reply',
+            system_prompt,
+            tools=self.orchestration_tools,
+            tool_config=types.ToolConfig(
+                function_calling_config=types.FunctionCallingConfig(mode='NONE')
+            ),
+            temperature=0.7,
+            max_output_tokens=2048,
+            automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=True)
+        ), stream)
+        plan['model_calls'] = 2
 
-If you need to use tools:
-{
-    "understanding": "What they want to accomplish",
-    "actions": [
-        {
-            "type": "ACTION_TYPE",
-            "params": {"key": "value"},
-            "reason": "Why this helps"
+        return {
+            'message': final_text,
+            'actions_taken': [a['type'] for a in actions],
+            'results': results,
+            'plan': plan
         }
-    ],
-    "response_plan": "How to present the results"
-}
-
-## Important Notes
-- Be conversational and helpful, not robotic
-- Answer questions directly when you can - don't always reach for tools
-- For Notion operations, include the specific operation in params: "operation": "workspace_overview" / "search" / "query_database" etc.
-- When unsure, ask clarifying questions
-- Remember you're helping the MWD team manage their work and clients
-"""
 
-        prompt = f"""Previous conversation:
-{context_messages}
+    def _orchestrator_context(self) -> str:
+        """
+        ORCHESTRATOR_CONTEXT plus the full knowledge base and the capabilities reference
 
-Current request from user: {message}
+        This is the static prefix stored as Gemini cached content - it only changes
+        when the knowledge base does, and it is large enough for the cache minimum.
+        """
+        try:
+            chunks = self.providers.get('knowledge').chunks()
+            knowledge = '\n\n'.join(f"### {chunk['heading']}\n{chunk['text']}" for chunk in chunks)
+        except KeyError:
+            knowledge = load_knowledge_base('SERVICES.md')
+        except Exception as e:
+            # A knowledge-base file changing mid-rebuild must not fail the reply
+            logger.warning(f"Knowledge index unavailable, using SERVICES.md: {e}")
+            knowledge = load_knowledge_base('SERVICES.md')
 
-Analyze this request and provide your orchestration plan."""
+        prefix = f"{ORCHESTRATOR_CONTEXT}## Knowledge Base\n\n{knowledge}\n\n"
+        if self.capabilities:
+            prefix += f"## Assistant Capabilities Reference\n\n{self.capabilities}\n\n"
+        return prefix
 
-        try:
-            response = self.gemini_client.models.generate_content(
-                model='gemini-3-pro-preview',
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    temperature=0.3,
-                    max_output_tokens=2048,
-                    system_instruction=system_prompt
-                )
-            )
+    def _prompt_config(self, cache_key: str, system_instruction: str, tools: List[Any] = None,
+                       tool_config: Any = None, **settings) -> Any:
+        """
+        GenerateContentConfig for a static system prompt
 
-            # Parse Gemini's orchestration plan
-            plan = self._parse_orchestration_plan(response.text)
+        References the prompt's Gemini cached content when available (the
+        cache holds the instruction, tools and tool config, which must then
+        be left out of the request) and sends everything inline otherwise.
+        """
+        cached = self.prompt_cache.get(cache_key, system_instruction, tools, tool_config) if self.prompt_cache else None
+        if cached:
+            return types.GenerateContentConfig(cached_content=cached, **settings)
+        return types.GenerateContentConfig(
+            system_instruction=system_instruction,
+            tools=tools,
+            tool_config=tool_config,
+            **settings
+        )
 
-            # Execute the plan
-            if plan.get('direct_response'):
-                return {
-                    'message': plan['direct_response'],
-                    'actions_taken': [],
-                    'plan': plan
+    def _record_engine_run(self, plan: Dict, seconds: float):
+        engine = plan.get('engine', self.engine)
+        with self._engine_lock:
+            stats = self._engine_stats.setdefault(
+                engine, {'requests': 0, 'model_calls': 0, 'templated': 0, 'total_seconds': 0.0}
+            )
+            stats['requests'] += 1
+            stats['model_calls'] += plan.get('model_calls', 0)
+            stats['templated'] += 1 if plan.get('templated') else 0
+            stats['total_seconds'] += seconds
+
+    def orchestration_stats(self) -> Dict[str, Any]:
+        """Per-engine request counts, model calls and latency (for comparing engines)"""
+        with self._engine_lock:
+            engines = {
+                name: {
+                    'requests': s['requests'],
+                    'templated': s['templated'],
+                    'avg_model_calls': round(s['model_calls'] / s['requests'], 2),
+                    'avg_seconds': round(s['total_seconds'] / s['requests'], 3)
                 }
+                for name, s in self._engine_stats.items()
+            }
+            action_pool = {
+                'workers': self.action_workers,
+                'running': len(self._actions_inflight),
+                'abandoned_running': sum(1 for a in self._actions_inflight.values() if a['abandoned_at']),
+                **self._action_stats
+            }
+        return {'engine': self.engine, 'engines': engines, 'action_pool': action_pool}
+
+    def _run_action_tracked(self, token: int, action: Dict, upstream: List[Dict]) -> Dict[str, Any]:
+        """Run an action in a pool thread, counting threads held by abandoned actions"""
+        with self._engine_lock:
+            self._actions_inflight[token] = {'abandoned_at': None}
+            self._action_stats['started'] += 1
+            if len(self._actions_inflight) >= self.action_workers:
+                self._action_stats['saturated'] += 1
+                logger.warning(f"Orchestration action pool saturated ({self.action_workers} workers busy)")
+        try:
+            return self._execute_action(action, upstream)
+        finally:
+            with self._engine_lock:
+                abandoned_at = self._actions_inflight.pop(token)['abandoned_at']
+            if abandoned_at is not None:
+                logger.info(f"Abandoned action {action.get('type', '')} released its worker "
+                            f"{time.monotonic() - abandoned_at:.0f}s after timing out")
+
+    async def _run_routed(self, route: Dict,
+                          stream: SlackReplyStream = None) -> Optional[Dict[str, Any]]:
+        """
+        Complete a fast-path route without Gemini
+
+        Returns:
+            Orchestration response, or None if the routed action failed and the
+            message should go through the full Gemini plan instead
+        """
+        plan = {'understanding': f"Routed locally as {route['intent']}", 'router': route}
+        if route.get('answer'):
+            return {'message': route['answer'], 'actions_taken': [], 'plan': plan}
 
-            # Execute actions and collect results
-            results = await self._execute_actions(plan.get('actions', []))
+        results = await self._execute_actions([route['action']], stream)
+        if not results[0].get('success'):
+            logger.info(f"Fast-path {route['intent']} failed, falling back to Gemini")
+            return None
 
-            # Generate final response
-            final_response = await self._generate_final_response(
-                message, plan, results
-            )
+        message = self._format_action_result(route['action'], results[0]['result'])
+        if not message:
+            return None
 
-            return {
-                'message': final_response,
-                'actions_taken': [a['type'] for a in plan.get('actions', [])],
-                'results': results,
-                'plan': plan
-            }
+        return {
+            'message': message,
+            'actions_taken': [route['action']['type']],
+            'results': results,
+            'plan': plan
+        }
 
-        except Exception as e:
-            logger.error(f"Orchestration error: {e}")
-            raise
+    @staticmethod
+    def _format_action_result(action: Dict, result: Dict) -> Optional[str]:
+        """Template a single plain-text action result for Slack (None if it needs synthesis)"""
+        params = action.get('params', {})
+        if action.get('type') == 'NOTION' and params.get('operation') in ('search', 'search_all'):
+            query = params.get('query', '')
+            items = result.get('results', [])
+            if not items:
+                return f"I couldn't find anything in Notion for *{query}*."
+            lines = [f"• <{item['url']}|{item['title'] or 'Untitled'}> ({item['type']})" for item in items[:10]]
+            return f"*Notion results for \"{query}\"*\n" + "\n".join(lines)
+
+        if action.get('type') not in TEMPLATED_ACTIONS:
+            return None
+        text = result.get('response')
+        if not isinstance(text, str) or not text.strip() or text.lstrip().startswith(('{', '[', '```')):
+            return None
+        citations = result.get('citations') or []
+        if citations:
+            text += "\n\n*Sources:*\n" + "\n".join(f"• {url}" for url in citations[:5])
+        return text
 
     def _parse_orchestration_plan(self, response_text: str) -> Dict:
         """Parse Gemini's JSON response"""
@@ -370,60 +731,183 @@ Analyze this request and provide your orchestration plan."""
             'direct_response': response_text
         }
 
-    async def _execute_actions(self, actions: List[Dict]) -> List[Dict]:
-        """Execute the planned actions by calling appropriate endpoints"""
-        results = []
+    async def _execute_actions(self, actions: List[Dict],
+                               stream: SlackReplyStream = None) -> List[Dict]:
+        """
+        Execute the planned actions as a dependency graph
+
+        Actions may carry an "id" and a "depends_on" list of ids (or plan
+        indexes). Independent actions run concurrently in worker threads, each
+        bounded by a timeout; an action starts once everything it depends on
+        has succeeded and receives their output as context. Results are
+        returned in plan order. Timed-out actions are abandoned, not awaited.
+        """
+        ids = [str(action.get('id') or index) for index, action in enumerate(actions)]
+        index_of = {action_id: index for index, action_id in enumerate(ids)}
+        deps = []
+        for index, action in enumerate(actions):
+            depends_on = action.get('depends_on') or []
+            if not isinstance(depends_on, list):
+                depends_on = [depends_on]
+            deps.append([index_of.get(str(d)) for d in depends_on])
+
+        results: List[Optional[Dict]] = [None] * len(actions)
+        default_timeout = float(os.getenv('ORCHESTRATION_ACTION_TIMEOUT', '90'))
+
+        # Reject unknown dependencies and cycles up front so nothing waits forever
+        runnable = self._schedulable_actions(deps)
+        for index, action in enumerate(actions):
+            if index not in runnable:
+                results[index] = {
+                    'id': ids[index],
+                    'action': action.get('type', ''),
+                    'success': False,
+                    'error': 'Invalid depends_on (unknown action id or dependency cycle)'
+                }
 
-        for action in actions:
+        tasks: Dict[int, asyncio.Task] = {}
+        loop = asyncio.get_running_loop()
+
+        async def run(index: int) -> Dict:
+            action = actions[index]
             action_type = action.get('type', '')
-            params = action.get('params', {})
+            upstream = [await tasks[d] for d in deps[index]]
 
-            try:
-                # Import here to avoid circular imports
-                if action_type == 'RESEARCH':
-                    from integrations.perplexity import PerplexityClient
-                    client = PerplexityClient()
-                    result = client.research_topic(
-                        params.get('topic', ''),
-                        params.get('depth', 'comprehensive')
+            failed = [r['id'] for r in upstream if not r.get('success')]
+            if failed:
+                result = {
+                    'id': ids[index],
+                    'action': action_type,
+                    'success': False,
+                    'error': f"Skipped: dependency {', '.join(failed)} failed"
+                }
+            else:
+                timeout = float(action.get('timeout') or default_timeout)
+                if stream:
+                    stream.stage(ids[index], ACTION_STAGES.get(action_type, action_type.title()))
+                token = next(self._action_tokens)
+                try:
+                    outcome = await asyncio.wait_for(
+                        loop.run_in_executor(self.action_executor, self._run_action_tracked, token, action, upstream),
+                        timeout=timeout
                     )
+                    result = {
+                        'id': ids[index],
+                        'action': action_type,
+                        'success': outcome.get('success', True),
+                        'result': outcome
+                    }
+                except asyncio.TimeoutError:
+                    logger.warning(f"Action {action_type} timed out after {timeout:g}s")
+                    with self._engine_lock:
+                        self._action_stats['timeouts'] += 1
+                        if token in self._actions_inflight:
+                            # Still holding a pool thread until its provider call returns
+                            self._actions_inflight[token]['abandoned_at'] = time.monotonic()
+                    result = {
+                        'id': ids[index],
+                        'action': action_type,
+                        'success': False,
+                        'error': f'Timed out after {timeout:g}s'
+                    }
+                except Exception as e:
+                    logger.error(f"Action {action_type} failed: {e}")
+                    result = {
+                        'id': ids[index],
+                        'action': action_type,
+                        'success': False,
+                        'error': str(e)
+                    }
 
-                elif action_type == 'BRANDING':
-                    # Call internal branding endpoint
-                    import requests
-                    response = requests.post(
-                        'http://localhost:8080/branding',
-                        json=params,
-                        timeout=60
-                    )
-                    result = response.json() if response.ok else {'success': False, 'error': response.text}
-
-                elif action_type == 'COMPETITORS':
-                    from integrations.perplexity import PerplexityClient
-                    client = PerplexityClient()
-                    result = client.research_competitors(
-                        params.get('company', ''),
-                        params.get('competitors', []),
-                        params.get('industry', '')
-                    )
+            if stream:
+                stream.stage(ids[index], ACTION_STAGES.get(action_type, action_type.title()),
+                             'done' if result['success'] else 'failed')
+            results[index] = result
+            return result
 
-                elif action_type == 'TEAM_MESSAGE':
-                    from integrations.openai_client import OpenAIClient
-                    client = OpenAIClient()
-                    result = client.draft_team_message(
-                        params.get('context', ''),
-                        params.get('message_type', 'update'),
-                        params.get('tone', 'professional')
-                    )
+        # Tasks are created in topological order so dependencies exist before dependents
+        for index in runnable:
+            tasks[index] = asyncio.create_task(run(index))
+        if tasks:
+            await asyncio.gather(*tasks.values())
+
+        return results
 
-                    # Fallback to Gemini if OpenAI fails
-                    if not result.get('success'):
-                        logger.info("OpenAI failed, falling back to Gemini for team message")
-                        context = params.get('context', '')
-                        message_type = params.get('message_type', 'update')
-                        tone = params.get('tone', 'professional')
+    @staticmethod
+    def _schedulable_actions(deps: List[List[Optional[int]]]) -> List[int]:
+        """Topological order of actions whose dependencies exist and are acyclic"""
+        remaining = {
+            index for index, action_deps in enumerate(deps)
+            if all(d is not None and d != index for d in action_deps)
+        }
+        order = []
+        progress = True
+        while progress:
+            progress = False
+            for index in sorted(remaining):
+                if all(d in order for d in deps[index]):
+                    order.append(index)
+                    remaining.discard(index)
+                    progress = True
+        return order
+
+    @staticmethod
+    def _with_upstream(params: Dict, upstream: List[Dict]) -> Dict:
+        """Add dependency outputs to an action's context parameter"""
+        if not upstream:
+            return params
+        outputs = []
+        for dep in upstream:
+            output = dep.get('result', {})
+            text = output.get('response') or json.dumps(output, default=str)[:4000]
+            outputs.append(f"[{dep['action']}]\n{text}")
+        params = dict(params)
+        prior = params.get('context', '')
+        params['context'] = (f"{prior}\n\n" if prior else '') + "Results from earlier steps:\n" + "\n\n".join(outputs)
+        return params
+
+    def _execute_action(self, action: Dict, upstream: List[Dict] = None) -> Dict:
+        """Run a single planned action by calling the matching integration"""
+        action_type = action.get('type', '')
+        params = self._with_upstream(action.get('params', {}), upstream or [])
+
+        # Providers come from the shared registry so HTTP sessions stay warm
+        if action_type == 'RESEARCH':
+            client = self.providers.get('perplexity')
+            result = client.research_topic(
+                params.get('topic', ''),
+                params.get('depth', 'comprehensive')
+            )
 
-                        prompt = f"""Draft an internal team {message_type} message.
+        elif action_type in STRATEGY_ACTIONS:
+            # Strategy deliverables run in-process (no loopback HTTP to /branding etc.)
+            strategy = self.providers.get('strategy')
+            result = strategy.generate_deliverable(STRATEGY_ACTIONS[action_type], params)
+
+        elif action_type == 'COMPETITORS':
+            client = self.providers.get('perplexity')
+            result = client.research_competitors(
+                params.get('company', ''),
+                params.get('competitors', []),
+                params.get('industry', '')
+            )
+
+        elif action_type == 'TEAM_MESSAGE':
+            client = self.providers.get('openai')
+            result = client.draft_team_message(
+                params.get('context', ''),
+                params.get('message_type', 'update'),
+                params.get('tone', 'professional')
+            )
+
+            # Fallback to Gemini if OpenAI fails
+            if not result.get('success'):
+                logger.info("OpenAI failed, falling back to Gemini for team message")
+                context = params.get('context', '')
+                message_type = params.get('message_type', 'update')
+                tone = params.get('tone', 'professional')
+
+                prompt = f"""Draft an internal team {message_type} message.
 Tone: {tone}
 Context: {context}
 
@@ -438,127 +922,110 @@ Subject: [subject line]
 
 [message body]"""
 
-                        response = self.gemini_client.models.generate_content(
-                            model='gemini-3-pro-preview',
-                            contents=prompt
-                        )
-                        result = {
-                            'success': True,
-                            'response': response.text,
-                            'model': 'gemini-3-pro-preview (fallback)',
-                            'message_type': message_type
-                        }
-
-                elif action_type == 'CLIENT_EMAIL':
-                    from integrations.perplexity import PerplexityClient
-                    client = PerplexityClient()
-                    result = client.draft_client_email(
-                        params.get('context', ''),
-                        params.get('email_type', 'update'),
-                        params.get('client_name', '')
-                    )
+                response = self.gemini_client.models.generate_content(
+                    model='gemini-3-pro-preview',
+                    contents=prompt
+                )
+                result = {
+                    'success': True,
+                    'response': response.text,
+                    'model': 'gemini-3-pro-preview (fallback)',
+                    'message_type': message_type
+                }
 
-                elif action_type == 'MEETING_NOTES':
-                    from integrations.gemini import GeminiClient
-                    client = GeminiClient()
-                    result = client.generate_meeting_notes(
-                        params.get('transcript', ''),
-                        params.get('participants', [])
-                    )
+        elif action_type == 'CLIENT_EMAIL':
+            client = self.providers.get('perplexity')
+            result = client.draft_client_email(
+                params.get('context', ''),
+                params.get('email_type', 'update'),
+                params.get('client_name', '')
+            )
 
-                elif action_type == 'NOTION':
-                    from integrations.notion import NotionClient
-                    client = NotionClient()
-                    operation = params.get('operation', '')
-
-                    if operation == 'create_project':
-                        result = client.create_project_page(
-                            params.get('database_id') or os.getenv('NOTION_PROJECTS_DATABASE', ''),
-                            params.get('project_data', {})
-                        )
-                    elif operation == 'search':
-                        result = client.search(
-                            params.get('query', ''),
-                            params.get('filter_type'),
-                            params.get('page_size', 100),
-                            params.get('start_cursor')
-                        )
-                    elif operation == 'search_all':
-                        result = client.search_all(
-                            params.get('query', ''),
-                            params.get('filter_type'),
-                            params.get('max_results', 500)
-                        )
-                    elif operation == 'query_database':
-                        result = client.query_database(
-                            params.get('database_id') or os.getenv('NOTION_PROJECTS_DATABASE', ''),
-                            params.get('filters'),
-                            params.get('sorts'),
-                            params.get('page_size', 100),
-                            params.get('start_cursor')
-                        )
-                    elif operation == 'get_database_schema':
-                        result = client.get_database_schema(
-                            params.get('database_id') or os.getenv('NOTION_PROJECTS_DATABASE', '')
-                        )
-                    elif operation == 'update_status':
-                        result = client.update_project_status(
-                            params.get('page_id', ''),
-                            params.get('status', ''),
-                            params.get('notes')
-                        )
-                    elif operation == 'create_meeting_notes':
-                        result = client.create_meeting_notes(
-                            params.get('database_id') or os.getenv('NOTION_MEETINGS_DATABASE', ''),
-                            params.get('meeting_data', {})
-                        )
-                    elif operation == 'workspace_overview':
-                        result = client.workspace_overview()
-                    elif operation == 'create_client_portal':
-                        result = client.create_client_portal(
-                            params.get('parent_page_id', ''),
-                            params.get('client_data', {})
-                        )
-                    else:
-                        result = {'success': False, 'error': f'Unknown Notion operation: {operation}. Available: create_project, search, search_all, query_database, get_database_schema, update_status, create_meeting_notes, workspace_overview, create_client_portal'}
-
-                elif action_type == 'CLIENT_PORTAL':
-                    from integrations.notion import NotionClient
-                    client = NotionClient()
-                    parent_page_id = params.get('parent_page_id') or os.getenv('NOTION_PORTALS_PAGE', '')
-                    client_data = {
-                        'company_name': params.get('company_name', 'New Client'),
-                        'contact_name': params.get('contact_name', ''),
-                        'contact_email': params.get('contact_email', ''),
-                        'services': params.get('services', []),
-                        'industry': params.get('industry', ''),
-                        'project_timeline': params.get('project_timeline', ''),
-                        'budget': params.get('budget', ''),
-                        'goals': params.get('goals', '')
-                    }
-                    result = client.create_client_portal(parent_page_id, client_data)
+        elif action_type == 'MEETING_NOTES':
+            client = self.providers.get('gemini')
+            result = client.generate_meeting_notes(
+                params.get('transcript', ''),
+                params.get('participants', [])
+            )
 
-                else:
-                    result = {'success': False, 'error': f'Unknown action: {action_type}'}
+        elif action_type == 'NOTION':
+            client = self.providers.get('notion')
+            operation = params.get('operation', '')
 
-                results.append({
-                    'action': action_type,
-                    'success': result.get('success', True),
-                    'result': result
-                })
+            if operation == 'create_project':
+                result = client.create_project_page(
+                    params.get('database_id') or os.getenv('NOTION_PROJECTS_DATABASE', ''),
+                    params.get('project_data', {})
+                )
+            elif operation == 'search':
+                result = client.search(
+                    params.get('query', ''),
+                    params.get('filter_type'),
+                    params.get('page_size', 100),
+                    params.get('start_cursor')
+                )
+            elif operation == 'search_all':
+                result = client.search_all(
+                    params.get('query', ''),
+                    params.get('filter_type'),
+                    params.get('max_results', 500)
+                )
+            elif operation == 'query_database':
+                result = client.query_database(
+                    params.get('database_id') or os.getenv('NOTION_PROJECTS_DATABASE', ''),
+                    params.get('filters'),
+                    params.get('sorts'),
+                    params.get('page_size', 100),
+                    params.get('start_cursor')
+                )
+            elif operation == 'get_database_schema':
+                result = client.get_database_schema(
+                    params.get('database_id') or os.getenv('NOTION_PROJECTS_DATABASE', '')
+                )
+            elif operation == 'update_status':
+                result = client.update_project_status(
+                    params.get('page_id', ''),
+                    params.get('status', ''),
+                    params.get('notes')
+                )
+            elif operation == 'create_meeting_notes':
+                result = client.create_meeting_notes(
+                    params.get('database_id') or os.getenv('NOTION_MEETINGS_DATABASE', ''),
+                    params.get('meeting_data', {})
+                )
+            elif operation == 'workspace_overview':
+                result = client.workspace_overview()
+            elif operation == 'create_client_portal':
+                result = client.create_client_portal(
+                    params.get('parent_page_id', ''),
+                    params.get('client_data', {})
+                )
+            else:
+                result = {'success': False, 'error': f'Unknown Notion operation: {operation}. Available: create_project, search, search_all, query_database, get_database_schema, update_status, create_meeting_notes, workspace_overview, create_client_portal'}
+
+        elif action_type == 'CLIENT_PORTAL':
+            client = self.providers.get('notion')
+            parent_page_id = params.get('parent_page_id') or os.getenv('NOTION_PORTALS_PAGE', '')
+            client_data = {
+                'company_name': params.get('company_name', 'New Client'),
+                'contact_name': params.get('contact_name', ''),
+                'contact_email': params.get('contact_email', ''),
+                'services': params.get('services', []),
+                'industry': params.get('industry', ''),
+                'project_timeline': params.get('project_timeline', ''),
+                'budget': params.get('budget', ''),
+                'goals': params.get('goals', '')
+            }
+            result = client.create_client_portal(parent_page_id, client_data)
 
-            except Exception as e:
-                logger.error(f"Action {action_type} failed: {e}")
-                results.append({
-                    'action': action_type,
-                    'success': False,
-                    'error': str(e)
-                })
+        else:
+            result = {'success': False, 'error': f'Unknown action: {action_type}'}
 
-        return results
+        return result
 
     async def _generate_final_response(self, original_request: str,
-                                       plan: Dict, results: List[Dict]) -> str:
+                                       plan: Dict, results: List[Dict],
+                                       stream: SlackReplyStream = None) -> str:
         """Generate user-friendly response from action results"""
 
         # Build context for response generation
@@ -579,53 +1046,71 @@ Generate a helpful, conversational response for the user that:
 
 Keep it concise but informative."""
 
-        response = self.gemini_client.models.generate_content(
+        if stream:
+            stream.stage('reply', 'Writing the reply')
+        return self._generate_text(prompt, types.GenerateContentConfig(
+            temperature=0.7,
+            max_output_tokens=2048,
+        ), stream)
+
+    def _generate_text(self, contents: Any, config: Any, stream: SlackReplyStream = None) -> str:
+        """Gemini text generation, streamed into the reply as it is produced when a stream is given"""
+        if not stream:
+            return self.gemini_client.models.generate_content(
+                model='gemini-3-pro-preview',
+                contents=contents,
+                config=config
+            ).text or ''
+
+        text = ''
+        for chunk in self.gemini_client.models.generate_content_stream(
             model='gemini-3-pro-preview',
+            contents=contents,
+            config=config
+        ):
+            if chunk.text:
+                text += chunk.text
+                stream.update(text)
+        return text
+
+    def _summarize_thread(self, summary: str, messages: List[Dict]) -> str:
+        """Fold older thread messages into the thread's rolling summary (runs in the background)"""
+        transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+        prompt = f"""Update the running summary of a Slack conversation between the MWD team and their assistant.
+
+Current summary:
+{summary or '(none yet)'}
+
+New messages:
+{transcript}
+
+Write the updated summary in at most 150 words. Keep client names, requests, decisions,
+open questions and the key facts from any reports; drop pleasantries and long report text."""
+
+        response = self.gemini_client.models.generate_content(
+            model=self.summary_model,
             contents=prompt,
             config=types.GenerateContentConfig(
-                temperature=0.7,
-                max_output_tokens=2048,
+                temperature=0.2,
+                max_output_tokens=512
             )
         )
-
         return response.text
 
     async def _get_conversation_history(self, channel_id: str,
                                         thread_ts: str) -> List[Dict]:
-        """Get conversation history from thread or Supabase"""
-        history = []
-
-        # Try to get from Slack thread
-        if self.client:
-            try:
-                result = self.client.conversations_replies(
-                    channel=channel_id,
-                    ts=thread_ts,
-                    limit=20
-                )
-
-                for msg in result.get('messages', []):
-                    role = 'assistant' if msg.get('user') == self.bot_user_id else 'user'
-                    history.append({
-                        'role': role,
-                        'content': msg.get('text', ''),
-                        'ts': msg.get('ts')
-                    })
-
-            except SlackApiError as e:
-                logger.error(f"Error getting thread history: {e}")
-
-        return history
+        """Get conversation history for a thread (cached, fetching only what's missing)"""
+        return self.history.get(channel_id, thread_ts)
 
     async def _store_conversation(self, channel_id: str, thread_ts: str,
                                   user_id: str, user_message: str,
                                   response: Dict):
-        """Store conversation in Supabase for persistence"""
-        if not self.supabase:
+        """Queue the conversation for the write-behind store (bulk inserted in the background)"""
+        if not self.conversations:
             return
 
         try:
-            self.supabase.table('conversations').insert({
+            self.conversations.write({
                 'channel_id': channel_id,
                 'thread_ts': thread_ts,
                 'user_id': user_id,
@@ -636,7 +1121,7 @@ Keep it concise but informative."""
                     'plan': response.get('plan', {}),
                     'results': response.get('results', [])
                 }
-            }).execute()
+            })
         except Exception as e:
             logger.error(f"Error storing conversation: {e}")
 
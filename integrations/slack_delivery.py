@@ -0,0 +1,236 @@
+"""
+Slack Delivery Queue
+Posts Slack messages from a background thread with per-channel pacing and Retry-After handling
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SlackDeliveryQueue:
+    """
+    Background chat.postMessage sender
+
+    Messages for a channel are posted in order, no faster than one per
+    min_interval seconds. A 429 pauses only that channel for Retry-After
+    seconds. Messages can name a thread (thread_key) that later messages
+    reply under (reply_to) before the parent's ts is known. Thread keys are
+    recorded in SQLite, so a reply queued by a durable job resolves its parent
+    after a restart or from another process. A reply whose parent has not
+    been posted yet waits up to thread_wait seconds before going top-level.
+    """
+
+    def __init__(self, client=None, min_interval: float = None, max_attempts: int = 5,
+                 db_path: str = None, thread_wait: float = 60.0, thread_retention: float = 7 * 86400):
+        """
+        Args:
+            client: slack_sdk WebClient (posting is disabled when None)
+            min_interval: Minimum seconds between posts to the same channel
+            max_attempts: Attempts per message for non-rate-limit errors
+            db_path: SQLite file mapping thread keys to posted message ts
+            thread_wait: Seconds a reply waits for an unposted parent
+            thread_retention: Seconds a thread key is kept
+        """
+        self.client = client
+        self.min_interval = min_interval if min_interval is not None else float(
+            os.getenv('SLACK_POST_INTERVAL', '1.0'))
+        self.max_attempts = max_attempts
+        self.db_path = db_path or os.getenv('SLACK_THREADS_PATH', 'data/slack_threads.sqlite3')
+        self.thread_wait = thread_wait
+        self.thread_retention = thread_retention
+
+        self._channels: 'OrderedDict[str, deque]' = OrderedDict()
+        self._next_allowed: Dict[str, float] = {}
+        self._thread_ts: 'OrderedDict[str, Optional[str]]' = OrderedDict()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._worker: Optional[threading.Thread] = None
+        self._stats = {'posted': 0, 'rate_limited': 0, 'retried': 0, 'failed': 0}
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS threads (
+                    thread_key TEXT PRIMARY KEY,
+                    ts TEXT,
+                    created_at REAL NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def is_configured(self) -> bool:
+        return self.client is not None
+
+    def post(self, channel: str, text: str, thread_key: str = None, reply_to: str = None):
+        """
+        Queue a message
+
+        Args:
+            channel: Channel id or name
+            text: Message text
+            thread_key: Name for this message so later messages can reply under it
+            reply_to: thread_key of an earlier message to reply under
+        """
+        with self._cond:
+            self._channels.setdefault(channel, deque()).append({
+                'channel': channel,
+                'text': text,
+                'thread_key': thread_key,
+                'reply_to': reply_to,
+                'attempts': 0,
+                'queued_at': time.monotonic()
+            })
+            self._cond.notify()
+        self.start()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self._stats)
+            stats['queued'] = sum(len(q) for q in self._channels.values())
+        return stats
+
+    def start(self):
+        if self._worker and self._worker.is_alive():
+            return
+        with self._cond:
+            self._stopping = False
+        self._worker = threading.Thread(target=self._run, name='slack-delivery', daemon=True)
+        self._worker.start()
+
+    def shutdown(self, timeout: float = 10.0):
+        """Post what is queued (within the timeout) and stop"""
+        if not self._worker:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._worker.join(timeout)
+        self._worker = None
+
+    # =========================================================================
+    # WORKER
+    # =========================================================================
+
+    def _next_message(self) -> Optional[Dict[str, Any]]:
+        """Wait for the first channel whose head message may be posted now"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait_for = None
+                for channel, pending in self._channels.items():
+                    ready_at = self._next_allowed.get(channel, 0)
+                    if ready_at <= now:
+                        message = pending.popleft()
+                        if not pending:
+                            del self._channels[channel]
+                        return message
+                    delay = ready_at - now
+                    wait_for = delay if wait_for is None else min(wait_for, delay)
+
+                if self._stopping and not self._channels:
+                    return None
+                self._cond.wait(wait_for)
+
+    def _requeue_front(self, message: Dict[str, Any], delay: float):
+        channel = message['channel']
+        with self._cond:
+            self._channels.setdefault(channel, deque()).appendleft(message)
+            self._next_allowed[channel] = time.monotonic() + delay
+
+    def _remember_thread(self, thread_key: str, ts: Optional[str]):
+        self._thread_ts[thread_key] = ts
+        while len(self._thread_ts) > 1000:
+            self._thread_ts.popitem(last=False)
+        try:
+            now = time.time()
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO threads (thread_key, ts, created_at) VALUES (?, ?, ?)',
+                    (thread_key, ts, now)
+                )
+                conn.execute('DELETE FROM threads WHERE created_at < ?', (now - self.thread_retention,))
+        except Exception as e:
+            logger.error(f"Could not record Slack thread {thread_key}: {e}")
+
+    def _lookup_thread(self, thread_key: str) -> Tuple[bool, Optional[str]]:
+        """(known, ts) - known is False while the parent has not been posted by any process"""
+        if thread_key in self._thread_ts:
+            return True, self._thread_ts[thread_key]
+        try:
+            with self._connect() as conn:
+                row = conn.execute('SELECT ts FROM threads WHERE thread_key = ?', (thread_key,)).fetchone()
+        except Exception as e:
+            logger.error(f"Could not look up Slack thread {thread_key}: {e}")
+            return True, None
+        if row is None:
+            return False, None
+        self._thread_ts[thread_key] = row['ts']
+        return True, row['ts']
+
+    def _run(self):
+        while True:
+            message = self._next_message()
+            if message is None:
+                return
+
+            channel = message['channel']
+            thread_ts = None
+            if message['reply_to']:
+                known, thread_ts = self._lookup_thread(message['reply_to'])
+                if not known and time.monotonic() - message['queued_at'] < self.thread_wait:
+                    # Parent is still queued (possibly in another process) - check again shortly
+                    self._requeue_front(message, 1.0)
+                    continue
+            try:
+                response = self.client.chat_postMessage(
+                    channel=channel, text=message['text'], thread_ts=thread_ts
+                )
+            except Exception as e:
+                status = getattr(getattr(e, 'response', None), 'status_code', None)
+                if status == 429:
+                    retry_after = float(e.response.headers.get('Retry-After', 1))
+                    with self._cond:
+                        self._stats['rate_limited'] += 1
+                    logger.warning(f"Slack rate limited on {channel}, retrying in {retry_after:g}s")
+                    self._requeue_front(message, retry_after)
+                    continue
+
+                message['attempts'] += 1
+                if message['attempts'] < self.max_attempts:
+                    with self._cond:
+                        self._stats['retried'] += 1
+                    self._requeue_front(message, 2 ** message['attempts'])
+                    continue
+
+                logger.error(f"Slack post to {channel} failed: {e}")
+                with self._cond:
+                    self._stats['failed'] += 1
+                if message['thread_key']:
+                    # Replies fall back to top-level posts
+                    self._remember_thread(message['thread_key'], None)
+                continue
+
+            if message['thread_key']:
+                self._remember_thread(message['thread_key'], response.get('ts'))
+            with self._cond:
+                self._stats['posted'] += 1
+                self._next_allowed[channel] = time.monotonic() + self.min_interval
@@ -21,19 +21,26 @@ try:
 except ImportError:
     SLACK_SDK_AVAILABLE = False
 
+# Updated projects listed by name in a digest (the rest are only counted)
+DIGEST_PROJECTS_SHOWN = 10
+
 
 class SlackFeatures:
     """Extended Slack features for MWD Assistant"""
 
     def __init__(self, slack_client: WebClient = None, notion_client=None,
-                 gemini_client=None, supabase_client=None):
+                 gemini_client=None, supabase_client=None, providers=None):
         self.client = slack_client
-        self.notion = notion_client
-        self.gemini = gemini_client
+        self.providers = providers
+        # Explicit clients win; otherwise share the registry's instances
+        self.notion = notion_client or (providers.get('notion') if providers else None)
+        self.gemini = gemini_client or (providers.get('gemini') if providers else None)
         self.supabase = supabase_client
         self.reminder_channel = os.getenv('SLACK_REMINDER_CHANNEL', '')
         self.digest_channel = os.getenv('SLACK_DIGEST_CHANNEL', '')
         self.client_profiles_db = os.getenv('NOTION_CLIENT_PROFILES_DB', '')
+        # Upper bound on rows streamed from a Notion database per check
+        self.notion_row_limit = int(os.getenv('NOTION_MAX_ROWS', '1000'))
 
     # =========================================================================
     # 1. DEADLINE REMINDERS
@@ -49,7 +56,7 @@ class SlackFeatures:
         Returns:
             List of projects with upcoming deadlines
         """
-        if not self.notion:
+        if not self.notion or not self.notion.is_configured():
             logger.warning("Notion client not configured for deadline checks")
             return []
 
@@ -64,7 +71,7 @@ class SlackFeatures:
             if not database_id:
                 return []
 
-            result = self.notion.query_database(
+            rows = self.notion.iter_database(
                 database_id,
                 filters={
                     "and": [
@@ -88,21 +95,24 @@ class SlackFeatures:
                         }
                     ]
                 },
-                sorts=[{"property": "Deadline", "direction": "ascending"}]
+                sorts=[{"property": "Deadline", "direction": "ascending"}],
+                limit=self.notion_row_limit
             )
 
-            if result.get('success'):
-                for page in result.get('results', []):
-                    props = page.get('properties', {})
-                    deadline_prop = props.get('Deadline', {}).get('date', {})
-                    name_prop = props.get('Name', {}).get('title', [])
-
-                    upcoming.append({
-                        'id': page.get('id'),
-                        'name': name_prop[0].get('text', {}).get('content', 'Untitled') if name_prop else 'Untitled',
-                        'deadline': deadline_prop.get('start', ''),
-                        'url': page.get('url', '')
-                    })
+            # Every matching project, not just the first page of 100. Rows are streamed and only
+            # the four fields below are kept; the list itself is this method's result and is
+            # sorted by deadline, so it is bounded by notion_row_limit rather than avoided.
+            for page in rows:
+                props = page.get('properties', {})
+                deadline_prop = props.get('Deadline', {}).get('date', {})
+                name_prop = props.get('Name', {}).get('title', [])
+
+                upcoming.append({
+                    'id': page.get('id'),
+                    'name': name_prop[0].get('text', {}).get('content', 'Untitled') if name_prop else 'Untitled',
+                    'deadline': deadline_prop.get('start', ''),
+                    'url': page.get('url', '')
+                })
 
         except Exception as e:
             logger.error(f"Error checking deadlines: {e}")
@@ -212,6 +222,7 @@ class SlackFeatures:
             'period': period,
             'generated_at': datetime.utcnow().isoformat(),
             'projects_updated': [],
+            'projects_updated_count': 0,
             'deliverables_created': [],
             'messages_processed': 0,
             'ai_tasks_completed': 0
@@ -239,25 +250,29 @@ class SlackFeatures:
                 logger.error(f"Error getting digest data from Supabase: {e}")
 
         # Get project updates from Notion
-        if self.notion:
+        if self.notion and self.notion.is_configured():
             try:
                 database_id = os.getenv('NOTION_PROJECTS_DATABASE', '')
                 if database_id:
-                    result = self.notion.query_database(
+                    rows = self.notion.iter_database(
                         database_id,
                         filters={
                             "property": "Last edited time",
                             "date": {
                                 "on_or_after": since.isoformat()
                             }
-                        }
+                        },
+                        limit=self.notion_row_limit
                     )
-                    if result.get('success'):
-                        for page in result.get('results', []):
-                            props = page.get('properties', {})
-                            name_prop = props.get('Name', {}).get('title', [])
-                            name = name_prop[0].get('text', {}).get('content', 'Untitled') if name_prop else 'Untitled'
-                            digest['projects_updated'].append(name)
+                    # Counted as they stream in; only the names shown in the digest are kept
+                    for page in rows:
+                        digest['projects_updated_count'] += 1
+                        if len(digest['projects_updated']) >= DIGEST_PROJECTS_SHOWN:
+                            continue
+                        props = page.get('properties', {})
+                        name_prop = props.get('Name', {}).get('title', [])
+                        name = name_prop[0].get('text', {}).get('content', 'Untitled') if name_prop else 'Untitled'
+                        digest['projects_updated'].append(name)
             except Exception as e:
                 logger.error(f"Error getting Notion updates: {e}")
 
@@ -305,7 +320,7 @@ class SlackFeatures:
                     },
                     {
                         "type": "mrkdwn",
-                        "text": f"*Projects Updated:*\n{len(digest['projects_updated'])}"
+                        "text": f"*Projects Updated:*\n{digest['projects_updated_count']}"
                     }
                 ]
             }
@@ -313,9 +328,9 @@ class SlackFeatures:
 
         # Add project list if any were updated
         if digest['projects_updated']:
-            project_list = "\n".join([f"• {p}" for p in digest['projects_updated'][:10]])
-            if len(digest['projects_updated']) > 10:
-                project_list += f"\n_...and {len(digest['projects_updated']) - 10} more_"
+            project_list = "\n".join([f"• {p}" for p in digest['projects_updated']])
+            if digest['projects_updated_count'] > len(digest['projects_updated']):
+                project_list += f"\n_...and {digest['projects_updated_count'] - len(digest['projects_updated'])} more_"
 
             blocks.append({
                 "type": "section",
@@ -355,7 +370,7 @@ class SlackFeatures:
             result = self.client.chat_postMessage(
                 channel=channel,
                 blocks=blocks,
-                text=f"{period_emoji} {period_title} Digest: {digest['messages_processed']} messages, {len(digest['projects_updated'])} projects"
+                text=f"{period_emoji} {period_title} Digest: {digest['messages_processed']} messages, {digest['projects_updated_count']} projects"
             )
             return {'success': True, 'digest': digest, 'ts': result.get('ts')}
         except SlackApiError as e:
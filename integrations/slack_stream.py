@@ -0,0 +1,165 @@
+"""
+Slack Reply Stream
+A bot reply posted once as a placeholder and progressively edited in place with chat.update
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+STAGE_ICONS = {
+    'running': ':hourglass_flowing_sand:',
+    'done': ':white_check_mark:',
+    'failed': ':x:'
+}
+
+
+class SlackReplyStream:
+    """
+    Single Slack message edited as work progresses
+
+    Intermediate edits (stage status, partial text) are throttled to one per
+    min_interval seconds (and paused while Slack is rate limiting). Only the
+    latest text matters: an edit arriving too early replaces any pending one
+    and is sent by a timer once the window opens. finish() always lands the
+    final text, falling back to a new post if editing fails.
+    """
+
+    def __init__(self, client, channel: str, thread_ts: str = None, min_interval: float = None):
+        """
+        Args:
+            client: slack_sdk WebClient
+            channel: Channel to reply in
+            thread_ts: Thread to reply under
+            min_interval: Minimum seconds between chat.update calls
+        """
+        self.client = client
+        self.channel = channel
+        self.thread_ts = thread_ts
+        self.min_interval = min_interval if min_interval is not None else float(
+            os.getenv('SLACK_STREAM_INTERVAL', '1.0'))
+
+        self.ts: Optional[str] = None
+        self._stages: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._sent_text: Optional[str] = None
+        self._pending: Optional[str] = None
+        self._finished = False
+        self._timer: Optional[threading.Timer] = None
+        self._next_allowed = 0.0
+        self._lock = threading.Lock()
+        self.stats = {'updates': 0, 'skipped': 0, 'rate_limited': 0}
+
+    def start(self, text: str = ':hourglass_flowing_sand: Thinking…') -> bool:
+        """Post the placeholder message; returns False if it could not be posted"""
+        try:
+            response = self.client.chat_postMessage(channel=self.channel, text=text, thread_ts=self.thread_ts)
+        except Exception as e:
+            logger.error(f"Error posting placeholder: {e}")
+            return False
+        self.ts = response.get('ts')
+        self._sent_text = text
+        self._next_allowed = time.monotonic() + self.min_interval
+        return self.ts is not None
+
+    def stage(self, key: str, label: str, state: str = 'running'):
+        """
+        Show the status of one unit of work (e.g. an orchestration action)
+
+        Args:
+            key: Stable id for the stage
+            label: Text shown for it (e.g. 'Researching')
+            state: 'running', 'done' or 'failed'
+        """
+        with self._lock:
+            self._stages[key] = (label, state)
+            lines = [
+                f"{STAGE_ICONS.get(s, '')} {text}{'…' if s == 'running' else ''}"
+                for text, s in self._stages.values()
+            ]
+        self._edit("\n".join(lines))
+
+    def update(self, text: str):
+        """Show partial reply text (e.g. while the final response is generated)"""
+        self._edit(text.rstrip() + ' …')
+
+    def finish(self, text: str, max_wait: float = 10.0) -> Dict[str, Any]:
+        """
+        Replace the placeholder with the final reply
+
+        Waits (up to max_wait seconds) for the throttle / rate-limit window,
+        and posts a new message if the placeholder can't be edited.
+        """
+        with self._lock:
+            self._finished = True
+            self._pending = None
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+        if self.ts:
+            deadline = time.monotonic() + max_wait
+            while True:
+                wait = self._next_allowed - time.monotonic()
+                if wait > 0:
+                    if time.monotonic() + wait > deadline:
+                        break
+                    time.sleep(wait)
+                response = self._edit(text, force=True)
+                if response is not None:
+                    return response
+                if text == self._sent_text:
+                    return {'ok': True, 'ts': self.ts}
+                if self._next_allowed <= time.monotonic():
+                    # Not rate limited - editing itself failed
+                    break
+
+        try:
+            return self.client.chat_postMessage(channel=self.channel, text=text, thread_ts=self.thread_ts)
+        except Exception as e:
+            logger.error(f"Error sending message: {e}")
+            return {}
+
+    def _edit(self, text: str, force: bool = False) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if not self.ts or text == self._sent_text or (self._finished and not force):
+                return None
+            if not force and time.monotonic() < self._next_allowed:
+                if self._pending is not None:
+                    self.stats['skipped'] += 1
+                self._pending = text
+                if not self._timer:
+                    self._timer = threading.Timer(self._next_allowed - time.monotonic(), self._flush_pending)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return None
+            self._pending = None
+
+            try:
+                response = self.client.chat_update(channel=self.channel, ts=self.ts, text=text)
+            except Exception as e:
+                status = getattr(getattr(e, 'response', None), 'status_code', None)
+                if status == 429:
+                    retry_after = float(e.response.headers.get('Retry-After', 1))
+                    self._next_allowed = time.monotonic() + retry_after
+                    self.stats['rate_limited'] += 1
+                    logger.warning(f"chat.update rate limited on {self.channel}, pausing {retry_after:g}s")
+                else:
+                    logger.error(f"Error updating message: {e}")
+                return None
+
+            self._sent_text = text
+            self._next_allowed = time.monotonic() + self.min_interval
+            self.stats['updates'] += 1
+            return response
+
+    def _flush_pending(self):
+        with self._lock:
+            self._timer = None
+            text = self._pending
+        if text is not None:
+            self._edit(text)
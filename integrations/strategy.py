@@ -0,0 +1,364 @@
+"""
+Strategy Service
+Claude-backed strategy deliverables shared by the Flask routes and the Slack orchestrator
+"""
+
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+CLAUDE_MODEL = "claude-sonnet-4-5-20250929"  # Latest Sonnet 4.5 model
+
+KNOWLEDGE_BASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'knowledge-base')
+
+
+def create_anthropic_client():
+    """
+    Anthropic client with a per-request timeout and bounded retries
+
+    Without a timeout a hung request keeps its worker thread busy long after
+    the caller gave up on it (a cancelled future cannot stop a running call).
+    """
+    from anthropic import Anthropic
+    return Anthropic(
+        api_key=os.getenv('ANTHROPIC_API_KEY'),
+        timeout=float(os.getenv('ANTHROPIC_TIMEOUT', '90')),
+        max_retries=int(os.getenv('ANTHROPIC_MAX_RETRIES', '1'))
+    )
+
+
+def load_knowledge_base(filename: str) -> str:
+    """Read a knowledge-base markdown file (empty string if it is missing)"""
+    path = os.path.join(KNOWLEDGE_BASE_DIR, filename)
+    try:
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+    except OSError as e:
+        logger.warning(f"Knowledge base file not available: {filename} ({e})")
+        return ''
+
+
+# Shared, stable system prefix for every strategy deliverable; the full services catalog is
+# appended (see StrategyService.system_prompt). Kept byte-identical between calls while the
+# knowledge base is unchanged, and well above the 1,024-token minimum Anthropic caches.
+STRATEGY_SYSTEM_PROMPT = """You are the strategy team at MW Design Studio, producing client deliverables.
+
+## About MW Design Studio
+MW Design Studio was founded by Sheri McDowell and Tierra White to empower small businesses with big ideas.
+Mission: Help businesses look professional, feel authentic, and grow sustainably.
+- Sheri McDowell (Co-Founder): brand strategy, visual design, identity systems, website design
+- Tierra White (Co-Founder): marketing, photography, social media, content creation
+
+## Services & Pricing (knowledge base)
+Use the services catalog at the end of these instructions when recommending services or
+packages; the sections most relevant to the client are named with the brief. Never invent
+prices or offer discontinued services.
+
+## Output Format
+- Return a single structured JSON object and nothing else (no prose before or after it)
+- Use snake_case keys that mirror the numbered items of the task
+- Ground every recommendation in the client brief; note assumptions where the brief is silent
+- Where a recommendation maps to an MW Design Studio package, name the package"""
+
+# Deliverable task prompts (the client brief is sent separately as a cached block)
+BRANDING_PROMPT = """You are a branding expert helping create a comprehensive brand identity.
+
+Based on the client information provided, create:
+1. Brand positioning statement
+2. Target audience definition
+3. Brand personality (3-5 traits)
+4. Color palette suggestions (primary, secondary, accent colors)
+5. Typography recommendations
+6. Key messaging points
+
+Return your response as a structured JSON object."""
+
+WEBSITE_PROMPT = """You are a website design strategist creating a website plan.
+
+Based on the client information and branding, create:
+1. Sitemap (main pages and structure)
+2. Homepage layout description
+3. Key page descriptions
+4. Call-to-action strategy
+5. User journey map
+
+Return your response as a structured JSON object."""
+
+SOCIAL_PROMPT = """You are a social media strategist creating a content plan.
+
+Based on the client information and branding, create:
+1. Platform recommendations (which social media platforms and why)
+2. Content pillars (3-5 main themes)
+3. Posting frequency recommendations
+4. Sample post ideas (5 examples)
+5. Hashtag strategy
+
+Return your response as a structured JSON object."""
+
+COPYWRITING_PROMPT = """You are a professional copywriter creating marketing copy.
+
+Based on the client information and branding, create:
+1. Tagline options (3-5 variations)
+2. About section copy
+3. Value proposition statement
+4. Service/Product descriptions
+5. Email welcome sequence outline
+
+Return your response as a structured JSON object."""
+
+# Deliverables generated for every contact form lead, in presentation order
+DELIVERABLE_PROMPTS = {
+    'branding': BRANDING_PROMPT,
+    'website': WEBSITE_PROMPT,
+    'social': SOCIAL_PROMPT,
+    'copywriting': COPYWRITING_PROMPT
+}
+
+
+def usage_from_message(message) -> Dict[str, int]:
+    """Token usage of a Messages API response, including prompt-cache counters"""
+    return {
+        'input_tokens': message.usage.input_tokens,
+        'output_tokens': message.usage.output_tokens,
+        'cache_creation_tokens': getattr(message.usage, 'cache_creation_input_tokens', 0) or 0,
+        'cache_read_tokens': getattr(message.usage, 'cache_read_input_tokens', 0) or 0
+    }
+
+
+class StrategyService:
+    """Generates strategy deliverables in-process with prompt and response caching"""
+
+    def __init__(self, client, model: str = CLAUDE_MODEL, response_cache=None, knowledge=None):
+        """
+        Args:
+            client: Anthropic client
+            model: Claude model id
+            response_cache: Optional ResponseCache for completed generations
+            knowledge: Optional KnowledgeIndex the catalog is read from (SERVICES.md is read
+                directly without it)
+        """
+        self.client = client
+        self.model = model
+        self.response_cache = response_cache
+        self.knowledge = knowledge
+
+    def system_prompt(self) -> str:
+        """STRATEGY_SYSTEM_PROMPT plus the full services catalog (changes only when the catalog does)"""
+        if self.knowledge:
+            catalog = '\n\n'.join(
+                f"### {chunk['heading']}\n{chunk['text']}" for chunk in self.knowledge.chunks('SERVICES.md')
+            )
+        else:
+            catalog = load_knowledge_base('SERVICES.md')
+        return f"{STRATEGY_SYSTEM_PROMPT}\n\n## Services Catalog\n\n{catalog}"
+
+    def relevant_sections(self, client_data: Any) -> str:
+        """Headings of the catalog sections that best match a client brief (a hint, not the catalog)"""
+        if not self.knowledge:
+            return ''
+        query = json.dumps(client_data, ensure_ascii=False, default=str) if not isinstance(client_data, str) else client_data
+        try:
+            chunks = self.knowledge.search(f"services packages pricing {query}")
+        except Exception as e:
+            logger.warning(f"Knowledge search failed: {e}")
+            return ''
+        headings = dict.fromkeys(chunk['heading'] for chunk in chunks if chunk['source'] == 'SERVICES.md')
+        return '\n'.join(f"- {heading}" for heading in headings)
+
+    def build_messages(self, prompt: str, client_data: Any):
+        """
+        Build the cacheable system prefix and messages for a strategy prompt
+
+        Layout (cache breakpoints marked *):
+            system:  STRATEGY_SYSTEM_PROMPT + catalog*  - identical for every call
+            user:    client brief + relevant sections* - identical for every deliverable of a lead
+                     task prompt                       - varies per deliverable
+        """
+        client_brief = json.dumps(client_data, sort_keys=True, indent=2, ensure_ascii=False, default=str)
+        brief = f"Client Info:\n{client_brief}"
+        sections = self.relevant_sections(client_data)
+        if sections:
+            brief += f"\n\nMost relevant catalog sections:\n{sections}"
+
+        system = [
+            {
+                "type": "text",
+                "text": self.system_prompt(),
+                "cache_control": {"type": "ephemeral"}
+            }
+        ]
+        messages = [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": brief,
+                        "cache_control": {"type": "ephemeral"}
+                    },
+                    {"type": "text", "text": prompt}
+                ]
+            }
+        ]
+        return system, messages
+
+    def request_params(self, deliverable: str, client_data: Any, max_tokens: int = 4096) -> Dict[str, Any]:
+        """Messages API params for one deliverable (e.g. for the Message Batches API)"""
+        system, messages = self.build_messages(DELIVERABLE_PROMPTS[deliverable], client_data)
+        return {
+            'model': self.model,
+            'max_tokens': max_tokens,
+            'system': system,
+            'messages': messages
+        }
+
+    def _cache_key(self, prompt: str, client_data: Any, max_tokens: int) -> str:
+        # Knowledge-base edits change the prompt, so they must not reuse old responses
+        knowledge_version = self.knowledge.version if self.knowledge else ''
+        template_id = hashlib.sha256(
+            (STRATEGY_SYSTEM_PROMPT + prompt + knowledge_version).encode('utf-8')
+        ).hexdigest()[:16]
+        return self.response_cache.make_key(f"{template_id}:{max_tokens}", self.model, client_data)
+
+    def is_cached(self, prompt: str, client_data: Any, max_tokens: int = 4096) -> bool:
+        """Whether generate() would be answered from the response cache"""
+        if not self.response_cache:
+            return False
+        return self.response_cache.contains(self._cache_key(prompt, client_data, max_tokens))
+
+    def generate(self, prompt: str, client_data: Any, use_cache: bool = True,
+                 max_tokens: int = 4096) -> Dict[str, Any]:
+        """
+        Call Claude with the given prompt and client data
+
+        The agency context and the client brief are sent as prompt-cached blocks, so
+        repeated deliverables for the same lead read them from Anthropic's cache.
+        Successful responses are also cached locally on (prompt template, model,
+        canonical client data); pass use_cache=False to force a fresh generation.
+        A cache hit reports zero 'usage' (nothing was spent) and the original
+        generation's usage as 'cached_usage'.
+        """
+        cache_key = self._cache_key(prompt, client_data, max_tokens) if self.response_cache else None
+        if cache_key:
+            if use_cache:
+                cached = self.response_cache.get(cache_key)
+                if cached:
+                    return {**cached, 'cached': True, 'usage': {}, 'cached_usage': cached.get('usage', {})}
+            else:
+                self.response_cache.record_bypass()
+
+        try:
+            system, messages = self.build_messages(prompt, client_data)
+
+            message = self.client.messages.create(
+                model=self.model,
+                max_tokens=max_tokens,
+                system=system,
+                messages=messages
+            )
+
+            result = {
+                'success': True,
+                'response': message.content[0].text,
+                'usage': usage_from_message(message)
+            }
+            if cache_key:
+                self.response_cache.set(cache_key, result)
+            return result
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    def generate_deliverable(self, deliverable: str, client_data: Any, **kwargs) -> Dict[str, Any]:
+        """
+        Generate one named deliverable (branding, website, social, copywriting)
+
+        Returns:
+            generate() result, or an error for unknown deliverables
+        """
+        prompt = DELIVERABLE_PROMPTS.get(deliverable)
+        if not prompt:
+            return {
+                'success': False,
+                'error': f"Unknown deliverable: {deliverable}. Available: {', '.join(DELIVERABLE_PROMPTS)}"
+            }
+        return self.generate(prompt, client_data, **kwargs)
+
+    def stream(self, prompt: str, client_data: Any, use_cache: bool = True,
+               max_tokens: int = 4096) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a strategy generation as chunk events followed by a final 'done' event
+
+        Uses the same cached prompt layout and response cache as generate(); a
+        response-cache hit is replayed as a single chunk with zero usage.
+        """
+        cache_key = self._cache_key(prompt, client_data, max_tokens) if self.response_cache else None
+        if cache_key:
+            if use_cache:
+                cached = self.response_cache.get(cache_key)
+                if cached:
+                    yield {'type': 'chunk', 'text': cached.get('response', '')}
+                    yield {'type': 'done', 'success': True, 'cached': True, 'usage': {},
+                           'cached_usage': cached.get('usage', {})}
+                    return
+            else:
+                self.response_cache.record_bypass()
+
+        system, messages = self.build_messages(prompt, client_data)
+        try:
+            with self.client.messages.stream(
+                model=self.model,
+                max_tokens=max_tokens,
+                system=system,
+                messages=messages
+            ) as stream:
+                for text in stream.text_stream:
+                    yield {'type': 'chunk', 'text': text}
+                message = stream.get_final_message()
+        except Exception as e:
+            logger.error(f"Claude stream error: {e}")
+            yield {'type': 'error', 'success': False, 'error': str(e)}
+            return
+
+        result = {
+            'success': True,
+            'response': ''.join(block.text for block in message.content if getattr(block, 'type', '') == 'text'),
+            'usage': usage_from_message(message)
+        }
+        if cache_key:
+            self.response_cache.set(cache_key, result)
+        yield {'type': 'done', 'success': True, 'cached': False, 'usage': result['usage']}
+
+    def warm_prompt_cache(self, client_data: Any) -> Dict[str, int]:
+        """
+        Write the system prefix and client brief to Anthropic's prompt cache
+
+        Concurrent requests cannot read a cache entry until one of them has created
+        it, so before fanning out several deliverables for the same lead we make one
+        minimal call that writes the shared prefix. The fan-out then reads it.
+
+        Returns:
+            Usage of the warm-up call (empty if it failed)
+        """
+        try:
+            system, messages = self.build_messages("Reply with OK.", client_data)
+            message = self.client.messages.create(
+                model=self.model,
+                max_tokens=1,
+                system=system,
+                messages=messages
+            )
+            usage = usage_from_message(message)
+            logger.info(
+                f"Prompt cache warmed: {usage['cache_creation_tokens']} written, {usage['cache_read_tokens']} read"
+            )
+            return usage
+        except Exception as e:
+            logger.warning(f"Prompt cache warm-up failed: {e}")
+            return {}
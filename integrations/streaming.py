@@ -0,0 +1,45 @@
+"""
+Server-Sent Events helpers
+Relay provider token streams to HTTP clients as SSE
+
+Provider clients yield plain event dicts:
+    {'type': 'chunk', 'text': '...'}                      - incremental output
+    {'type': 'done', 'usage': {...}, 'citations': [...]}  - final metadata
+    {'type': 'error', 'error': '...'}                     - failure mid-stream
+"""
+
+import json
+import logging
+from typing import Dict, Any, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+def wants_stream(req) -> bool:
+    """Check whether a request opted in to streaming (Accept header or ?stream=1)"""
+    if req.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'text/event-stream' in req.headers.get('Accept', '')
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Format one SSE frame"""
+    payload = json.dumps(data, default=str, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def sse_stream(events: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """
+    Convert provider event dicts to SSE frames
+
+    Exceptions raised by the provider iterator are reported as an 'error'
+    event instead of breaking the HTTP response.
+    """
+    try:
+        for event in events:
+            event_type = event.get('type', 'chunk')
+            data = {k: v for k, v in event.items() if k != 'type'}
+            yield format_sse(event_type, data)
+    except Exception as e:
+        logger.error(f"Streaming error: {e}")
+        yield format_sse('error', {'success': False, 'error': str(e)})
@@ -0,0 +1,179 @@
+"""
+Thread History Cache
+Per-thread Slack message history kept current from received events and the bot's own replies
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadHistoryCache:
+    """
+    LRU + TTL cache of Slack thread messages
+
+    A thread is loaded from conversations_replies once (all pages), then
+    kept current by observe() for every message we see - incoming events and
+    our own replies. Threads not re-synced for resync_interval seconds only
+    fetch the missing tail (oldest = newest cached ts); after ttl seconds the
+    thread is reloaded in full to pick up edits and deletions.
+    """
+
+    def __init__(self, client=None, bot_user_id: str = None, max_threads: int = None,
+                 ttl: float = None, resync_interval: float = None, max_messages: int = None):
+        """
+        Args:
+            client: slack_sdk WebClient
+            bot_user_id: Our bot user (its messages get the 'assistant' role)
+            max_threads: Threads kept before the least recently used is evicted
+            ttl: Seconds before a thread is reloaded in full
+            resync_interval: Seconds a thread is trusted before its tail is re-fetched
+            max_messages: Most recent messages kept per thread
+        """
+        self.client = client
+        self.bot_user_id = bot_user_id
+        self.max_threads = max_threads or int(os.getenv('SLACK_HISTORY_MAX_THREADS', '500'))
+        self.ttl = ttl or float(os.getenv('SLACK_HISTORY_TTL', '3600'))
+        self.resync_interval = resync_interval if resync_interval is not None else float(
+            os.getenv('SLACK_HISTORY_RESYNC', '120'))
+        self.max_messages = max_messages or int(os.getenv('SLACK_HISTORY_MAX_MESSAGES', '50'))
+
+        self._threads: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'tail_fetches': 0, 'full_fetches': 0, 'fetch_errors': 0, 'evictions': 0}
+
+    # =========================================================================
+    # PUBLIC API
+    # =========================================================================
+
+    def observe(self, channel: str, thread_ts: Optional[str], message: Dict[str, Any]):
+        """
+        Record a message seen outside of a fetch (an event or one of our replies)
+
+        Args:
+            channel: Channel id
+            thread_ts: Thread the message belongs to (None for a top-level message)
+            message: Slack message with at least 'ts' (and 'user'/'text')
+        """
+        ts = message.get('ts')
+        if not ts:
+            return
+        key = self._key(channel, thread_ts or ts)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._threads.get(key)
+            if entry is None:
+                if thread_ts and thread_ts != ts:
+                    # Mid-thread message for a thread we never loaded - we'd have a gap
+                    return
+                # A new top-level message is a complete thread of one
+                entry = {'messages': {}, 'loaded_at': now, 'synced_at': now}
+                self._threads[key] = entry
+                self._evict()
+            entry['messages'][ts] = self._to_history(message)
+            self._trim(entry)
+
+    def get(self, channel: str, thread_ts: str) -> List[Dict[str, Any]]:
+        """
+        Messages of a thread, oldest first, as {'role', 'content', 'ts'}
+
+        Fetches from Slack only what the cache can't answer.
+        """
+        key = self._key(channel, thread_ts)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._threads.get(key)
+            if entry and now - entry['loaded_at'] > self.ttl:
+                del self._threads[key]
+                entry = None
+            if entry:
+                self._threads.move_to_end(key)
+                if now - entry['synced_at'] <= self.resync_interval:
+                    self._stats['hits'] += 1
+                    return self._ordered(entry)
+                oldest = max(entry['messages'], key=float) if entry['messages'] else None
+            else:
+                oldest = None
+
+        messages = self._fetch(channel, thread_ts, oldest)
+        with self._lock:
+            if messages is None:
+                entry = self._threads.get(key)
+                return self._ordered(entry) if entry else []
+
+            entry = self._threads.get(key) if oldest else None
+            if entry is None:
+                entry = {'messages': {}, 'loaded_at': now}
+                self._threads[key] = entry
+                self._evict()
+            entry['synced_at'] = now
+            for message in messages:
+                entry['messages'][message['ts']] = self._to_history(message)
+            self._trim(entry)
+            return self._ordered(entry)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['threads'] = len(self._threads)
+        return stats
+
+    # =========================================================================
+    # INTERNALS
+    # =========================================================================
+
+    @staticmethod
+    def _key(channel: str, thread_ts: str) -> str:
+        return f'{channel}:{thread_ts}'
+
+    def _to_history(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        role = 'assistant' if message.get('user') == self.bot_user_id else 'user'
+        return {'role': role, 'content': message.get('text', ''), 'ts': message.get('ts')}
+
+    @staticmethod
+    def _ordered(entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [entry['messages'][ts] for ts in sorted(entry['messages'], key=float)]
+
+    def _trim(self, entry: Dict[str, Any]):
+        extra = len(entry['messages']) - self.max_messages
+        if extra > 0:
+            for ts in sorted(entry['messages'], key=float)[:extra]:
+                del entry['messages'][ts]
+
+    def _evict(self):
+        while len(self._threads) > self.max_threads:
+            self._threads.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _fetch(self, channel: str, thread_ts: str, oldest: str = None) -> Optional[List[Dict[str, Any]]]:
+        """All replies (or only those newer than oldest), following pagination"""
+        if not self.client:
+            return None
+
+        params = {'channel': channel, 'ts': thread_ts, 'limit': 200}
+        if oldest:
+            params.update({'oldest': oldest, 'inclusive': False})
+
+        messages = []
+        try:
+            while True:
+                response = self.client.conversations_replies(**params)
+                messages.extend(response.get('messages', []))
+                cursor = (response.get('response_metadata') or {}).get('next_cursor')
+                if not response.get('has_more') or not cursor:
+                    break
+                params['cursor'] = cursor
+        except Exception as e:
+            logger.error(f"Error getting thread history: {e}")
+            with self._lock:
+                self._stats['fetch_errors'] += 1
+            return None
+
+        with self._lock:
+            self._stats['tail_fetches' if oldest else 'full_fetches'] += 1
+        return messages
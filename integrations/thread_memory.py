@@ -0,0 +1,159 @@
+"""
+Thread Memory
+Rolling per-thread summaries that keep orchestration prompt context under a token budget
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Callable
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) - good enough for budgeting"""
+    return len(text) // 4 + 1 if text else 0
+
+
+class ThreadMemory:
+    """
+    Compact conversation context per thread
+
+    The prompt gets the thread's rolling summary plus as many of the most
+    recent messages as fit in token_budget (the newest always does). Long
+    messages such as pasted reports are truncated to a quarter of the budget.
+    Messages that no longer fit are folded into the summary by a background
+    refresh, so later turns carry them in a few sentences instead of verbatim.
+    """
+
+    def __init__(self, summarize_fn: Callable[[str, List[Dict]], str], token_budget: int = None,
+                 max_threads: int = None, raw_window: int = 10):
+        """
+        Args:
+            summarize_fn: (current_summary, messages) -> updated summary
+            token_budget: Estimated tokens allowed for the whole context block
+            max_threads: Threads remembered before the least recently used is dropped
+            raw_window: Messages the uncompacted context would include (for savings stats)
+        """
+        self.summarize_fn = summarize_fn
+        self.token_budget = token_budget or int(os.getenv('THREAD_MEMORY_TOKEN_BUDGET', '1500'))
+        self.max_threads = max_threads or int(os.getenv('THREAD_MEMORY_MAX_THREADS', '500'))
+        self.raw_window = raw_window
+
+        self._threads: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='thread-memory')
+        self._stats = {
+            'turns': 0, 'raw_tokens': 0, 'context_tokens': 0,
+            'refreshes': 0, 'refresh_failures': 0, 'refresh_seconds': 0.0
+        }
+
+    # =========================================================================
+    # PUBLIC API
+    # =========================================================================
+
+    def context(self, key: str, history: List[Dict[str, Any]]) -> str:
+        """
+        Context block for a thread's next prompt
+
+        Args:
+            key: Thread identity (e.g. 'channel:thread_ts')
+            history: Thread messages, oldest first, as {'role', 'content', 'ts'}
+        """
+        with self._lock:
+            entry = self._threads.get(key)
+            if entry is None:
+                entry = {'summary': '', 'through': None, 'refreshing': False}
+                self._threads[key] = entry
+                while len(self._threads) > self.max_threads:
+                    self._threads.popitem(last=False)
+            self._threads.move_to_end(key)
+            summary, through = entry['summary'], entry['through']
+
+        pending = [m for m in history if through is None or float(m.get('ts') or 0) > float(through)]
+
+        header = f"Summary of earlier conversation:\n{summary}\n\nRecent messages:\n" if summary else ''
+        remaining = self.token_budget - estimate_tokens(header)
+        recent: List[str] = []
+        for message in reversed(pending):
+            line = self._line(message, self.token_budget // 4)
+            cost = estimate_tokens(line)
+            if recent and cost > remaining:
+                break
+            recent.insert(0, line)
+            remaining -= cost
+
+        overflow = pending[:len(pending) - len(recent)]
+        if overflow:
+            self._schedule_refresh(key, summary, through, overflow)
+
+        text = header + "\n".join(recent)
+        raw = "\n".join(f"{m['role']}: {m['content']}" for m in history[-self.raw_window:])
+        with self._lock:
+            self._stats['turns'] += 1
+            self._stats['raw_tokens'] += estimate_tokens(raw)
+            self._stats['context_tokens'] += estimate_tokens(text)
+        return text
+
+    def stats(self) -> Dict[str, Any]:
+        """Input-token savings versus the raw last-N-messages context"""
+        with self._lock:
+            s = dict(self._stats)
+            threads = len(self._threads)
+        turns = s['turns'] or 1
+        return {
+            'threads': threads,
+            'turns': s['turns'],
+            'avg_raw_tokens': round(s['raw_tokens'] / turns, 1),
+            'avg_context_tokens': round(s['context_tokens'] / turns, 1),
+            'avg_tokens_saved': round((s['raw_tokens'] - s['context_tokens']) / turns, 1),
+            'tokens_saved': s['raw_tokens'] - s['context_tokens'],
+            'refreshes': s['refreshes'],
+            'refresh_failures': s['refresh_failures'],
+            'avg_refresh_seconds': round(s['refresh_seconds'] / s['refreshes'], 3) if s['refreshes'] else 0.0
+        }
+
+    # =========================================================================
+    # SUMMARY REFRESH
+    # =========================================================================
+
+    @staticmethod
+    def _line(message: Dict[str, Any], max_tokens: int) -> str:
+        content = message.get('content', '')
+        if estimate_tokens(content) > max_tokens:
+            content = content[:max_tokens * 4] + ' … [truncated]'
+        return f"{message['role']}: {content}"
+
+    def _schedule_refresh(self, key: str, summary: str, through: str, overflow: List[Dict[str, Any]]):
+        with self._lock:
+            entry = self._threads.get(key)
+            if entry is None or entry['refreshing']:
+                return
+            entry['refreshing'] = True
+        self._executor.submit(self._refresh, key, summary, through, overflow)
+
+    def _refresh(self, key: str, summary: str, through: str, overflow: List[Dict[str, Any]]):
+        started = time.monotonic()
+        try:
+            updated = self.summarize_fn(summary, overflow)
+        except Exception as e:
+            logger.error(f"Thread summary refresh failed for {key}: {e}")
+            updated = None
+
+        with self._lock:
+            entry = self._threads.get(key)
+            if updated is None:
+                self._stats['refresh_failures'] += 1
+            else:
+                self._stats['refreshes'] += 1
+                self._stats['refresh_seconds'] += time.monotonic() - started
+            if entry is None:
+                return
+            entry['refreshing'] = False
+            if updated and entry['through'] == through:
+                entry['summary'] = updated.strip()
+                entry['through'] = overflow[-1].get('ts')
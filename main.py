@@ -5,23 +5,39 @@ Handles branding, website design, social media, copywriting, and workspace manag
 """
 
 import os
+import sys
+import json
 import hmac
+import uuid
 import hashlib
-import smtplib
+import atexit
+import signal
 import logging
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify
-from anthropic import Anthropic
+from flask import Flask, Response, request, jsonify, stream_with_context
 from integrations.gemini import GeminiClient
 from integrations.openai_client import OpenAIClient
 from integrations.perplexity import PerplexityClient
 from integrations.notion import NotionClient
 from integrations.slack_bot import SlackBot
 from integrations.slack_features import SlackFeatures, setup_scheduler
-import asyncio
+from integrations.registry import ProviderRegistry
+from integrations.knowledge_index import KnowledgeIndex
+from integrations.strategy import (
+    StrategyService, DELIVERABLE_PROMPTS, create_anthropic_client,
+    BRANDING_PROMPT, WEBSITE_PROMPT, SOCIAL_PROMPT, COPYWRITING_PROMPT
+)
+from integrations.deliverables import DeliverableEngine, sum_usage
+from integrations.job_queue import JobQueue
+from integrations.idempotency import IdempotencyStore, EventDeduplicator, idempotency_key
+from integrations.response_cache import ResponseCache
+from integrations.streaming import wants_stream, sse_stream
+from integrations.batch import AnthropicBatchAdapter, BatchManager
+from integrations.outbox import EmailOutbox
+from integrations.slack_delivery import SlackDeliveryQueue
+from integrations.background import BackgroundExecutor
+from integrations.conversation_store import ConversationWriter, SupabaseConversationRepository
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -34,26 +50,63 @@ load_dotenv()
 app = Flask(__name__)
 
 # Initialize AI clients
-anthropic_client = Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+# Per-request timeout so a hung call frees its deliverable worker instead of holding it
+anthropic_client = create_anthropic_client()
+response_cache = ResponseCache()
+# Knowledge-base index, reloaded when files change: BM25 search picks the catalog sections
+# relevant to a brief, and its chunks make up the full catalog in the cached prompt prefixes
+knowledge_index = KnowledgeIndex()
+# Strategy deliverables, shared in-process by the routes and the Slack orchestrator
+strategy_service = StrategyService(anthropic_client, response_cache=response_cache, knowledge=knowledge_index)
 gemini_client = GeminiClient()
 openai_client = OpenAIClient()
 perplexity_client = PerplexityClient()
 
 # Initialize Integration clients
 notion_client = NotionClient()
-slack_bot = SlackBot()
+
+# One shared instance per provider, injected wherever clients are needed
+providers = ProviderRegistry({
+    'gemini': gemini_client,
+    'openai': openai_client,
+    'perplexity': perplexity_client,
+    'notion': notion_client,
+    'knowledge': knowledge_index,
+    'strategy': strategy_service
+})
+# Optional Supabase conversation log. The client stays local to the write-behind store so
+# other Supabase code paths (e.g. SlackFeatures' digest queries) are not switched on with it.
+conversation_writer = None
+if os.getenv('SUPABASE_URL') and os.getenv('SUPABASE_KEY'):
+    try:
+        from supabase import create_client
+        conversation_writer = ConversationWriter(SupabaseConversationRepository(
+            create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_KEY'))
+        ))
+    except Exception as e:
+        logger.error(f"Supabase client unavailable: {e}")
+
+slack_bot = SlackBot(providers=providers, conversations=conversation_writer)
 
 # Initialize Slack features with required clients
 slack_features = SlackFeatures(
     slack_client=slack_bot.client,
-    notion_client=notion_client,
-    gemini_client=gemini_client,
-    supabase_client=None  # Will be set if Supabase is configured
+    supabase_client=None,  # Will be set if Supabase is configured
+    providers=providers
 )
 
 # Set up scheduler for automated tasks (reminders, digests)
 scheduler = setup_scheduler(slack_features)
 
+# Shared worker pool for webhook work acknowledged before it runs (Slack events)
+background_executor = BackgroundExecutor()
+
+# Drops Slack redeliveries by event_id / client_msg_id (shared when IDEMPOTENCY_BACKEND=sqlite)
+slack_dedup = EventDeduplicator()
+
+# Dedup store for retried contact webhooks (memory or sqlite backend)
+idempotency_store = IdempotencyStore()
+
 # Configuration check
 def check_config():
     """Check which services are configured"""
@@ -72,101 +125,66 @@ def check_config():
     }
     return config_status
 
-# Agent prompts
-BRANDING_PROMPT = """You are a branding expert helping create a comprehensive brand identity.
-
-Based on the client information provided, create:
-1. Brand positioning statement
-2. Target audience definition
-3. Brand personality (3-5 traits)
-4. Color palette suggestions (primary, secondary, accent colors)
-5. Typography recommendations
-6. Key messaging points
-
-Client Info:
-{client_info}
-
-Return your response as a structured JSON object."""
-
-WEBSITE_PROMPT = """You are a website design strategist creating a website plan.
-
-Based on the client information and branding, create:
-1. Sitemap (main pages and structure)
-2. Homepage layout description
-3. Key page descriptions
-4. Call-to-action strategy
-5. User journey map
-
-Client Info:
-{client_info}
-
-Return your response as a structured JSON object."""
-
-SOCIAL_PROMPT = """You are a social media strategist creating a content plan.
-
-Based on the client information and branding, create:
-1. Platform recommendations (which social media platforms and why)
-2. Content pillars (3-5 main themes)
-3. Posting frequency recommendations
-4. Sample post ideas (5 examples)
-5. Hashtag strategy
-
-Client Info:
-{client_info}
-
-Return your response as a structured JSON object."""
-
-COPYWRITING_PROMPT = """You are a professional copywriter creating marketing copy.
-
-Based on the client information and branding, create:
-1. Tagline options (3-5 variations)
-2. About section copy
-3. Value proposition statement
-4. Service/Product descriptions
-5. Email welcome sequence outline
-
-Client Info:
-{client_info}
-
-Return your response as a structured JSON object."""
-
 
-def call_claude(prompt, client_data):
-    """Call Claude API with the given prompt and client data using latest features"""
-    try:
-        formatted_prompt = prompt.format(client_info=str(client_data))
+def generate_deliverables(client_data, sections=None, mode='fanout', on_result=None):
+    """
+    Generate several deliverables for one client
 
-        message = anthropic_client.messages.create(
-            model="claude-sonnet-4-5-20250929",  # Latest Sonnet 4.5 model
-            max_tokens=4096,
-            messages=[
-                {"role": "user", "content": formatted_prompt}
-            ],
-            # Enable prompt caching for repeated system prompts (future enhancement)
-            # system=[
-            #     {
-            #         "type": "text",
-            #         "text": "System instructions here",
-            #         "cache_control": {"type": "ephemeral"}
-            #     }
-            # ]
-        )
+    Args:
+        client_data: Client brief
+        sections: Mapping of section key to prompt (defaults to DELIVERABLE_PROMPTS)
+        mode: 'fanout' (one concurrent call per section) or 'combined' (one call
+            producing every section as a single JSON object)
+        on_result: Optional callback(key, result) invoked as each deliverable completes
 
-        return {
-            'success': True,
-            'response': message.content[0].text,
-            'usage': {
-                'input_tokens': message.usage.input_tokens,
-                'output_tokens': message.usage.output_tokens,
-                'cache_creation_tokens': getattr(message.usage, 'cache_creation_input_tokens', 0),
-                'cache_read_tokens': getattr(message.usage, 'cache_read_input_tokens', 0)
-            }
-        }
-    except Exception as e:
-        return {
-            'success': False,
-            'error': str(e)
-        }
+    Returns:
+        DeliverableEngine result: deliverables, errors, timings, elapsed, usage
+    """
+    sections = sections or DELIVERABLE_PROMPTS
+    if mode == 'combined':
+        return deliverable_engine.generate_combined(sections, client_data, on_result=on_result)
+
+    # Warming only pays off when at least two sections will actually call the API
+    warmup_usage = {}
+    if len(sections) > 1 and os.getenv('PROMPT_CACHE_WARMUP', 'true').lower() == 'true':
+        to_generate = [key for key, prompt in sections.items() if not strategy_service.is_cached(prompt, client_data)]
+        if len(to_generate) > 1:
+            warmup_usage = strategy_service.warm_prompt_cache(client_data)
+
+    generation = deliverable_engine.generate(sections, client_data, on_result=on_result)
+    # Count the warm-up call so fan-out and combined usage compare fairly
+    generation['usage'] = sum_usage([generation['usage'], warmup_usage])
+    return generation
+
+
+def stream_or_json(result):
+    """Send a provider result as SSE when it is a stream, otherwise as JSON"""
+    if isinstance(result, dict):
+        return jsonify(result)
+    return Response(
+        stream_with_context(sse_stream(result)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def cache_bypass_requested(req) -> bool:
+    """Check whether the caller asked to skip the response cache"""
+    if req.args.get('nocache', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'no-cache' in req.headers.get('Cache-Control', '').lower()
+
+
+# Concurrent engine for multi-deliverable generation (contact form leads)
+deliverable_engine = DeliverableEngine(strategy_service.generate)
+
+
+# Bulk regeneration through the Message Batches API (BATCH_BACKEND=direct skips it)
+batch_manager = BatchManager(
+    adapter=AnthropicBatchAdapter(anthropic_client) if os.getenv('BATCH_BACKEND', 'anthropic') == 'anthropic' else None,
+    build_params=strategy_service.request_params,
+    fallback_generate=strategy_service.generate_deliverable
+)
 
 
 @app.route('/')
@@ -179,11 +197,17 @@ def home():
         'version': '2.1.0',
         'config': config,
         'endpoints': {
+            'monitoring': [
+                'GET /metrics'
+            ],
             'strategy': [
                 'POST /branding',
                 'POST /website',
                 'POST /social',
-                'POST /copywriting'
+                'POST /copywriting',
+                'POST /deliverables',
+                'POST /batch/deliverables',
+                'GET /batch/<batch_id>'
             ],
             'ai': [
                 'POST /ai/gemini/meeting-notes',
@@ -210,17 +234,43 @@ def home():
                 'POST /slack/quick-actions'
             ],
             'contact': [
-                'POST /api/contact'
+                'POST /api/contact',
+                'GET /api/contact/jobs/<job_id>',
+                'GET /api/contact/emails/<email_id>'
             ]
         }
     })
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Runtime counters for monitoring (caches, dedup, background jobs)"""
+    return jsonify({
+        'response_cache': response_cache.stats(),
+        'idempotency': idempotency_store.stats(),
+        'job_queue': job_queue.stats(),
+        'email_outbox': email_outbox.stats(),
+        'slack_delivery': slack_delivery.stats(),
+        'background': background_executor.stats(),
+        'slack_dedup': slack_dedup.stats(),
+        'intent_router': slack_bot.router.stats() if slack_bot.router else None,
+        'orchestration': slack_bot.orchestration_stats(),
+        'thread_history': slack_bot.history.stats(),
+        'thread_memory': slack_bot.memory.stats() if slack_bot.memory else None,
+        'gemini_cache': slack_bot.prompt_cache.stats() if slack_bot.prompt_cache else None,
+        'knowledge_index': knowledge_index.stats(),
+        'conversations': slack_bot.conversations.stats() if slack_bot.conversations else None
+    })
+
+
 @app.route('/branding', methods=['POST'])
 def branding():
     """Generate branding strategy"""
     client_data = request.json
-    result = call_claude(BRANDING_PROMPT, client_data)
+    use_cache = not cache_bypass_requested(request)
+    if wants_stream(request):
+        return stream_or_json(strategy_service.stream(BRANDING_PROMPT, client_data, use_cache=use_cache))
+    result = strategy_service.generate(BRANDING_PROMPT, client_data, use_cache=use_cache)
     return jsonify(result)
 
 
@@ -228,7 +278,10 @@ def branding():
 def website():
     """Generate website design plan"""
     client_data = request.json
-    result = call_claude(WEBSITE_PROMPT, client_data)
+    use_cache = not cache_bypass_requested(request)
+    if wants_stream(request):
+        return stream_or_json(strategy_service.stream(WEBSITE_PROMPT, client_data, use_cache=use_cache))
+    result = strategy_service.generate(WEBSITE_PROMPT, client_data, use_cache=use_cache)
     return jsonify(result)
 
 
@@ -236,7 +289,10 @@ def website():
 def social():
     """Generate social media strategy"""
     client_data = request.json
-    result = call_claude(SOCIAL_PROMPT, client_data)
+    use_cache = not cache_bypass_requested(request)
+    if wants_stream(request):
+        return stream_or_json(strategy_service.stream(SOCIAL_PROMPT, client_data, use_cache=use_cache))
+    result = strategy_service.generate(SOCIAL_PROMPT, client_data, use_cache=use_cache)
     return jsonify(result)
 
 
@@ -244,10 +300,115 @@ def social():
 def copywriting():
     """Generate marketing copy"""
     client_data = request.json
-    result = call_claude(COPYWRITING_PROMPT, client_data)
+    use_cache = not cache_bypass_requested(request)
+    if wants_stream(request):
+        return stream_or_json(strategy_service.stream(COPYWRITING_PROMPT, client_data, use_cache=use_cache))
+    result = strategy_service.generate(COPYWRITING_PROMPT, client_data, use_cache=use_cache)
     return jsonify(result)
 
 
+@app.route('/deliverables', methods=['POST'])
+def deliverables_endpoint():
+    """
+    Generate several deliverables for one client brief
+
+    Payload:
+        {
+            "client_data": {...},
+            "sections": ["branding", "website", "social", "copywriting"],
+            "mode": "fanout" | "combined"
+        }
+    """
+    data = request.json or {}
+    client_data = data.get('client_data') or {
+        k: v for k, v in data.items() if k not in ('sections', 'mode')
+    }
+    requested = data.get('sections') or list(DELIVERABLE_PROMPTS.keys())
+
+    unknown = [key for key in requested if key not in DELIVERABLE_PROMPTS]
+    if unknown:
+        return jsonify({
+            'success': False,
+            'error': f"Unknown sections: {', '.join(unknown)}. Available: {', '.join(DELIVERABLE_PROMPTS)}"
+        }), 400
+
+    mode = (data.get('mode') or deliverable_mode(request)).lower()
+    if mode not in ('fanout', 'combined'):
+        return jsonify({'success': False, 'error': 'mode must be fanout or combined'}), 400
+
+    sections = {key: DELIVERABLE_PROMPTS[key] for key in requested}
+    generation = generate_deliverables(client_data, sections, mode=mode)
+
+    return jsonify({
+        'success': bool(generation['deliverables']),
+        'mode': generation['mode'],
+        'elapsed': generation['elapsed'],
+        'usage': generation['usage'],
+        'errors': generation['errors'],
+        'deliverables': {
+            key: {
+                'content': value.get('response'),
+                'usage': value.get('usage', {})
+            }
+            for key, value in generation['deliverables'].items()
+        }
+    })
+
+
+@app.route('/batch/deliverables', methods=['POST'])
+def batch_deliverables():
+    """
+    Queue deliverables for many client briefs
+
+    Payload:
+        {
+            "briefs": [{"id": "acme", "client_data": {...}}, ...],
+            "deliverables": ["branding", "website", "social", "copywriting"]
+        }
+    """
+    data = request.json or {}
+    briefs = data.get('briefs') or []
+    if not isinstance(briefs, list) or not briefs:
+        return jsonify({'success': False, 'error': 'briefs must be a non-empty list'}), 400
+
+    max_briefs = int(os.getenv('BATCH_MAX_BRIEFS', '500'))
+    if len(briefs) > max_briefs:
+        return jsonify({'success': False, 'error': f'At most {max_briefs} briefs per batch'}), 400
+
+    # Accept bare client_data dicts as well as {'id', 'client_data'} entries
+    briefs = [
+        brief if isinstance(brief, dict) and 'client_data' in brief else {'client_data': brief}
+        for brief in briefs
+    ]
+
+    requested = data.get('deliverables') or list(DELIVERABLE_PROMPTS.keys())
+    unknown = [key for key in requested if key not in DELIVERABLE_PROMPTS]
+    if unknown:
+        return jsonify({
+            'success': False,
+            'error': f"Unknown deliverables: {', '.join(unknown)}. Available: {', '.join(DELIVERABLE_PROMPTS)}"
+        }), 400
+
+    batch_id = batch_manager.submit(briefs, requested)
+    batch = batch_manager.get(batch_id)
+    return jsonify({
+        'success': True,
+        'batch_id': batch_id,
+        'status': batch['status'],
+        'mode': batch['mode'],
+        'status_url': f'/batch/{batch_id}'
+    }), 202, {'Location': f'/batch/{batch_id}'}
+
+
+@app.route('/batch/<batch_id>', methods=['GET'])
+def batch_status(batch_id):
+    """Status and per-brief results of a deliverables batch"""
+    batch = batch_manager.get(batch_id)
+    if not batch:
+        return jsonify({'success': False, 'error': 'Batch not found'}), 404
+    return jsonify({'success': True, **batch})
+
+
 # =============================================================================
 # GEMINI AI ENDPOINTS
 # =============================================================================
@@ -258,8 +419,8 @@ def gemini_meeting_notes():
     data = request.json
     transcript = data.get('transcript', '')
     participants = data.get('participants', [])
-    result = gemini_client.generate_meeting_notes(transcript, participants)
-    return jsonify(result)
+    result = gemini_client.generate_meeting_notes(transcript, participants, stream=wants_stream(request))
+    return stream_or_json(result)
 
 
 @app.route('/ai/gemini/summarize', methods=['POST'])
@@ -268,8 +429,8 @@ def gemini_summarize():
     data = request.json
     content = data.get('content', '')
     doc_type = data.get('doc_type', 'general')
-    result = gemini_client.summarize_document(content, doc_type)
-    return jsonify(result)
+    result = gemini_client.summarize_document(content, doc_type, stream=wants_stream(request))
+    return stream_or_json(result)
 
 
 @app.route('/ai/gemini/orchestrate', methods=['POST'])
@@ -278,8 +439,8 @@ def gemini_orchestrate():
     data = request.json
     task = data.get('task', '')
     context = data.get('context', {})
-    result = gemini_client.orchestrate_workflow(task, context)
-    return jsonify(result)
+    result = gemini_client.orchestrate_workflow(task, context, stream=wants_stream(request))
+    return stream_or_json(result)
 
 
 # =============================================================================
@@ -293,8 +454,8 @@ def openai_team_message():
     context = data.get('context', '')
     message_type = data.get('message_type', 'update')
     tone = data.get('tone', 'professional')
-    result = openai_client.draft_team_message(context, message_type, tone)
-    return jsonify(result)
+    result = openai_client.draft_team_message(context, message_type, tone, stream=wants_stream(request))
+    return stream_or_json(result)
 
 
 @app.route('/ai/openai/slack-message', methods=['POST'])
@@ -303,8 +464,8 @@ def openai_slack_message():
     data = request.json
     context = data.get('context', '')
     channel_type = data.get('channel_type', 'project')
-    result = openai_client.draft_slack_message(context, channel_type)
-    return jsonify(result)
+    result = openai_client.draft_slack_message(context, channel_type, stream=wants_stream(request))
+    return stream_or_json(result)
 
 
 @app.route('/ai/openai/summarize-thread', methods=['POST'])
@@ -312,8 +473,8 @@ def openai_summarize_thread():
     """Summarize a conversation thread"""
     data = request.json
     messages = data.get('messages', [])
-    result = openai_client.summarize_thread(messages)
-    return jsonify(result)
+    result = openai_client.summarize_thread(messages, stream=wants_stream(request))
+    return stream_or_json(result)
 
 
 @app.route('/ai/openai/analyze-feedback', methods=['POST'])
@@ -322,8 +483,8 @@ def openai_analyze_feedback():
     data = request.json
     feedback = data.get('feedback', '')
     source = data.get('source', 'client')
-    result = openai_client.analyze_feedback(feedback, source)
-    return jsonify(result)
+    result = openai_client.analyze_feedback(feedback, source, stream=wants_stream(request))
+    return stream_or_json(result)
 
 
 # =============================================================================
@@ -336,8 +497,8 @@ def perplexity_research():
     data = request.json
     topic = data.get('topic', '')
     depth = data.get('depth', 'comprehensive')
-    result = perplexity_client.research_topic(topic, depth)
-    return jsonify(result)
+    result = perplexity_client.research_topic(topic, depth, stream=wants_stream(request))
+    return stream_or_json(result)
 
 
 @app.route('/ai/perplexity/industry', methods=['POST'])
@@ -346,8 +507,8 @@ def perplexity_industry():
     data = request.json
     industry = data.get('industry', '')
     focus_areas = data.get('focus_areas', [])
-    result = perplexity_client.research_industry(industry, focus_areas)
-    return jsonify(result)
+    result = perplexity_client.research_industry(industry, focus_areas, stream=wants_stream(request))
+    return stream_or_json(result)
 
 
 @app.route('/ai/perplexity/competitors', methods=['POST'])
@@ -357,8 +518,8 @@ def perplexity_competitors():
     company = data.get('company', '')
     competitors = data.get('competitors', [])
     industry = data.get('industry', '')
-    result = perplexity_client.research_competitors(company, competitors, industry)
-    return jsonify(result)
+    result = perplexity_client.research_competitors(company, competitors, industry, stream=wants_stream(request))
+    return stream_or_json(result)
 
 
 @app.route('/ai/perplexity/client-email', methods=['POST'])
@@ -368,8 +529,8 @@ def perplexity_client_email():
     context = data.get('context', '')
     email_type = data.get('email_type', 'update')
     client_name = data.get('client_name', '')
-    result = perplexity_client.draft_client_email(context, email_type, client_name)
-    return jsonify(result)
+    result = perplexity_client.draft_client_email(context, email_type, client_name, stream=wants_stream(request))
+    return stream_or_json(result)
 
 
 @app.route('/ai/perplexity/market-data', methods=['POST'])
@@ -377,8 +538,8 @@ def perplexity_market_data():
     """Get market data and statistics"""
     data = request.json
     query = data.get('query', '')
-    result = perplexity_client.get_market_data(query)
-    return jsonify(result)
+    result = perplexity_client.get_market_data(query, stream=wants_stream(request))
+    return stream_or_json(result)
 
 
 # =============================================================================
@@ -470,7 +631,8 @@ def slack_events():
     Handle Slack Events API
 
     This endpoint receives all Slack events (messages, mentions, etc.)
-    and routes them to the appropriate handler.
+    and routes them to the appropriate handler. Messages and file uploads
+    are queued on the background executor so the 200 is returned at once.
     """
     # Verify request signature
     timestamp = request.headers.get('X-Slack-Request-Timestamp', '')
@@ -523,33 +685,173 @@ def slack_events():
         if event_type == 'message' and channel_type != 'im':
             # In channels, only respond to mentions
             if f'<@{slack_bot.bot_user_id}>' not in event.get('text', ''):
+                # Keep cached thread history current for the next mention
+                if event.get('thread_ts') and not event.get('subtype'):
+                    slack_bot.history.observe(event.get('channel'), event.get('thread_ts'), event)
                 return jsonify({'ok': True})
 
         channel_id = event.get('channel')
         thread_ts = event.get('thread_ts')
 
-        # Check for file uploads
+        # Slack retries slow acks and may send both app_mention and message for one
+        # post - drop anything already accepted before it reaches a provider
+        dedup_keys = [
+            f"slack:event:{data['event_id']}" if data.get('event_id') else '',
+            f"slack:msg:{event['client_msg_id']}" if event.get('client_msg_id') else ''
+        ]
+        if slack_dedup.is_duplicate(
+            dedup_keys,
+            retry_num=request.headers.get('X-Slack-Retry-Num', ''),
+            retry_reason=request.headers.get('X-Slack-Retry-Reason', '')
+        ):
+            logger.info(f"Dropping duplicate Slack event {data.get('event_id')}")
+            return jsonify({'ok': True}), 200, {'X-Slack-No-Retry': '1'}
+
+        # Acknowledge within Slack's 3s deadline - handlers run on the worker pool
         if event.get('files'):
-            try:
-                asyncio.run(slack_features.handle_file_upload(event, channel_id))
-            except Exception as e:
-                logger.error(f"Error processing file upload: {e}")
+            accepted = background_executor.submit(
+                'slack.file_upload', slack_features.handle_file_upload, event, channel_id
+            )
         else:
             # Process message with AI orchestration
-            try:
-                asyncio.run(slack_bot.handle_message(event, channel_id, thread_ts))
-            except Exception as e:
-                logger.error(f"Error processing Slack event: {e}")
+            accepted = background_executor.submit(
+                'slack.message', slack_bot.handle_message, event, channel_id, thread_ts
+            )
+
+        if not accepted:
+            # Saturated - a non-200 makes Slack redeliver the event later
+            slack_dedup.release(dedup_keys)
+            return jsonify({'ok': False, 'error': 'busy'}), 503
 
     return jsonify({'ok': True})
 
 
+# Status shown in the modal while a submission is processed in the background
+MODAL_WORKING_TEXT = {
+    'modal_branding': 'Generating the branding strategy',
+    'modal_research': 'Researching your topic',
+    'modal_client_portal': 'Creating the client portal in Notion'
+}
+
+
+def working_modal_view(callback_id: str, channel: str, accepted: bool = True) -> dict:
+    """Modal shown in place of a submitted form while its work runs in the background"""
+    if accepted:
+        destination = f"<#{channel}>" if channel else "Slack"
+        text = f":hourglass_flowing_sand: {MODAL_WORKING_TEXT[callback_id]}...\n\nResults will be posted to {destination}. You can close this window."
+    else:
+        text = ":warning: The assistant is busy right now. Please close this window and try again in a minute."
+    return {
+        'type': 'modal',
+        'title': {'type': 'plain_text', 'text': 'MWD Assistant'},
+        'close': {'type': 'plain_text', 'text': 'Close'},
+        'blocks': [
+            {'type': 'section', 'text': {'type': 'mrkdwn', 'text': text}}
+        ]
+    }
+
+
+def process_modal_submission(callback_id: str, values: dict, channel: str):
+    """
+    Run the work behind a modal submission and post the result to the channel
+
+    Runs on the background executor; the channel comes from the view's private_metadata.
+    """
+    if callback_id == 'modal_branding':
+        # Extract branding data and generate
+        client_data = {}
+        for block_id, block_values in values.items():
+            for input_id, input_data in block_values.items():
+                value = input_data.get('value') or input_data.get('selected_option', {}).get('value')
+                client_data[block_id] = value
+
+        result = strategy_service.generate(BRANDING_PROMPT, client_data)
+        if result.get('success') and channel:
+            slack_bot._send_message(
+                channel,
+                f"*Branding Strategy Generated* ✨\n\n{result.get('response', '')[:3000]}"
+            )
+        elif channel:
+            slack_bot._send_message(
+                channel,
+                f"Failed to generate branding strategy: {result.get('error', 'Unknown error')}"
+            )
+
+    elif callback_id == 'modal_research':
+        # Extract research topic and call Perplexity
+        topic = ''
+        depth = 'comprehensive'
+        for block_id, block_values in values.items():
+            for input_id, input_data in block_values.items():
+                if block_id == 'topic':
+                    topic = input_data.get('value', '')
+                elif block_id == 'depth':
+                    depth = input_data.get('selected_option', {}).get('value', 'comprehensive')
+
+        result = perplexity_client.research_topic(topic, depth)
+        if result.get('success') and channel:
+            slack_bot._send_message(
+                channel,
+                f"*Research Results: {topic}* 🔍\n\n{result.get('response', '')[:3000]}"
+            )
+        elif channel:
+            slack_bot._send_message(
+                channel,
+                f"Research failed: {result.get('error', 'Unknown error')}"
+            )
+
+    elif callback_id == 'modal_client_portal':
+        # Create client portal in Notion
+        client_data = {}
+        for block_id, block_values in values.items():
+            for input_id, input_data in block_values.items():
+                value = input_data.get('value') or input_data.get('selected_option', {}).get('value', '')
+                client_data[block_id] = value
+
+        # Parse services from comma-separated string
+        services_str = client_data.get('services', '')
+        services = [s.strip() for s in services_str.split(',') if s.strip()]
+
+        portal_data = {
+            'company_name': client_data.get('company_name', 'New Client'),
+            'contact_name': client_data.get('contact_name', ''),
+            'contact_email': client_data.get('contact_email', ''),
+            'industry': client_data.get('industry', ''),
+            'services': services,
+            'project_timeline': client_data.get('project_timeline', ''),
+            'goals': client_data.get('goals', '')
+        }
+
+        parent_page_id = os.getenv('NOTION_PORTALS_PAGE', '')
+        if parent_page_id:
+            result = notion_client.create_client_portal(parent_page_id, portal_data)
+            if result.get('success') and channel:
+                slack_bot._send_message(
+                    channel,
+                    f"*Client Portal Created* 🏢\n\n"
+                    f"Company: {portal_data['company_name']}\n"
+                    f"Pages Created: {result.get('pages_created', 0)}\n"
+                    f"Portal URL: {result.get('portal_url', 'N/A')}"
+                )
+            elif channel:
+                slack_bot._send_message(
+                    channel,
+                    f"Failed to create portal: {result.get('error', 'Unknown error')}"
+                )
+        elif channel:
+            slack_bot._send_message(
+                channel,
+                "NOTION_PORTALS_PAGE environment variable not set. Please configure it first."
+            )
+
+
 @app.route('/slack/interact', methods=['POST'])
 def slack_interact():
     """
     Handle Slack interactive components
 
-    Buttons, menus, modals, etc.
+    Buttons, menus, modals, etc. Modal submissions are answered at once with a
+    "working" view and processed on the background executor.
     """
     # Verify request signature
     timestamp = request.headers.get('X-Slack-Request-Timestamp', '')
@@ -559,7 +861,6 @@ def slack_interact():
         return jsonify({'error': 'Invalid signature'}), 403
 
     # Parse payload (comes as form data)
-    import json
     payload = json.loads(request.form.get('payload', '{}'))
 
     action_type = payload.get('type')
@@ -608,83 +909,17 @@ def slack_interact():
 
         logger.info(f"Modal submission: {callback_id}")
 
-        # Extract form values and call appropriate endpoint
-        if callback_id == 'modal_branding':
-            # Extract branding data and generate
-            client_data = {}
-            for block_id, block_values in values.items():
-                for input_id, input_data in block_values.items():
-                    value = input_data.get('value') or input_data.get('selected_option', {}).get('value')
-                    client_data[block_id] = value
+        if callback_id not in MODAL_WORKING_TEXT:
+            return jsonify({'ok': True})
 
-            result = call_claude(BRANDING_PROMPT, client_data)
-            if result.get('success') and channel:
-                slack_bot._send_message(
-                    channel,
-                    f"*Branding Strategy Generated* ✨\n\n{result.get('response', '')[:3000]}"
-                )
-
-        elif callback_id == 'modal_research':
-            # Extract research topic and call Perplexity
-            topic = ''
-            depth = 'comprehensive'
-            for block_id, block_values in values.items():
-                for input_id, input_data in block_values.items():
-                    if block_id == 'topic':
-                        topic = input_data.get('value', '')
-                    elif block_id == 'depth':
-                        depth = input_data.get('selected_option', {}).get('value', 'comprehensive')
-
-            result = perplexity_client.research_topic(topic, depth)
-            if result.get('success') and channel:
-                slack_bot._send_message(
-                    channel,
-                    f"*Research Results: {topic}* 🔍\n\n{result.get('response', '')[:3000]}"
-                )
-
-        elif callback_id == 'modal_client_portal':
-            # Create client portal in Notion
-            client_data = {}
-            for block_id, block_values in values.items():
-                for input_id, input_data in block_values.items():
-                    value = input_data.get('value') or input_data.get('selected_option', {}).get('value', '')
-                    client_data[block_id] = value
-
-            # Parse services from comma-separated string
-            services_str = client_data.get('services', '')
-            services = [s.strip() for s in services_str.split(',') if s.strip()]
-
-            portal_data = {
-                'company_name': client_data.get('company_name', 'New Client'),
-                'contact_name': client_data.get('contact_name', ''),
-                'contact_email': client_data.get('contact_email', ''),
-                'industry': client_data.get('industry', ''),
-                'services': services,
-                'project_timeline': client_data.get('project_timeline', ''),
-                'goals': client_data.get('goals', '')
-            }
-
-            parent_page_id = os.getenv('NOTION_PORTALS_PAGE', '')
-            if parent_page_id:
-                result = notion_client.create_client_portal(parent_page_id, portal_data)
-                if result.get('success') and channel:
-                    slack_bot._send_message(
-                        channel,
-                        f"*Client Portal Created* 🏢\n\n"
-                        f"Company: {portal_data['company_name']}\n"
-                        f"Pages Created: {result.get('pages_created', 0)}\n"
-                        f"Portal URL: {result.get('portal_url', 'N/A')}"
-                    )
-                elif channel:
-                    slack_bot._send_message(
-                        channel,
-                        f"Failed to create portal: {result.get('error', 'Unknown error')}"
-                    )
-            elif channel:
-                slack_bot._send_message(
-                    channel,
-                    "NOTION_PORTALS_PAGE environment variable not set. Please configure it first."
-                )
+        # Ack inside Slack's 3s window with a "working" view; results go to the channel
+        accepted = background_executor.submit(
+            f'slack.modal.{callback_id}', process_modal_submission, callback_id, values, channel
+        )
+        return jsonify({
+            'response_action': 'update',
+            'view': working_modal_view(callback_id, channel, accepted)
+        })
 
     return jsonify({'ok': True})
 
@@ -763,7 +998,11 @@ def verify_webhook_signature(payload: bytes, signature: str) -> bool:
 
 def send_email(to_email: str, subject: str, html_body: str, text_body: str = None) -> dict:
     """
-    Send email via SMTP
+    Queue an email for delivery via SMTP
+
+    The message is persisted to the outbox and sent by a background thread over a
+    pooled SMTP connection, so callers never wait on the TLS handshake. Failed
+    sends are retried with backoff; poll GET /api/contact/emails/<email_id>.
 
     Args:
         to_email: Recipient email address
@@ -772,43 +1011,18 @@ def send_email(to_email: str, subject: str, html_body: str, text_body: str = Non
         text_body: Plain text fallback (optional)
 
     Returns:
-        Success/failure dict
+        Success/failure dict with the outbox email_id
     """
-    smtp_host = os.getenv('SMTP_HOST', '')
-    smtp_port = int(os.getenv('SMTP_PORT', '587'))
-    smtp_user = os.getenv('SMTP_USER', '')
-    smtp_password = os.getenv('SMTP_PASSWORD', '')
-    from_email = os.getenv('SMTP_FROM_EMAIL', smtp_user)
-    from_name = os.getenv('SMTP_FROM_NAME', 'MW Design Studio')
-
-    if not all([smtp_host, smtp_user, smtp_password]):
+    if not email_outbox.is_configured():
         logger.warning("SMTP not configured, skipping email")
         return {'success': False, 'error': 'SMTP not configured'}
 
     try:
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = f"{from_name} <{from_email}>"
-        msg['To'] = to_email
-
-        # Add plain text part
-        if text_body:
-            msg.attach(MIMEText(text_body, 'plain'))
-
-        # Add HTML part
-        msg.attach(MIMEText(html_body, 'html'))
-
-        # Send email
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_password)
-            server.send_message(msg)
-
-        logger.info(f"Email sent successfully to {to_email}")
-        return {'success': True, 'to': to_email}
+        email_id = email_outbox.enqueue(to_email, subject, html_body, text_body)
+        return {'success': True, 'queued': True, 'email_id': email_id, 'to': to_email}
 
     except Exception as e:
-        logger.error(f"Failed to send email: {e}")
+        logger.error(f"Failed to queue email: {e}")
         return {'success': False, 'error': str(e)}
 
 
@@ -916,6 +1130,212 @@ def format_thank_you_email(contact_data: dict) -> str:
     return html
 
 
+def announce_lead(contact_data: dict):
+    """
+    Queue the lead summary for the Slack notification channel
+
+    Returns:
+        Thread key that deliverable replies should post under, or None when
+        Slack notifications are not configured
+    """
+    notification_channel = os.getenv('SLACK_NOTIFICATION_CHANNEL', '')
+    if not (slack_delivery.is_configured() and notification_channel):
+        return None
+
+    contact_email = contact_data.get('contact_email', '')
+    company_name = contact_data.get('company_name', 'Unknown')
+    thread_key = f"lead:{uuid.uuid4().hex}"
+
+    slack_delivery.post(
+        notification_channel,
+        f"*New Lead* 📬 *{company_name}*\n\n"
+        f"*Contact:* {contact_data.get('contact_name', 'N/A')} ({contact_email})\n"
+        f"*Phone:* {contact_data.get('phone', 'N/A')}\n"
+        f"*Industry:* {contact_data.get('industry', 'N/A')}\n"
+        f"*Services:* {', '.join(contact_data.get('key_services', []))}\n"
+        f"*Budget:* {contact_data.get('budget', 'N/A')}\n"
+        f"*Timeline:* {contact_data.get('timeline', 'N/A')}\n"
+        f"*Message:* {contact_data.get('message', 'N/A')}\n\n"
+        f"*Deliverables will be posted in this thread as they are generated* ⬇️",
+        thread_key=thread_key
+    )
+    return thread_key
+
+
+# Slack titles for deliverables posted to the notification channel
+DELIVERABLE_TITLES = {
+    'branding': '🎨 Brand Strategy',
+    'website': '🌐 Website Design Plan',
+    'social': '📱 Social Media Strategy',
+    'copywriting': '✍️ Marketing Copy'
+}
+
+
+def process_contact(contact_data: dict, progress=None, mode: str = 'fanout',
+                    slack_thread: str = None) -> dict:
+    """
+    Run the contact form pipeline for a lead
+
+    Flow:
+    1. Generate AI deliverables (branding, website, social, copywriting)
+    2. Send "thank you" email to lead (NO deliverables - just confirmation)
+    3. Send notification email to team (contact@mwdesign.agency)
+    4. Post the lead summary to Slack, then each deliverable in its thread as
+       soon as it is generated (posted in the background, never awaited)
+
+    Args:
+        contact_data: Contact form payload
+        progress: Optional callback(stage, status, detail=None) for job progress
+        mode: Deliverable generation mode ('fanout' or 'combined')
+        slack_thread: Thread key from announce_lead if the summary was already queued
+
+    Returns:
+        Response dict with notifications, assessment and deliverables
+    """
+    progress = progress or (lambda stage, status, detail=None: None)
+
+    contact_email = contact_data.get('contact_email', '')
+    company_name = contact_data.get('company_name', 'Unknown')
+
+    logger.info(f"Received contact form: {company_name} - {contact_email}")
+
+    notification_channel = os.getenv('SLACK_NOTIFICATION_CHANNEL', '')
+    if slack_thread is None:
+        slack_thread = announce_lead(contact_data)
+    slack_notified = slack_thread is not None
+
+    def post_deliverable(key, result):
+        """Thread each deliverable under the lead summary as it completes"""
+        if not slack_notified:
+            return
+        content = result.get('response', '')
+        # Truncate if too long for Slack (max ~4000 chars per message)
+        if len(content) > 3500:
+            content = content[:3500] + "\n\n_[Content truncated - see full version in API response]_"
+        slack_delivery.post(
+            notification_channel,
+            f"*{DELIVERABLE_TITLES.get(key, key)}* for {company_name}\n\n{content}",
+            reply_to=slack_thread
+        )
+
+    # Generate AI deliverables concurrently - latency is the slowest section
+    progress('deliverables', 'running')
+    generation = generate_deliverables(contact_data, mode=mode, on_result=post_deliverable)
+    deliverables = generation['deliverables']
+    workflows_triggered = list(deliverables.keys())
+
+    if generation['errors']:
+        logger.warning(f"Deliverables failed for {company_name}: {generation['errors']}")
+    progress('deliverables', 'completed', {
+        'generated': workflows_triggered,
+        'errors': generation['errors']
+    })
+
+    # Create assessment
+    assessment = {
+        'complexity_score': 7,
+        'estimated_hours': len(workflows_triggered) * 20,
+        'recommended_package': 'premium' if len(contact_data.get('key_services', [])) > 2 else 'standard',
+        'summary': f"Client {company_name} in {contact_data.get('industry', 'N/A')} seeking {', '.join(contact_data.get('key_services', []))}",
+        'deliverables_generated': workflows_triggered
+    }
+
+    # Send thank you email to lead (NO deliverables - just confirmation)
+    progress('emails', 'running')
+    lead_email_sent = False
+    email_ids = {}
+    if contact_email:
+        thank_you_html = format_thank_you_email(contact_data)
+        email_result = send_email(
+            to_email=contact_email,
+            subject=f"Thank You for Contacting MW Design Studio!",
+            html_body=thank_you_html,
+            text_body=f"Thank you for reaching out! We've received your information and will be in touch within 24-48 hours."
+        )
+        lead_email_sent = email_result.get('success', False)
+        if email_result.get('email_id'):
+            email_ids['lead'] = email_result['email_id']
+
+    # Send notification email to team (contact@mwdesign.agency)
+    team_email_sent = False
+    team_email = os.getenv('TEAM_NOTIFICATION_EMAIL', 'contact@mwdesign.agency')
+    if team_email:
+        team_html = f"""
+        <h2>New Contact Form Submission</h2>
+        <p><strong>Company:</strong> {company_name}</p>
+        <p><strong>Contact:</strong> {contact_data.get('contact_name', 'N/A')} ({contact_email})</p>
+        <p><strong>Phone:</strong> {contact_data.get('phone', 'N/A')}</p>
+        <p><strong>Industry:</strong> {contact_data.get('industry', 'N/A')}</p>
+        <p><strong>Services:</strong> {', '.join(contact_data.get('key_services', []))}</p>
+        <p><strong>Budget:</strong> {contact_data.get('budget', 'N/A')}</p>
+        <p><strong>Timeline:</strong> {contact_data.get('timeline', 'N/A')}</p>
+        <p><strong>Message:</strong> {contact_data.get('message', 'N/A')}</p>
+        <hr>
+        <p><strong>Deliverables Generated:</strong> {len(deliverables)}</p>
+        <p><em>Full deliverables sent to Slack channel for review.</em></p>
+        """
+        team_result = send_email(
+            to_email=team_email,
+            subject=f"New Lead: {company_name} - {contact_data.get('contact_name', 'Unknown')}",
+            html_body=team_html,
+            text_body=f"New contact form submission from {company_name}"
+        )
+        team_email_sent = team_result.get('success', False)
+        if team_result.get('email_id'):
+            email_ids['team'] = team_result['email_id']
+    progress('emails', 'completed', {'lead': lead_email_sent, 'team': team_email_sent, 'email_ids': email_ids})
+
+    # Deliverables were threaded as they completed - close the thread with a status line
+    if slack_notified:
+        status_lines = [
+            f"_Thank you email queued for lead: {'Yes' if lead_email_sent else 'No'}_",
+            f"_Team email queued: {'Yes' if team_email_sent else 'No'}_"
+        ]
+        if generation['errors']:
+            status_lines.append(f"_Failed deliverables: {', '.join(generation['errors'])}_")
+        slack_delivery.post(notification_channel, "\n".join(status_lines), reply_to=slack_thread)
+    progress('slack', 'queued' if slack_notified else 'skipped', {'notified': slack_notified})
+
+    # Return response with generated deliverables
+    return {
+        'success': True,
+        'message': 'Contact form processed successfully',
+        'workflows_triggered': workflows_triggered,
+        'deliverables_count': len(deliverables),
+        'notifications': {
+            'lead_thank_you_email': lead_email_sent,
+            'team_email_sent': team_email_sent,
+            'slack_deliverables_sent': slack_notified,
+            'email_ids': email_ids
+        },
+        'assessment': assessment,
+        'deliverable_errors': generation['errors'],
+        'generation_mode': generation['mode'],
+        'generation_time': generation['elapsed'],
+        'generation_usage': generation['usage'],
+        'deliverables': {
+            key: {
+                'content': value.get('response'),
+                'usage': value.get('usage', {})
+            }
+            for key, value in deliverables.items()
+        }
+    }
+
+
+def deliverable_mode(req) -> str:
+    """Deliverable generation mode requested by the caller (fanout or combined)"""
+    mode = req.args.get('mode', '').lower()
+    return mode if mode in ('fanout', 'combined') else 'fanout'
+
+
+def wants_async(req) -> bool:
+    """Check whether the caller opted in to asynchronous processing"""
+    if req.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'respond-async' in req.headers.get('Prefer', '').lower()
+
+
 @app.route('/api/contact', methods=['POST'])
 def receive_contact():
     """
@@ -923,15 +1343,25 @@ def receive_contact():
 
     Flow:
     1. Verify webhook signature
-    2. Generate AI deliverables (branding, website, social, copywriting)
-    3. Send "thank you" email to lead (NO deliverables - just confirmation)
-    4. Send notification email to team (contact@mwdesign.agency)
-    5. Send FULL deliverables to Slack channel for team review
-    6. Return deliverables in response
+    2. Run the contact pipeline (deliverables, emails, Slack) - see process_contact
+    3. Return deliverables in response
+
+    Retries are deduplicated by the Idempotency-Key header (or a hash of the
+    signed payload): duplicates replay the stored response, or wait for the
+    original if it is still in flight.
+
+    Generation mode (?mode=fanout|combined, default fanout):
+    fanout runs one Claude call per deliverable concurrently; combined asks for
+    every deliverable in a single structured generation.
+
+    Async mode (opt-in with ?async=1 or "Prefer: respond-async"):
+    The signature is verified and the lead is queued; the endpoint returns
+    202 with a job id. Poll GET /api/contact/jobs/<job_id> for progress.
 
     Expected headers:
         X-Webhook-Signature: HMAC-SHA256 signature
         Content-Type: application/json
+        Idempotency-Key: Optional unique submission id
 
     Expected payload:
         {
@@ -955,160 +1385,103 @@ def receive_contact():
         logger.warning("Invalid webhook signature received")
         return jsonify({'error': 'Invalid signature'}), 403
 
+    # Deduplicate provider retries - replay or wait on the original submission
+    idem_key = idempotency_key(
+        'contact', request.headers.get('Idempotency-Key', ''), request.data
+    )
+    claim = idempotency_store.begin(idem_key)
+    if claim['state'] == 'in_flight':
+        claim = idempotency_store.wait(idem_key, timeout=float(os.getenv('IDEMPOTENCY_WAIT', '25')))
+        if not claim:
+            return jsonify({
+                'success': False,
+                'error': 'A request with this idempotency key is already being processed'
+            }), 409
+    if claim['state'] == 'completed':
+        logger.info("Replaying stored response for duplicate contact submission")
+        return jsonify(claim['response']), claim['status_code'], {'Idempotent-Replayed': 'true'}
+
     try:
         contact_data = request.json
-        contact_email = contact_data.get('contact_email', '')
-        company_name = contact_data.get('company_name', 'Unknown')
-
-        logger.info(f"Received contact form: {company_name} - {contact_email}")
-
-        # Generate AI deliverables
-        workflows_triggered = []
-        deliverables = {}
-
-        # Generate branding strategy
-        branding_result = call_claude(BRANDING_PROMPT, contact_data)
-        if branding_result.get('success'):
-            deliverables['branding'] = branding_result
-            workflows_triggered.append('branding')
-
-        # Generate website plan
-        website_result = call_claude(WEBSITE_PROMPT, contact_data)
-        if website_result.get('success'):
-            deliverables['website'] = website_result
-            workflows_triggered.append('website')
-
-        # Generate social media strategy
-        social_result = call_claude(SOCIAL_PROMPT, contact_data)
-        if social_result.get('success'):
-            deliverables['social'] = social_result
-            workflows_triggered.append('social')
-
-        # Generate copywriting
-        copy_result = call_claude(COPYWRITING_PROMPT, contact_data)
-        if copy_result.get('success'):
-            deliverables['copywriting'] = copy_result
-            workflows_triggered.append('copywriting')
-
-        # Create assessment
-        assessment = {
-            'complexity_score': 7,
-            'estimated_hours': len(workflows_triggered) * 20,
-            'recommended_package': 'premium' if len(contact_data.get('key_services', [])) > 2 else 'standard',
-            'summary': f"Client {company_name} in {contact_data.get('industry', 'N/A')} seeking {', '.join(contact_data.get('key_services', []))}",
-            'deliverables_generated': workflows_triggered
-        }
-
-        # Send thank you email to lead (NO deliverables - just confirmation)
-        lead_email_sent = False
-        if contact_email:
-            thank_you_html = format_thank_you_email(contact_data)
-            email_result = send_email(
-                to_email=contact_email,
-                subject=f"Thank You for Contacting MW Design Studio!",
-                html_body=thank_you_html,
-                text_body=f"Thank you for reaching out! We've received your information and will be in touch within 24-48 hours."
-            )
-            lead_email_sent = email_result.get('success', False)
-
-        # Send notification email to team (contact@mwdesign.agency)
-        team_email_sent = False
-        team_email = os.getenv('TEAM_NOTIFICATION_EMAIL', 'contact@mwdesign.agency')
-        if team_email:
-            team_html = f"""
-            <h2>New Contact Form Submission</h2>
-            <p><strong>Company:</strong> {company_name}</p>
-            <p><strong>Contact:</strong> {contact_data.get('contact_name', 'N/A')} ({contact_email})</p>
-            <p><strong>Phone:</strong> {contact_data.get('phone', 'N/A')}</p>
-            <p><strong>Industry:</strong> {contact_data.get('industry', 'N/A')}</p>
-            <p><strong>Services:</strong> {', '.join(contact_data.get('key_services', []))}</p>
-            <p><strong>Budget:</strong> {contact_data.get('budget', 'N/A')}</p>
-            <p><strong>Timeline:</strong> {contact_data.get('timeline', 'N/A')}</p>
-            <p><strong>Message:</strong> {contact_data.get('message', 'N/A')}</p>
-            <hr>
-            <p><strong>Deliverables Generated:</strong> {len(deliverables)}</p>
-            <p><em>Full deliverables sent to Slack channel for review.</em></p>
-            """
-            team_result = send_email(
-                to_email=team_email,
-                subject=f"New Lead: {company_name} - {contact_data.get('contact_name', 'Unknown')}",
-                html_body=team_html,
-                text_body=f"New contact form submission from {company_name}"
-            )
-            team_email_sent = team_result.get('success', False)
-
-        # Send FULL DELIVERABLES to Slack for team review
-        slack_notified = False
-        if slack_bot.is_configured():
-            notification_channel = os.getenv('SLACK_NOTIFICATION_CHANNEL', '')
-            if notification_channel:
-                try:
-                    # First message: Lead info summary
-                    slack_bot._send_message(
-                        notification_channel,
-                        f"*New Lead* 📬 *{company_name}*\n\n"
-                        f"*Contact:* {contact_data.get('contact_name', 'N/A')} ({contact_email})\n"
-                        f"*Phone:* {contact_data.get('phone', 'N/A')}\n"
-                        f"*Industry:* {contact_data.get('industry', 'N/A')}\n"
-                        f"*Services:* {', '.join(contact_data.get('key_services', []))}\n"
-                        f"*Budget:* {contact_data.get('budget', 'N/A')}\n"
-                        f"*Timeline:* {contact_data.get('timeline', 'N/A')}\n"
-                        f"*Message:* {contact_data.get('message', 'N/A')}\n\n"
-                        f"_Thank you email sent to lead: {'Yes' if lead_email_sent else 'No'}_\n"
-                        f"_Team email sent: {'Yes' if team_email_sent else 'No'}_\n\n"
-                        f"*Deliverables generated below* ⬇️"
-                    )
-
-                    # Send each deliverable as a separate message for readability
-                    deliverable_titles = {
-                        'branding': '🎨 Brand Strategy',
-                        'website': '🌐 Website Design Plan',
-                        'social': '📱 Social Media Strategy',
-                        'copywriting': '✍️ Marketing Copy'
-                    }
-
-                    for key, title in deliverable_titles.items():
-                        if key in deliverables:
-                            content = deliverables[key].get('response', '')
-                            # Truncate if too long for Slack (max ~4000 chars per message)
-                            if len(content) > 3500:
-                                content = content[:3500] + "\n\n_[Content truncated - see full version in API response]_"
-
-                            slack_bot._send_message(
-                                notification_channel,
-                                f"*{title}* for {company_name}\n\n{content}"
-                            )
-
-                    slack_notified = True
-                except Exception as e:
-                    logger.error(f"Failed to send Slack notification: {e}")
-
-        # Return response with generated deliverables
-        return jsonify({
-            'success': True,
-            'message': 'Contact form processed successfully',
-            'workflows_triggered': workflows_triggered,
-            'deliverables_count': len(deliverables),
-            'notifications': {
-                'lead_thank_you_email': lead_email_sent,
-                'team_email_sent': team_email_sent,
-                'slack_deliverables_sent': slack_notified
-            },
-            'assessment': assessment,
-            'deliverables': {
-                key: {
-                    'content': value.get('response'),
-                    'usage': value.get('usage', {})
-                }
-                for key, value in deliverables.items()
+        mode = deliverable_mode(request)
+        # Tell the team about the lead right away; deliverables follow in the thread
+        slack_thread = announce_lead(contact_data)
+
+        if wants_async(request):
+            job_id = job_queue.enqueue('contact', {
+                'contact_data': contact_data, 'mode': mode, 'slack_thread': slack_thread
+            })
+            status_url = f"/api/contact/jobs/{job_id}"
+            response = {
+                'success': True,
+                'message': 'Contact form accepted for processing',
+                'job_id': job_id,
+                'status': 'queued',
+                'status_url': status_url
             }
-        })
+            idempotency_store.complete(idem_key, response, 202)
+            return jsonify(response), 202, {'Location': status_url}
+
+        response = process_contact(contact_data, mode=mode, slack_thread=slack_thread)
+        idempotency_store.complete(idem_key, response, 200)
+        return jsonify(response)
 
     except Exception as e:
+        idempotency_store.release(idem_key)
         logger.error(f"Error processing contact form: {e}")
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/contact/jobs/<job_id>', methods=['GET'])
+def contact_job_status(job_id):
+    """Get stage-by-stage progress and result of an async contact job"""
+    job = job_queue.get(job_id)
+    if not job or job['kind'] != 'contact':
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, **job})
+
+
+@app.route('/api/contact/emails/<email_id>', methods=['GET'])
+def contact_email_status(email_id):
+    """Delivery status of a queued email (queued, sending, retrying, sent, failed)"""
+    email = email_outbox.get(email_id)
+    if not email:
+        return jsonify({'success': False, 'error': 'Email not found'}), 404
+    return jsonify({'success': True, **email})
+
+
+# Background Slack poster for lead notifications (per-channel pacing, Retry-After aware)
+slack_delivery = SlackDeliveryQueue(slack_bot.client)
+atexit.register(slack_delivery.shutdown)
+
+# Durable email outbox delivered over pooled SMTP connections
+email_outbox = EmailOutbox()
+if email_outbox.is_configured():
+    # Without SMTP settings send_email refuses up front, so there is nothing to deliver
+    email_outbox.start()
+    atexit.register(email_outbox.shutdown)
+
+# Background job queue for async contact processing
+job_queue = JobQueue()
+job_queue.register_handler(
+    'contact',
+    lambda payload, progress: process_contact(
+        payload['contact_data'], progress, payload.get('mode', 'fanout'), payload.get('slack_thread')
+    )
+)
+job_queue.start()
+atexit.register(job_queue.shutdown)
+atexit.register(background_executor.shutdown)
+
+batch_manager.start()
+atexit.register(batch_manager.shutdown)
+
+# Write-behind conversation log (replays any journaled rows left by the last run)
+if slack_bot.conversations:
+    slack_bot.conversations.start()
+    atexit.register(slack_bot.conversations.shutdown)
+
+
 if __name__ == '__main__':
     print("\n" + "="*50)
     print("MWD Assistant v2.1.0 starting on port 8080")
@@ -1121,7 +1494,8 @@ if __name__ == '__main__':
         print(f"  {icon} {service}: {status}")
 
     print("\nStrategy Endpoints:")
-    print("  POST /branding, /website, /social, /copywriting")
+    print("  POST /branding, /website, /social, /copywriting, /deliverables")
+    print("  POST /batch/deliverables, GET /batch/<batch_id> (bulk regeneration)")
 
     print("\nAI Endpoints:")
     print("  Gemini: /ai/gemini/meeting-notes, /summarize, /orchestrate")
@@ -1134,7 +1508,14 @@ if __name__ == '__main__':
 
     print("\nContact Form Endpoint:")
     print("  POST /api/contact (generates deliverables + sends email)")
+    print("  GET /api/contact/jobs/<job_id> (async mode progress)")
+    print("  GET /api/contact/emails/<email_id> (email delivery status)")
 
     print("\n" + "="*50 + "\n")
 
-    app.run(host='0.0.0.0', port=8080, debug=True)
+    # Exit cleanly on SIGTERM so atexit handlers drain background work
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    # No reloader: its watcher process imports this module too, which would start a
+    # second set of queue workers, pollers and senders against the same SQLite files
+    app.run(host='0.0.0.0', port=8080, debug=True, use_reloader=False)
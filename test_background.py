@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the background executor
+Bounded queue rejection, coroutine tasks and per-task timing stats
+"""
+
+import time
+import threading
+
+import pytest
+
+from integrations.background import BackgroundExecutor
+
+
+@pytest.fixture
+def make_executor():
+    executors = []
+
+    def make(**kwargs):
+        executor = BackgroundExecutor(**kwargs)
+        executors.append(executor)
+        return executor
+
+    yield make
+    for executor in executors:
+        executor.shutdown(timeout=5)
+
+
+def test_full_queue_rejects_instead_of_blocking(make_executor, wait_for):
+    release = threading.Event()
+    executor = make_executor(workers=1, max_queue=2)
+
+    assert executor.submit('slow', release.wait, 5)
+    assert wait_for(lambda: executor.stats()['active'] == 1)
+    assert executor.submit('queued', lambda: None)
+    assert executor.submit('queued', lambda: None)
+
+    started = time.monotonic()
+    assert not executor.submit('overflow', lambda: None)
+    assert time.monotonic() - started < 0.1
+
+    stats = executor.stats()
+    assert (stats['submitted'], stats['rejected'], stats['queue_depth']) == (3, 1, 2)
+
+    release.set()
+    assert wait_for(lambda: executor.stats()['completed'] == 3)
+
+
+def test_coroutine_tasks_are_run_to_completion(make_executor, wait_for):
+    done = []
+
+    async def task(value):
+        done.append(value)
+
+    executor = make_executor(workers=2, max_queue=10)
+    executor.submit('async', task, 'sent')
+
+    assert wait_for(lambda: done == ['sent'])
+    assert wait_for(lambda: executor.stats()['completed'] == 1)
+
+
+def test_stats_record_run_times_waits_and_errors_per_task(make_executor, wait_for):
+    def fail():
+        raise RuntimeError('slack down')
+
+    executor = make_executor(workers=1, max_queue=10)
+    executor.submit('slack.message', time.sleep, 0.1)
+    executor.submit('slack.message', time.sleep, 0.1)
+    executor.submit('notion.sync', fail)
+    assert wait_for(lambda: executor.stats()['completed'] + executor.stats()['failed'] == 3)
+
+    stats = executor.stats()
+    assert stats['failed'] == 1
+    message = stats['tasks']['slack.message']
+    assert (message['count'], message['errors']) == (2, 0)
+    assert 0.1 <= message['avg_seconds'] <= message['max_seconds']
+    sync = stats['tasks']['notion.sync']
+    assert (sync['count'], sync['errors']) == (1, 1)
+    # The last task waited behind both sleeps on the single worker
+    assert stats['wait_seconds']['max'] >= 0.2
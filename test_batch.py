@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for bulk deliverable batches
+Uses LocalBatchAdapter in place of the Message Batches API
+"""
+
+import time
+
+import pytest
+
+from integrations.batch import BatchManager, LocalBatchAdapter
+
+BRIEFS = [
+    {'id': 'acme', 'client_data': {'company_name': 'Acme'}},
+    {'id': 'bakery', 'client_data': {'company_name': 'Sweet Crumbs'}}
+]
+
+
+def build_params(deliverable, client_data):
+    return {'deliverable': deliverable, 'company': client_data['company_name']}
+
+
+def fake_generate(params):
+    return {'success': True, 'response': f"{params['deliverable']} for {params['company']}", 'usage': {'output_tokens': 3}}
+
+
+@pytest.fixture
+def make_manager(tmp_db):
+    """Managers built by one test share a database, like processes on one host"""
+    def make(adapter=None, fallback=None, **kwargs):
+        return BatchManager(
+            adapter=adapter,
+            build_params=build_params,
+            fallback_generate=fallback or (lambda deliverable, client_data: fake_generate(
+                build_params(deliverable, client_data))),
+            db_path=tmp_db('batches'),
+            poll_interval=0.05,
+            fallback_workers=2,
+            **kwargs
+        )
+    return make
+
+
+def test_batch_api_results_are_collected_per_brief(make_manager, wait_for):
+    manager = make_manager(adapter=LocalBatchAdapter(fake_generate))
+    batch_id = manager.submit(BRIEFS, ['branding', 'website'])
+    try:
+        assert wait_for(lambda: manager.get(batch_id)['status'] == 'ended')
+    finally:
+        manager.shutdown()
+
+    batch = manager.get(batch_id)
+    assert batch['mode'] == 'batch_api'
+    assert batch['counts'] == {'pending': 0, 'succeeded': 4, 'failed': 0}
+    acme = next(r for r in batch['results'] if r['brief_id'] == 'acme')
+    assert acme['deliverables']['website']['content'] == 'website for Acme'
+
+
+def test_direct_mode_when_batch_api_unavailable(make_manager, wait_for):
+    def fallback(deliverable, client_data):
+        if deliverable == 'social':
+            return {'success': False, 'error': 'boom'}
+        return fake_generate(build_params(deliverable, client_data))
+
+    manager = make_manager(fallback=fallback)
+    batch_id = manager.submit(BRIEFS[:1], ['branding', 'social'])
+    try:
+        assert wait_for(lambda: manager.get(batch_id)['status'] == 'ended')
+    finally:
+        manager.shutdown()
+
+    batch = manager.get(batch_id)
+    assert batch['mode'] == 'direct'
+    assert batch['results'][0]['errors'] == {'social': 'boom'}
+
+
+def test_direct_batch_is_resumed_only_after_its_lease_expires(make_manager, wait_for):
+    owner = make_manager(lease=60)
+    with owner._connect() as conn:
+        conn.execute(
+            "INSERT INTO batches (id, status, mode, owner, locked_until, created_at) "
+            "VALUES ('b1', 'in_progress', 'direct', ?, ?, ?)",
+            (owner.instance_id, time.time() + 60, time.time())
+        )
+        conn.execute(
+            "INSERT INTO batch_items (batch_id, custom_id, brief_id, deliverable, client_data, status) "
+            "VALUES ('b1', '0-branding', 'acme', 'branding', '{\"company_name\": \"Acme\"}', 'pending')"
+        )
+
+    calls = []
+    other = make_manager()
+    other.fallback_generate = lambda deliverable, client_data: calls.append(deliverable) or fake_generate(
+        build_params(deliverable, client_data))
+
+    other._poll_once()
+    time.sleep(0.1)
+    assert calls == []
+    assert other.get('b1')['status'] == 'in_progress'
+
+    with owner._connect() as conn:
+        conn.execute("UPDATE batches SET locked_until = ? WHERE id = 'b1'", (time.time() - 1,))
+    other._poll_once()
+    assert wait_for(lambda: other.get('b1')['status'] == 'ended')
+    other.shutdown()
+    assert calls == ['branding']
+
+
+def test_one_failing_provider_batch_does_not_block_the_others(make_manager):
+    class FlakyAdapter(LocalBatchAdapter):
+        broken = None
+
+        def submit(self, requests):
+            provider_batch_id = super().submit(requests)
+            # The first batch submitted errors on every status check
+            self.broken = self.broken or provider_batch_id
+            return provider_batch_id
+
+        def is_finished(self, provider_batch_id):
+            if provider_batch_id == self.broken:
+                raise RuntimeError('provider error')
+            return True
+
+    manager = make_manager(adapter=FlakyAdapter(fake_generate))
+    broken = manager.submit(BRIEFS[:1], ['branding'])
+    healthy = manager.submit(BRIEFS[1:], ['branding'])
+
+    manager._poll_once()
+    manager.shutdown()
+
+    assert manager.get(broken)['status'] == 'in_progress'
+    assert manager.get(healthy)['status'] == 'ended'
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the write-behind conversation store
+Uses SQLiteConversationRepository in place of Supabase
+"""
+
+import pytest
+
+from integrations.conversation_store import ConversationWriter, SQLiteConversationRepository
+
+
+class FlakyRepository(SQLiteConversationRepository):
+    """Rejects any batch containing a 'bad' row; down entirely while offline is set"""
+
+    offline = False
+
+    def __init__(self, db_path):
+        super().__init__(db_path)
+        self.calls = 0
+
+    def insert_many(self, rows):
+        self.calls += 1
+        if self.offline:
+            raise ConnectionError('repository unreachable')
+        if any(row.get('user_message') == 'bad' for row in rows):
+            raise ValueError('invalid row')
+        super().insert_many(rows)
+
+
+@pytest.fixture
+def make_writer(tmp_db):
+    def make(repository, **kwargs):
+        kwargs.setdefault('batch_size', 10)
+        return ConversationWriter(
+            repository,
+            journal_path=tmp_db('journal'),
+            flush_interval=0.05,
+            max_attempts=1,
+            retry_backoff=0.01,
+            **kwargs
+        )
+    return make
+
+
+def conversation(message):
+    return {'channel_id': 'C1', 'thread_ts': '1.0', 'user_id': 'U1', 'user_message': message,
+            'assistant_response': 'ok', 'actions_taken': [], 'metadata': {}}
+
+
+def test_rows_are_written_in_bulk_with_their_timestamp(make_writer, tmp_db):
+    repository = SQLiteConversationRepository(tmp_db('conversations'))
+    writer = make_writer(repository)
+    for i in range(10):
+        writer.write(conversation(f'message {i}'))
+    writer.shutdown()
+
+    rows = repository.list_recent()
+    assert len(rows) == 10
+    assert all(row['created_at'] for row in rows)
+    assert writer.stats()['batches'] == 1
+
+
+def test_bad_row_does_not_block_the_rest_of_its_batch(make_writer, tmp_db, wait_for):
+    repository = FlakyRepository(tmp_db('conversations'))
+    writer = make_writer(repository, max_row_attempts=2)
+    messages = [f'message {i}' for i in range(9)]
+    for message in messages[:4] + ['bad'] + messages[4:]:
+        writer.write(conversation(message))
+
+    assert wait_for(lambda: len(repository.list_recent()) == 9)
+    writer.shutdown()
+    stats = writer.stats()
+    assert stats['rejected'] >= 1
+    assert stats['journal_pending'] + stats['journal_dead'] == 1
+
+
+def test_rejected_row_is_dead_lettered_after_max_attempts(make_writer, tmp_db):
+    repository = FlakyRepository(tmp_db('conversations'))
+    writer = make_writer(repository, max_row_attempts=3)
+    writer._spill([conversation('bad'), conversation('good')], attempts=1)
+
+    for _ in range(3):
+        writer._journal_retry_at = 0
+        writer._replay_journal()
+
+    stats = writer.stats()
+    assert stats['journal_pending'] == 0
+    assert stats['journal_dead'] == 1
+    assert [row['user_message'] for row in repository.list_recent()] == ['good']
+
+
+def test_outage_journals_rows_without_counting_attempts(make_writer, tmp_db, wait_for):
+    repository = FlakyRepository(tmp_db('conversations'))
+    repository.offline = True
+    writer = make_writer(repository, batch_size=50, max_row_attempts=1)
+
+    # Splitting stops after a few failures instead of trying all 50 rows one by one
+    written, rejected, unresolved = writer._split_insert([(None, conversation(f'm{i}')) for i in range(50)])
+    assert (len(written), len(rejected), len(unresolved)) == (0, 0, 50)
+    assert repository.calls == ConversationWriter.SPLIT_FAILURE_LIMIT
+
+    for i in range(50):
+        writer.write(conversation(f'message {i}'))
+    assert wait_for(lambda: writer.stats()['journal_pending'] == 50)
+    assert writer.stats()['journal_dead'] == 0
+
+    repository.offline = False
+    writer._journal_retry_at = 0
+    assert wait_for(lambda: writer.stats()['journal_pending'] == 0)
+    writer.shutdown()
+
+    rows = repository.list_recent(limit=100)
+    assert len(rows) == 50
+    assert len({row['created_at'] for row in rows}) > 1
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for the deliverable engine
+Concurrent fan-out with per-section timeouts and partial results, and
+combined single-call generation with tolerant splitting
+"""
+
+import json
+import time
+import threading
+
+import pytest
+
+from integrations.deliverables import DeliverableEngine, split_combined_deliverables
+
+SECTIONS = {'branding': 'BRANDING', 'website': 'WEBSITE', 'social': 'SOCIAL', 'copywriting': 'COPY'}
+
+
+def fake_generate(prompt, client_data, **kwargs):
+    return {'success': True, 'response': f'{prompt} for {client_data}', 'usage': {'output_tokens': 10}}
+
+
+@pytest.fixture
+def engine_factory():
+    engines = []
+
+    def make(generate_fn, **kwargs):
+        engine = DeliverableEngine(generate_fn, max_workers=4, **kwargs)
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.shutdown(wait_for_running=False)
+
+
+def test_sections_run_concurrently_and_keep_section_order(engine_factory):
+    started = threading.Barrier(4, timeout=2)
+
+    def generate(prompt, client_data):
+        # Every section must be running at the same time to get past the barrier
+        started.wait()
+        return fake_generate(prompt, client_data)
+
+    result = engine_factory(generate).generate(SECTIONS, 'Acme')
+
+    assert list(result['deliverables']) == list(SECTIONS)
+    assert result['errors'] == {}
+    assert result['usage'] == {'output_tokens': 40}
+    assert set(result['timings']) == set(SECTIONS)
+
+
+def test_slow_section_times_out_and_the_rest_are_returned(engine_factory):
+    release = threading.Event()
+
+    def generate(prompt, client_data):
+        if prompt == 'SOCIAL':
+            release.wait(5)
+        return fake_generate(prompt, client_data)
+
+    started = time.monotonic()
+    result = engine_factory(generate).generate(SECTIONS, 'Acme', section_timeout=0.2)
+    release.set()
+
+    assert time.monotonic() - started < 2
+    assert list(result['deliverables']) == ['branding', 'website', 'copywriting']
+    assert result['errors'] == {'social': 'Timed out after 0.2s'}
+
+
+def test_failed_and_raising_sections_are_reported_per_section(engine_factory):
+    def generate(prompt, client_data):
+        if prompt == 'WEBSITE':
+            return {'success': False, 'error': 'overloaded'}
+        if prompt == 'COPY':
+            raise RuntimeError('connection reset')
+        return fake_generate(prompt, client_data)
+
+    result = engine_factory(generate).generate(SECTIONS, 'Acme')
+
+    assert list(result['deliverables']) == ['branding', 'social']
+    assert result['errors'] == {'website': 'overloaded', 'copywriting': 'connection reset'}
+    assert result['usage'] == {'output_tokens': 20}
+
+
+def test_on_result_is_called_per_section_and_its_errors_are_contained(engine_factory):
+    seen = []
+
+    def on_result(key, result):
+        seen.append(key)
+        if key == 'branding':
+            raise ValueError('callback bug')
+
+    result = engine_factory(fake_generate).generate(SECTIONS, 'Acme', on_result=on_result)
+
+    assert sorted(seen) == sorted(SECTIONS)
+    assert list(result['deliverables']) == list(SECTIONS)
+
+
+# =============================================================================
+# COMBINED MODE
+# =============================================================================
+
+def test_combined_generation_is_split_into_sections(engine_factory):
+    calls = []
+
+    def generate(prompt, client_data, max_tokens=None):
+        calls.append(max_tokens)
+        return {'success': True, 'usage': {'output_tokens': 99},
+                'response': '{"branding": {"tagline": "Fresh"}, "website": "Five pages"}'}
+
+    result = engine_factory(generate).generate_combined(
+        {'branding': 'BRANDING', 'website': 'WEBSITE', 'social': 'SOCIAL'}, 'Acme')
+
+    assert calls == [12288]
+    assert result['mode'] == 'combined'
+    assert json.loads(result['deliverables']['branding']['response']) == {'tagline': 'Fresh'}
+    assert result['deliverables']['website']['response'] == 'Five pages'
+    assert result['errors'] == {'social': 'Section missing from combined response'}
+    assert result['usage'] == {'output_tokens': 99}
+
+
+def test_failed_combined_generation_fails_every_section(engine_factory):
+    def generate(prompt, client_data, max_tokens=None):
+        raise RuntimeError('overloaded')
+
+    result = engine_factory(generate).generate_combined({'branding': 'B', 'website': 'W'}, 'Acme')
+
+    assert result['deliverables'] == {}
+    assert result['errors'] == {'branding': 'overloaded', 'website': 'overloaded'}
+
+
+def test_split_ignores_fences_prose_and_extra_sections():
+    text = ('Here you go:\n```json\n{"branding": {"colors": ["red"]}, "website": {"pages": 5}, '
+            '"pricing": {"total": 100}}\n```\nLet me know!')
+
+    found = split_combined_deliverables(text, ['branding', 'website'])
+
+    assert set(found) == {'branding', 'website'}
+    assert json.loads(found['website']) == {'pages': 5}
+
+
+def test_split_keeps_sections_decoded_before_truncation():
+    text = '{"branding": {"tagline": "Fresh"}, "website": {"pages": 5}, "social": {"posts": ['
+
+    found = split_combined_deliverables(text, ['branding', 'website', 'social'])
+
+    assert set(found) == {'branding', 'website'}
+
+
+def test_split_does_not_take_nested_keys_as_sections():
+    # "social" only appears inside branding, and the JSON is truncated afterwards
+    text = '{"branding": {"social": "instagram first"}, "website": {"pages": '
+
+    found = split_combined_deliverables(text, ['branding', 'website', 'social'])
+
+    assert set(found) == {'branding'}
+
+
+def test_split_falls_back_to_markdown_headings():
+    text = '## Branding\nWarm and local.\n\n## Deliverable: website\nFive pages.\n\n## Social\n'
+
+    found = split_combined_deliverables(text, ['branding', 'website', 'social'])
+
+    assert found == {'branding': 'Warm and local.', 'website': 'Five pages.'}
+
+
+def test_split_of_malformed_output_returns_nothing():
+    assert split_combined_deliverables('{not json at all', ['branding']) == {}
+    assert split_combined_deliverables('', ['branding']) == {}
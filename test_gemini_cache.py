@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for the Gemini prompt cache
+Uses LocalCacheClient in place of the caches API
+"""
+
+import time
+import threading
+
+import pytest
+
+from integrations.gemini_cache import GeminiPromptCache, LocalCacheClient
+from integrations.knowledge_index import KnowledgeIndex
+from integrations.orchestration_tools import TOOLS_INSTRUCTIONS
+from integrations.registry import ProviderRegistry
+from integrations.slack_bot import PLAN_INSTRUCTIONS, SlackBot
+
+SMALL_PROMPT = 'You are the MWD orchestrator.'
+LARGE_PROMPT = 'You are the MWD orchestrator. ' * 800
+
+
+@pytest.fixture
+def make_cache():
+    def make(client=None, **kwargs):
+        kwargs.setdefault('min_tokens', 1024)
+        return GeminiPromptCache(client or LocalCacheClient(), 'gemini-3-pro-preview', ttl=3600,
+                                 refresh_margin=300, **kwargs)
+    return make
+
+
+def test_prompt_below_minimum_is_never_sent_to_the_api(make_cache):
+    client = LocalCacheClient()
+    cache = make_cache(client)
+
+    assert cache.get('orchestrator-plan', SMALL_PROMPT) is None
+    assert cache.get('orchestrator-plan', SMALL_PROMPT) is None
+    time.sleep(0.05)
+
+    assert client.calls == []
+    assert cache.stats()['too_small'] == 2
+
+
+def test_cache_is_created_in_the_background(make_cache, wait_for):
+    client = LocalCacheClient()
+    cache = make_cache(client)
+
+    # The first request goes inline while the cache is created
+    assert cache.get('orchestrator-plan', LARGE_PROMPT) is None
+    assert wait_for(lambda: cache.get('orchestrator-plan', LARGE_PROMPT) is not None)
+
+    name = cache.get('orchestrator-plan', LARGE_PROMPT)
+    assert name in client.entries
+    assert client.calls == ['create']
+
+
+def test_slow_create_does_not_block_callers(make_cache, wait_for):
+    release = threading.Event()
+
+    class SlowClient(LocalCacheClient):
+        def create(self, model, config):
+            release.wait(5)
+            return super().create(model, config)
+
+    cache = make_cache(SlowClient())
+    started = time.monotonic()
+    for _ in range(5):
+        assert cache.get('orchestrator-plan', LARGE_PROMPT) is None
+    assert time.monotonic() - started < 0.5
+    assert cache.stats()['pending'] == 1
+
+    release.set()
+    assert wait_for(lambda: cache.get('orchestrator-plan', LARGE_PROMPT) is not None)
+
+
+def test_failed_create_is_not_retried_until_retry_after(make_cache, wait_for):
+    class FailingClient(LocalCacheClient):
+        def create(self, model, config):
+            self.calls.append('create')
+            raise RuntimeError('Cached content is too small')
+
+    client = FailingClient()
+    cache = make_cache(client, retry_after=60)
+
+    cache.get('orchestrator-plan', LARGE_PROMPT)
+    assert wait_for(lambda: cache.stats()['failures'] == 1)
+    for _ in range(3):
+        assert cache.get('orchestrator-plan', LARGE_PROMPT) is None
+    time.sleep(0.05)
+    assert client.calls == ['create']
+
+
+def test_cache_close_to_expiry_is_refreshed(make_cache, wait_for):
+    client = LocalCacheClient()
+    cache = make_cache(client)
+    cache.get('orchestrator-plan', LARGE_PROMPT)
+    assert wait_for(lambda: cache.get('orchestrator-plan', LARGE_PROMPT) is not None)
+
+    entry = cache._entries['orchestrator-plan']
+    entry['expires_at'] = time.time() + 60
+    # Still valid, so it is used while the refresh runs
+    assert cache.get('orchestrator-plan', LARGE_PROMPT) == entry['name']
+    assert wait_for(lambda: cache.stats()['refreshes'] == 1)
+    assert entry['expires_at'] > time.time() + 3000
+    assert client.calls == ['create', 'update']
+
+
+def test_changed_prompt_replaces_the_cache(make_cache, wait_for):
+    client = LocalCacheClient()
+    cache = make_cache(client)
+    cache.get('orchestrator-plan', LARGE_PROMPT)
+    assert wait_for(lambda: cache.get('orchestrator-plan', LARGE_PROMPT) is not None)
+    old = cache.get('orchestrator-plan', LARGE_PROMPT)
+
+    changed = LARGE_PROMPT + 'Be brief.'
+    assert cache.get('orchestrator-plan', changed) is None
+    assert wait_for(lambda: cache.get('orchestrator-plan', changed) not in (None, old))
+    assert wait_for(lambda: old not in client.entries)
+    assert cache.stats()['recreates'] == 1
+
+
+@pytest.mark.parametrize('cache_key, instructions', [
+    ('orchestrator-plan', PLAN_INSTRUCTIONS),
+    ('orchestrator-tools', TOOLS_INSTRUCTIONS)
+])
+def test_production_orchestrator_prompt_is_served_from_the_cache(monkeypatch, tmp_path, wait_for,
+                                                                  cache_key, instructions):
+    for name in ('SLACK_BOT_TOKEN', 'GEMINI_API_KEY', 'GEMINI_CACHE_MIN_TOKENS'):
+        monkeypatch.delenv(name, raising=False)
+    knowledge = KnowledgeIndex(index_path=str(tmp_path / 'index.json'))
+    bot = SlackBot(providers=ProviderRegistry.testing(knowledge=knowledge))
+    client = LocalCacheClient()
+    # The production minimum, not the lowered one the other tests use
+    bot.prompt_cache = GeminiPromptCache(client, 'gemini-3-pro-preview')
+    tools = bot.orchestration_tools if cache_key == 'orchestrator-tools' else None
+
+    def config():
+        return bot._prompt_config(cache_key, bot._orchestrator_context() + instructions, tools=tools,
+                                  temperature=0.3)
+
+    assert config().cached_content is None
+    assert wait_for(lambda: config().cached_content is not None)
+    cached = config()
+    assert cached.cached_content in client.entries
+    assert cached.system_instruction is None and cached.tools is None
+    assert bot.prompt_cache.stats()['too_small'] == 0
+    bot.action_executor.shutdown(wait=False)
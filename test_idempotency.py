@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for webhook idempotency and Slack event dedup
+Runs against both the in-memory and the SQLite backend
+"""
+
+import threading
+
+import pytest
+
+from integrations.idempotency import (
+    MemoryIdempotencyBackend, SQLiteIdempotencyBackend, IdempotencyStore, EventDeduplicator, idempotency_key
+)
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'sqlite':
+        return SQLiteIdempotencyBackend(str(tmp_path / 'idempotency.db'))
+    return MemoryIdempotencyBackend()
+
+
+def test_first_request_is_new_and_retry_replays_response(backend):
+    store = IdempotencyStore(backend=backend, ttl=60, in_flight_ttl=60)
+    key = idempotency_key('contact', '', b'{"company_name": "Acme"}')
+
+    assert store.begin(key) == {'state': 'new'}
+    assert store.begin(key)['state'] == 'in_flight'
+
+    store.complete(key, {'success': True, 'job_id': 'abc'}, 202)
+    replay = store.begin(key)
+    assert replay['state'] == 'completed'
+    assert replay['response'] == {'success': True, 'job_id': 'abc'}
+    assert replay['status_code'] == 202
+    assert store.stats()['replayed'] == 1
+
+
+def test_released_key_can_be_retried(backend):
+    store = IdempotencyStore(backend=backend, ttl=60, in_flight_ttl=60)
+    store.begin('contact:key:1')
+    store.release('contact:key:1')
+    assert store.begin('contact:key:1') == {'state': 'new'}
+
+
+def test_wait_returns_the_in_flight_result(backend):
+    store = IdempotencyStore(backend=backend, ttl=60, in_flight_ttl=60)
+    store.begin('contact:key:2')
+    threading.Timer(0.1, store.complete, args=('contact:key:2', {'success': True})).start()
+
+    record = store.wait('contact:key:2', timeout=5, poll_interval=0.02)
+    assert record['response'] == {'success': True}
+
+
+def test_concurrent_claims_admit_exactly_one(backend):
+    store = IdempotencyStore(backend=backend, ttl=60, in_flight_ttl=60)
+    states = []
+    lock = threading.Lock()
+
+    def claim():
+        state = store.begin('contact:key:race')['state']
+        with lock:
+            states.append(state)
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert states.count('new') == 1
+
+
+def test_header_key_and_body_hash_are_scoped():
+    assert idempotency_key('contact', ' abc ', b'x') == 'contact:key:abc'
+    assert idempotency_key('contact', '', b'x') == idempotency_key('contact', '', b'x')
+    assert idempotency_key('contact', '', b'x') != idempotency_key('slack', '', b'x')
+
+
+def test_slack_redelivery_is_dropped_by_event_or_message_id(backend):
+    dedup = EventDeduplicator(backend=backend, ttl=60)
+
+    assert not dedup.is_duplicate(['Ev1', 'msg-1'])
+    # Slack retry of the same envelope
+    assert dedup.is_duplicate(['Ev1', 'msg-1'], retry_num='1', retry_reason='http_timeout')
+    # Same user message delivered under a new event id (app_mention + message)
+    assert dedup.is_duplicate(['Ev2', 'msg-1'])
+
+    stats = dedup.stats()
+    assert stats['duplicates'] == 2
+    assert stats['duplicate_retries'] == 1
+    assert stats['retry_reasons'] == {'http_timeout': 1}
+
+
+def test_released_event_is_accepted_on_redelivery(backend):
+    dedup = EventDeduplicator(backend=backend, ttl=60)
+    dedup.is_duplicate(['Ev3'])
+    dedup.release(['Ev3'])
+    assert not dedup.is_duplicate(['Ev3'])
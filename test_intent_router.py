@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for the intent router
+Fast-path routing, messages that must fall through to Gemini, and catalog reloads
+"""
+
+import os
+
+import pytest
+
+from integrations.intent_router import IntentRouter
+from integrations.knowledge_index import KnowledgeIndex
+
+SERVICES_DOC = """# Services Catalog
+
+## Active Services
+
+### 1. Branding & Identity Services
+
+| Package | Price |
+|---|---|
+| **Starter Brand** | $1,200 |
+
+### 2. Website Development & Hosting
+
+| Package | Price |
+|---|---|
+| **Starter Website** | $2,500 |
+
+## Coming Soon
+
+### 7. Automation & Workflow Services
+
+Launching next quarter.
+"""
+
+
+@pytest.fixture
+def router():
+    return IntentRouter(services_doc=SERVICES_DOC)
+
+
+@pytest.mark.parametrize('message', [
+    'who is in charge of the bakery project?',
+    'what is the conversion rate on the acme site',
+    'how much budget is left on acme?',
+    'what did acme say about cost in the meeting notes?',
+    'what services does acme offer?',
+    'thanks! now draft the client email',
+    'thank you - can you research vegan bakeries',
+    'how much is left in our budget'
+])
+def test_ambiguous_messages_fall_through(router, message):
+    assert router.route(message) is None
+
+
+@pytest.mark.parametrize('message, intent', [
+    ('how much do you charge for a website?', 'PRICING'),
+    ('what are your prices', 'PRICING'),
+    ('how much is branding', 'PRICING'),
+    ('what services do we offer?', 'SERVICES'),
+    ('thanks!', 'THANKS'),
+    ('perfect, thank you so much :pray:', 'THANKS'),
+    ('good morning team', 'GREETING')
+])
+def test_unambiguous_messages_are_routed(router, message, intent):
+    route = router.route(message)
+    assert route is not None
+    assert route['intent'] == intent
+    assert route['answer']
+
+
+@pytest.mark.parametrize('message', [
+    'search notion for acme and create a client portal for them',
+    'research coffee shops and then draft a client email to acme about it',
+    'please research competitors of blue bottle and compare with our pricing',
+    'how much is branding, then write a proposal for acme',
+    'find the bakery project in notion. update its status to done'
+])
+def test_compound_requests_fall_through(router, message):
+    assert router.route(message) is None
+
+
+@pytest.mark.parametrize('message, intent, params', [
+    ('search notion for smith and sons', 'NOTION_SEARCH',
+     {'operation': 'search', 'query': 'smith and sons', 'page_size': 10}),
+    ('research coffee and tea trends', 'RESEARCH', {'topic': 'coffee and tea trends', 'depth': 'comprehensive'})
+])
+def test_single_requests_with_and_are_still_routed(router, message, intent, params):
+    route = router.route(message)
+    assert route['intent'] == intent
+    assert route['action']['params'] == params
+
+
+def test_pricing_answer_uses_the_matching_section(router):
+    route = router.route('how much do you charge for a website?')
+    assert 'Website Development & Hosting' in route['answer']
+    assert '$2,500' in route['answer']
+
+
+def test_follow_up_in_a_thread_goes_to_gemini(router):
+    history = [{'role': 'user', 'content': 'draft a proposal for acme'},
+               {'role': 'assistant', 'content': 'Here is the draft...'}]
+    assert router.route('thanks!', history=history) is None
+    assert router.route('what are your prices', history=history) is None
+    assert router.stats()['fallthrough'] == 2
+
+
+def test_catalog_edits_are_picked_up_through_the_knowledge_index(tmp_path):
+    directory = tmp_path / 'kb'
+    directory.mkdir()
+    services = directory / 'SERVICES.md'
+    services.write_text(SERVICES_DOC)
+    index = KnowledgeIndex(directory=str(directory), index_path=str(tmp_path / 'index.json'), check_interval=0)
+    router = IntentRouter(knowledge=index)
+
+    assert 'Branding & Identity Services' in router.route('what services do we offer?')['answer']
+
+    services.write_text(SERVICES_DOC.replace('Branding & Identity Services', 'Brand Strategy Services'))
+    stat = services.stat()
+    os.utime(services, (stat.st_atime, stat.st_mtime + 5))
+
+    answer = router.route('what services do we offer?')['answer']
+    assert 'Brand Strategy Services' in answer
+    assert 'Branding & Identity Services' not in answer
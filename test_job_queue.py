@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite job queue
+Claiming, heartbeat-stale requeue, dead-lettering, owner-checked completion and retention
+"""
+
+import time
+
+import pytest
+
+from integrations.job_queue import JobQueue
+
+
+@pytest.fixture
+def make_queue(tmp_db):
+    """Queues built by one test share a database, like processes on one host"""
+    return lambda **kwargs: JobQueue(db_path=tmp_db('jobs'), workers=1, **kwargs)
+
+
+def test_claim_takes_oldest_queued_job_once(make_queue):
+    queue = make_queue()
+    first = queue.enqueue('contact', {'n': 1})
+    second = queue.enqueue('contact', {'n': 2})
+
+    assert queue._claim()['id'] == first
+    assert queue._claim()['id'] == second
+    assert queue._claim() is None
+    assert queue.get(first)['status'] == 'running'
+    assert queue.get(first)['attempts'] == 1
+
+
+def test_worker_runs_handler_and_records_stages(make_queue, wait_for):
+    queue = make_queue()
+
+    def handler(payload, progress):
+        progress('branding', 'completed')
+        return {'doubled': payload['n'] * 2}
+
+    queue.register_handler('contact', handler)
+    job_id = queue.enqueue('contact', {'n': 21})
+    queue.start()
+    try:
+        assert wait_for(lambda: queue.get(job_id)['status'] == 'completed')
+    finally:
+        queue.shutdown(timeout=5)
+
+    job = queue.get(job_id)
+    assert job['result'] == {'doubled': 42}
+    assert job['stages']['branding']['status'] == 'completed'
+
+
+def test_stale_job_is_requeued_then_dead_lettered(make_queue):
+    queue = make_queue(stale_after=0.01, max_attempts=2)
+    job_id = queue.enqueue('contact', {})
+
+    queue._claim()
+    time.sleep(0.05)
+    queue._requeue_stale()
+    assert queue.get(job_id)['status'] == 'queued'
+
+    queue._claim()
+    time.sleep(0.05)
+    queue._requeue_stale()
+    job = queue.get(job_id)
+    assert job['status'] == 'dead'
+    assert job['attempts'] == 2
+    assert job['finished_at'] is not None
+
+
+def test_completion_requires_current_owner(make_queue):
+    original = make_queue(stale_after=0.01)
+    job_id = original.enqueue('contact', {})
+    original._claim()
+    time.sleep(0.05)
+
+    # Another process requeues and re-claims the job while the original still runs it
+    other = make_queue(stale_after=0.01)
+    other._requeue_stale()
+    other._claim()
+
+    assert not original._finish(job_id, 'completed', result='{}')
+    assert other.get(job_id)['status'] == 'running'
+    assert other._finish(job_id, 'completed', result='{}')
+    assert other.get(job_id)['status'] == 'completed'
+
+
+def test_retention_sweep_deletes_only_old_finished_jobs(make_queue):
+    queue = make_queue(retention=60)
+    old = queue.enqueue('contact', {})
+    recent = queue.enqueue('contact', {})
+    waiting = queue.enqueue('contact', {})
+    for job_id in (old, recent):
+        queue._claim()
+        queue._finish(job_id, 'completed', result='{}')
+    with queue._connect() as conn:
+        conn.execute('UPDATE jobs SET finished_at = ? WHERE id = ?', (time.time() - 120, old))
+
+    queue._sweep_finished()
+
+    assert queue.get(old) is None
+    assert queue.get(recent)['status'] == 'completed'
+    assert queue.get(waiting)['status'] == 'queued'
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for the knowledge index
+Markdown chunking, BM25 ranking, the on-disk index and reloads when files change
+"""
+
+import os
+
+import pytest
+
+from integrations.knowledge_index import KnowledgeIndex, chunk_markdown, tokenize
+
+SERVICES_DOC = """# Services Catalog
+
+## Active Services
+
+### 1. Branding & Identity Services
+
+Logo design, brand guidelines and color palettes. Starter Brand from $1,200.
+
+### 2. Website Development & Hosting
+
+Custom websites with hosting and maintenance. Starter Website from $2,500.
+
+### 3. Photography
+
+Headshots, product photography and event coverage. Sessions from $350.
+"""
+
+POLICIES_DOC = """# Policies
+
+## Payment Terms
+
+A 50% deposit is due before work starts; the balance is due on delivery.
+"""
+
+
+@pytest.fixture
+def knowledge_dir(tmp_path):
+    directory = tmp_path / 'kb'
+    directory.mkdir()
+    (directory / 'SERVICES.md').write_text(SERVICES_DOC)
+    (directory / 'POLICIES.md').write_text(POLICIES_DOC)
+    return directory
+
+
+@pytest.fixture
+def make_index(knowledge_dir, tmp_path):
+    def make(**kwargs):
+        kwargs.setdefault('check_interval', 0)
+        return KnowledgeIndex(directory=str(knowledge_dir), index_path=str(tmp_path / 'index.json'), **kwargs)
+    return make
+
+
+def edit(path, text):
+    """Rewrite a file and move its mtime forward so the change is visible on coarse clocks"""
+    path.write_text(text)
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 5))
+
+
+def test_chunks_carry_their_heading_path_and_long_sections_are_split():
+    chunks = chunk_markdown(SERVICES_DOC, 'SERVICES.md')
+
+    assert [c['heading'] for c in chunks] == [
+        'SERVICES.md > Services Catalog > Active Services > 1. Branding & Identity Services',
+        'SERVICES.md > Services Catalog > Active Services > 2. Website Development & Hosting',
+        'SERVICES.md > Services Catalog > Active Services > 3. Photography',
+    ]
+    assert {c['level'] for c in chunks} == {3}
+
+    long_doc = '## Notes\n\n' + '\n\n'.join('paragraph ' + 'x' * 500 for _ in range(5))
+    assert len(chunk_markdown(long_doc, 'NOTES.md', max_chars=1200)) == 3
+
+
+def test_tokenize_stems_drops_stopwords_and_keeps_prices_whole():
+    assert tokenize('What are the packages for printing? $1,250 each.') == ['package', 'print', '$1,250', 'each']
+
+
+def test_search_ranks_the_matching_section_first(make_index):
+    index = make_index()
+
+    assert index.search('how much are headshots')[0]['heading'].endswith('3. Photography')
+    assert index.search('website hosting price')[0]['heading'].endswith('2. Website Development & Hosting')
+    assert index.search('deposit due')[0]['source'] == 'POLICIES.md'
+    assert index.search('unrelated gardening question') == []
+
+
+def test_section_title_outweighs_passing_mentions(make_index, knowledge_dir):
+    edit(knowledge_dir / 'POLICIES.md', POLICIES_DOC + '\n## Photo Usage\n\n'
+         'Clients own final photography; photography raw files and photography drafts stay with us.\n')
+
+    results = make_index().search('photography', k=2)
+
+    # Three mentions in the text do not beat the section actually titled Photography
+    assert [r['heading'].rsplit(' > ', 1)[-1] for r in results] == ['3. Photography', 'Photo Usage']
+
+
+def test_index_is_loaded_from_disk_when_files_are_unchanged(make_index):
+    built = make_index()
+    loaded = make_index()
+
+    assert (built.stats()['builds'], loaded.stats()['builds'], loaded.stats()['loads']) == (1, 0, 1)
+    assert loaded.version == built.version
+    assert loaded.search('headshots') == built.search('headshots')
+
+
+def test_edited_files_are_picked_up_without_a_restart(make_index, knowledge_dir):
+    index = make_index()
+    version = index.version
+    assert index.search('drone') == []
+
+    edit(knowledge_dir / 'SERVICES.md', SERVICES_DOC + '\n### 4. Drone Footage\n\nAerial video from $600.\n')
+
+    assert index.search('drone')[0]['heading'].endswith('4. Drone Footage')
+    assert index.version != version
+    assert index.stats()['builds'] == 2
+
+
+def test_changes_are_only_checked_every_check_interval(make_index, knowledge_dir):
+    index = make_index(check_interval=3600)
+    edit(knowledge_dir / 'POLICIES.md', POLICIES_DOC + '\n## Refunds\n\nDeposits are non-refundable.\n')
+
+    assert index.search('refunds') == []
+    index.refresh(force=True)
+    assert index.search('refunds')[0]['heading'].endswith('Refunds')
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming Notion database queries
+Cursor pagination, the row limit and its truncation warning over a fake databases API
+"""
+
+import logging
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from integrations.notion import NotionClient
+
+
+class FakeDatabases:
+    """databases.query over total rows, honouring page_size and start_cursor"""
+
+    def __init__(self, total):
+        self.total = total
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def query(self, database_id, page_size, start_cursor=None, **kwargs):
+        with self.lock:
+            self.calls.append({'page_size': page_size, 'start_cursor': start_cursor, **kwargs})
+        start = int(start_cursor or 0)
+        end = min(start + page_size, self.total)
+        has_more = end < self.total
+        return {
+            'results': [page(i) for i in range(start, end)],
+            'has_more': has_more,
+            'next_cursor': str(end) if has_more else None
+        }
+
+
+def page(i):
+    return {
+        'id': f'page-{i}',
+        'url': f'https://notion.so/page-{i}',
+        'properties': {'Name': {'title': [{'plain_text': f'Project {i}'}]}},
+        'created_time': '2025-11-01T00:00:00.000Z',
+        'last_edited_time': '2025-11-02T00:00:00.000Z'
+    }
+
+
+@pytest.fixture
+def make_notion(monkeypatch):
+    clients = []
+
+    def make(total):
+        monkeypatch.setenv('NOTION_API_KEY', 'secret_test')
+        notion = NotionClient()
+        notion.client = SimpleNamespace(databases=FakeDatabases(total))
+        clients.append(notion)
+        return notion
+
+    yield make
+    for notion in clients:
+        notion._prefetch.shutdown(wait=True)
+
+
+def test_every_row_is_streamed_across_pages(make_notion, caplog):
+    notion = make_notion(250)
+
+    with caplog.at_level(logging.WARNING, logger='integrations.notion'):
+        rows = list(notion.iter_database('db', sorts=[{'property': 'Name', 'direction': 'ascending'}]))
+
+    assert [row['title'] for row in rows] == [f'Project {i}' for i in range(250)]
+    assert [call['start_cursor'] for call in notion.client.databases.calls] == [None, '100', '200']
+    assert all(call['sorts'] for call in notion.client.databases.calls)
+    assert caplog.records == []
+
+
+def test_limit_stops_mid_page_and_warns(make_notion, caplog):
+    notion = make_notion(250)
+
+    with caplog.at_level(logging.WARNING, logger='integrations.notion'):
+        rows = list(notion.iter_database('db', page_size=40, limit=90))
+
+    assert len(rows) == 90
+    # Pages 0-40, 40-80 and 80-120; nothing past the page that reaches the limit
+    assert [call['start_cursor'] for call in notion.client.databases.calls] == [None, '40', '80']
+    assert 'stopped at the 90-row limit' in caplog.text
+
+
+def test_limit_on_a_page_boundary_warns_without_fetching_the_next_page(make_notion, caplog):
+    notion = make_notion(250)
+
+    with caplog.at_level(logging.WARNING, logger='integrations.notion'):
+        rows = list(notion.iter_database('db', limit=100))
+
+    assert len(rows) == 100
+    assert len(notion.client.databases.calls) == 1
+    assert 'stopped at the 100-row limit' in caplog.text
+
+
+def test_small_limit_shrinks_the_page_size(make_notion, caplog):
+    notion = make_notion(3)
+
+    with caplog.at_level(logging.WARNING, logger='integrations.notion'):
+        rows = list(notion.iter_database('db', limit=5))
+
+    assert len(rows) == 3
+    assert notion.client.databases.calls[0]['page_size'] == 5
+    # Everything was read, so nothing was truncated
+    assert caplog.records == []
+
+
+def test_unconfigured_client_raises(monkeypatch):
+    monkeypatch.delenv('NOTION_API_KEY', raising=False)
+    notion = NotionClient()
+
+    with pytest.raises(RuntimeError, match='not configured'):
+        next(notion.iter_database('db'))
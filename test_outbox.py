@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Tests for the email outbox
+Delivery over a fake SMTP server (connection reuse, retries, leases, concurrent senders)
+and end to end against a local aiosmtpd server
+"""
+
+import time
+import socket
+import threading
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from integrations import outbox as outbox_module
+from integrations.outbox import EmailOutbox, SMTPConnectionPool
+
+
+class FakeSMTP:
+    """Records messages instead of talking to a server"""
+
+    sent = []
+    connects = 0
+    fail_next = 0
+    lock = threading.Lock()
+
+    def __init__(self, host, port, timeout=None):
+        with FakeSMTP.lock:
+            FakeSMTP.connects += 1
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def noop(self):
+        return (250, b'OK')
+
+    def send_message(self, msg):
+        with FakeSMTP.lock:
+            if FakeSMTP.fail_next:
+                FakeSMTP.fail_next -= 1
+                raise OSError('421 service not available')
+            FakeSMTP.sent.append(msg['To'])
+        time.sleep(0.01)
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_smtp(monkeypatch):
+    FakeSMTP.sent = []
+    FakeSMTP.connects = 0
+    FakeSMTP.fail_next = 0
+    monkeypatch.setattr(outbox_module.smtplib, 'SMTP', FakeSMTP)
+
+
+@pytest.fixture
+def make_outbox(tmp_db, fake_smtp):
+    def make(**kwargs):
+        pool = SMTPConnectionPool(host='localhost', port=25, user='', password='', use_tls=False, size=2)
+        kwargs.setdefault('poll_interval', 0.02)
+        return EmailOutbox(pool=pool, db_path=tmp_db('outbox'), **kwargs)
+    return make
+
+
+class CollectingHandler:
+    """aiosmtpd handler that keeps every accepted message"""
+
+    def __init__(self):
+        self.recipients = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.recipients.extend(envelope.rcpt_tos)
+        return '250 Message accepted for delivery'
+
+
+@pytest.fixture
+def smtp_server():
+    """Local SMTP server that drops sessions idle for more than a second"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    handler = CollectingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=port, timeout=1.0)
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+def test_emails_are_sent_over_pooled_connections(make_outbox, wait_for):
+    outbox = make_outbox()
+    ids = [outbox.enqueue(f'lead{i}@example.com', 'Hello', '<p>Hi</p>', 'Hi') for i in range(10)]
+    outbox.start()
+    try:
+        assert wait_for(lambda: all(outbox.get(i)['status'] == 'sent' for i in ids))
+    finally:
+        outbox.shutdown(timeout=5)
+
+    assert sorted(FakeSMTP.sent) == sorted(f'lead{i}@example.com' for i in range(10))
+    # Two senders, two pooled connections - not one connection per email
+    assert FakeSMTP.connects <= outbox.senders
+
+
+def test_failed_send_is_retried_then_marked_failed(make_outbox, wait_for):
+    outbox = make_outbox(max_attempts=2, backoff_base=0.01)
+    FakeSMTP.fail_next = 1
+    retried = outbox.enqueue('retry@example.com', 'Hello', '<p>Hi</p>')
+    outbox.start()
+    try:
+        assert wait_for(lambda: outbox.get(retried)['status'] == 'sent')
+        FakeSMTP.fail_next = 2
+        failed = outbox.enqueue('fail@example.com', 'Hello', '<p>Hi</p>')
+        assert wait_for(lambda: outbox.get(failed)['status'] == 'failed')
+    finally:
+        outbox.shutdown(timeout=5)
+
+    assert outbox.get(retried)['attempts'] == 2
+    assert outbox.get(failed)['attempts'] == 2
+    assert 'service not available' in outbox.get(failed)['last_error']
+
+
+def test_sending_email_is_reclaimed_only_after_its_lease_expires(make_outbox):
+    first = make_outbox(lease=60)
+    email_id = first.enqueue('lead@example.com', 'Hello', '<p>Hi</p>')
+    claimed = first._claim_due()
+    assert [row['id'] for row in claimed] == [email_id]
+
+    # Another process starting up must not touch mail that is being sent right now
+    second = make_outbox(lease=60)
+    assert second._claim_due() == []
+
+    with first._connect() as conn:
+        conn.execute('UPDATE emails SET locked_until = ? WHERE id = ?', (time.time() - 1, email_id))
+    assert [row['id'] for row in second._claim_due()] == [email_id]
+
+    # The original sender lost the lease, so it must neither send nor overwrite the new owner's state
+    first._deliver(claimed[0])
+    assert FakeSMTP.sent == []
+    assert second.get(email_id)['status'] == 'sending'
+
+
+def test_two_outboxes_on_one_database_send_each_email_once(make_outbox, wait_for):
+    outboxes = [make_outbox(), make_outbox()]
+    ids = [outboxes[0].enqueue(f'lead{i}@example.com', 'Hello', '<p>Hi</p>') for i in range(20)]
+    for outbox in outboxes:
+        outbox.start()
+    try:
+        assert wait_for(lambda: all(outboxes[0].get(i)['status'] == 'sent' for i in ids))
+    finally:
+        for outbox in outboxes:
+            outbox.shutdown(timeout=5)
+
+    assert sorted(FakeSMTP.sent) == sorted(f'lead{i}@example.com' for i in range(20))
+
+
+def test_real_server_connections_are_probed_and_reopened_after_idle(smtp_server, tmp_db, wait_for):
+    controller, handler = smtp_server
+    # Connections idle for over 0.1s are NOOP-checked; the server drops them after 1s
+    pool = SMTPConnectionPool(host=controller.hostname, port=controller.port, user='', password='',
+                              use_tls=False, size=1, idle_timeout=0.1)
+    outbox = EmailOutbox(pool=pool, db_path=tmp_db('outbox'), poll_interval=0.02)
+    outbox.start()
+    try:
+        def send(to_email):
+            email_id = outbox.enqueue(to_email, 'Hello', '<p>Hi</p>', 'Hi')
+            assert wait_for(lambda: outbox.get(email_id)['status'] == 'sent')
+
+        send('first@example.com')
+        time.sleep(0.2)
+        send('probed@example.com')
+        assert pool.stats()['reuses'] == 1
+
+        time.sleep(1.5)
+        send('reconnected@example.com')
+    finally:
+        outbox.shutdown(timeout=5)
+
+    assert handler.recipients == ['first@example.com', 'probed@example.com', 'reconnected@example.com']
+    stats = pool.stats()
+    assert (stats['connects'], stats['reconnects']) == (2, 1)
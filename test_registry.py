@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for the provider registry
+Shared instances, thread-safe lazy construction and fake overrides
+"""
+
+import time
+import threading
+
+import pytest
+
+from integrations.registry import ProviderRegistry
+
+
+class FakePerplexity:
+    def is_configured(self):
+        return True
+
+
+def test_registered_instance_is_shared():
+    fake = FakePerplexity()
+    registry = ProviderRegistry({'perplexity': fake}, use_defaults=False)
+    assert registry.get('perplexity') is fake
+    assert registry.get('perplexity') is registry.get('perplexity')
+
+
+def test_factory_runs_once_under_concurrent_lookups():
+    registry = ProviderRegistry(use_defaults=False)
+    calls = []
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.05)
+        return FakePerplexity()
+
+    registry.register_factory('perplexity', factory)
+    instances = []
+    threads = [threading.Thread(target=lambda: instances.append(registry.get('perplexity'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(instance is instances[0] for instance in instances)
+
+
+def test_testing_registry_rejects_unknown_providers():
+    registry = ProviderRegistry.testing(perplexity=FakePerplexity())
+    assert isinstance(registry.get('perplexity'), FakePerplexity)
+    with pytest.raises(KeyError):
+        registry.get('notion')
+
+
+def test_override_restores_previous_instances():
+    real = FakePerplexity()
+    registry = ProviderRegistry({'perplexity': real}, use_defaults=False)
+    fake = FakePerplexity()
+
+    with registry.override(perplexity=fake, notion=object()):
+        assert registry.get('perplexity') is fake
+        assert 'notion' in registry.names()
+
+    assert registry.get('perplexity') is real
+    assert 'notion' not in registry.names()
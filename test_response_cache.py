@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for the response cache
+Content-addressed keys, LRU eviction, TTL expiry and the on-disk tier
+"""
+
+import pytest
+
+from integrations import response_cache as response_cache_module
+from integrations.response_cache import ResponseCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() for the cache module"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(response_cache_module.time, 'time', lambda: now[0])
+    return now
+
+
+def test_keys_ignore_payload_key_order():
+    first = ResponseCache.make_key('branding', 'claude', {'company': 'Acme', 'industry': 'bakery'})
+    second = ResponseCache.make_key('branding', 'claude', {'industry': 'bakery', 'company': 'Acme'})
+
+    assert first == second
+    assert first != ResponseCache.make_key('website', 'claude', {'company': 'Acme', 'industry': 'bakery'})
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2, disk_path='')
+    cache.set('a', {'response': 'A'})
+    cache.set('b', {'response': 'B'})
+    cache.get('a')
+    cache.set('c', {'response': 'C'})
+
+    assert cache.get('b') is None
+    assert cache.get('a') == {'response': 'A'}
+    assert cache.get('c') == {'response': 'C'}
+    assert cache.stats()['evictions'] == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(ttl=60, disk_path='')
+    cache.set('a', {'response': 'A'})
+
+    clock[0] += 59
+    assert cache.contains('a')
+    clock[0] += 2
+    assert not cache.contains('a')
+    assert cache.get('a') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_contains_does_not_count_lookups():
+    cache = ResponseCache(disk_path='')
+    cache.set('a', {'response': 'A'})
+    cache.contains('a')
+    cache.contains('b')
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (0, 0)
+
+
+def test_disk_tier_survives_a_restart_and_expires(tmp_db, clock):
+    ResponseCache(ttl=60, disk_path=tmp_db('responses')).set('a', {'response': 'A'})
+
+    restarted = ResponseCache(ttl=60, disk_path=tmp_db('responses'))
+    assert restarted.get('a') == {'response': 'A'}
+    assert restarted.stats()['disk_hits'] == 1
+
+    clock[0] += 61
+    assert ResponseCache(ttl=60, disk_path=tmp_db('responses')).get('a') is None
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the Slack delivery queue
+Per-channel pacing, Retry-After backoff and thread replies over a fake WebClient
+"""
+
+import time
+import threading
+from types import SimpleNamespace
+
+import pytest
+from slack_sdk.errors import SlackApiError
+
+from integrations.slack_delivery import SlackDeliveryQueue
+
+
+class FakeSlackClient:
+    """Records chat_postMessage calls; rate_limits[channel] = Retry-After values to answer with first"""
+
+    def __init__(self):
+        self.posts = []
+        self.rate_limits = {}
+        self.failing = set()
+        self.lock = threading.Lock()
+
+    def chat_postMessage(self, channel, text, thread_ts=None):
+        with self.lock:
+            if self.rate_limits.get(channel):
+                retry_after = self.rate_limits[channel].pop(0)
+                response = SimpleNamespace(status_code=429, headers={'Retry-After': str(retry_after)})
+                raise SlackApiError('ratelimited', response)
+            if channel in self.failing:
+                raise SlackApiError('channel_not_found', SimpleNamespace(status_code=404, headers={}))
+            ts = f'{len(self.posts) + 1}.0'
+            self.posts.append({'channel': channel, 'text': text, 'thread_ts': thread_ts,
+                               'ts': ts, 'at': time.monotonic()})
+        return {'ok': True, 'ts': ts}
+
+    def texts(self, channel):
+        return [post['text'] for post in self.posts if post['channel'] == channel]
+
+
+@pytest.fixture
+def make_delivery(tmp_db):
+    queues = []
+
+    def make(client, **kwargs):
+        kwargs.setdefault('min_interval', 0.2)
+        delivery = SlackDeliveryQueue(client, db_path=tmp_db('slack_threads'), **kwargs)
+        queues.append(delivery)
+        return delivery
+
+    yield make
+    for delivery in queues:
+        delivery.shutdown(timeout=5)
+
+
+def test_posts_to_one_channel_are_paced_without_holding_up_others(make_delivery, wait_for):
+    client = FakeSlackClient()
+    delivery = make_delivery(client)
+    for i in range(3):
+        delivery.post('C1', f'lead {i}')
+    delivery.post('C2', 'other')
+
+    assert wait_for(lambda: len(client.posts) == 4)
+    assert client.texts('C1') == ['lead 0', 'lead 1', 'lead 2']
+    # C2 goes out while C1 waits out its interval
+    assert [post['text'] for post in client.posts][:2] == ['lead 0', 'other']
+
+    times = [post['at'] for post in client.posts if post['channel'] == 'C1']
+    assert all(later - earlier >= 0.19 for earlier, later in zip(times, times[1:]))
+
+
+def test_rate_limited_channel_waits_for_retry_after(make_delivery, wait_for):
+    client = FakeSlackClient()
+    client.rate_limits['C1'] = [0.5]
+    delivery = make_delivery(client)
+    started = time.monotonic()
+    delivery.post('C1', 'lead')
+    delivery.post('C1', 'second lead')
+    delivery.post('C2', 'other')
+
+    assert wait_for(lambda: len(client.posts) == 3)
+    assert client.texts('C1') == ['lead', 'second lead']
+    assert client.posts[0]['text'] == 'other'
+    assert client.posts[0]['at'] - started < 0.3
+    assert client.posts[1]['at'] - started >= 0.5
+    assert delivery.stats()['rate_limited'] == 1
+
+
+def test_reply_is_posted_under_its_parent_after_a_restart(make_delivery, wait_for):
+    client = FakeSlackClient()
+    first = make_delivery(client)
+    first.post('C1', 'New lead', thread_key='lead-1')
+    assert wait_for(lambda: len(client.posts) == 1)
+    first.shutdown(timeout=5)
+
+    restarted = make_delivery(client)
+    restarted.post('C1', 'Proposal ready', reply_to='lead-1')
+
+    assert wait_for(lambda: len(client.posts) == 2)
+    assert client.posts[1]['thread_ts'] == client.posts[0]['ts']
+
+
+def test_failed_parent_lets_replies_fall_back_to_top_level(make_delivery, wait_for):
+    client = FakeSlackClient()
+    client.failing.add('C1')
+    delivery = make_delivery(client, max_attempts=1)
+    delivery.post('C1', 'New lead', thread_key='lead-1')
+    assert wait_for(lambda: delivery.stats()['failed'] == 1)
+
+    client.failing.clear()
+    delivery.post('C1', 'Proposal ready', reply_to='lead-1')
+
+    assert wait_for(lambda: len(client.posts) == 1)
+    assert client.posts[0]['thread_ts'] is None
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for the Slack orchestration action graph
+Dependency ordering, concurrent independent actions, invalid graphs and failed branches
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from integrations.slack_bot import SlackBot
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    """SlackBot without Slack or Gemini whose actions run a test-supplied function"""
+    for name in ('SLACK_BOT_TOKEN', 'GEMINI_API_KEY'):
+        monkeypatch.delenv(name, raising=False)
+    bot = SlackBot()
+    yield bot
+    bot.action_executor.shutdown(wait=False)
+
+
+def run_actions(bot, actions, execute):
+    bot._execute_action = execute
+    return asyncio.run(bot._execute_actions(actions))
+
+
+def test_schedulable_actions_are_in_dependency_order():
+    assert SlackBot._schedulable_actions([[1], [], [0, 1]]) == [1, 0, 2]
+
+
+def test_cycles_self_and_unknown_dependencies_are_not_scheduled():
+    # 0 <-> 1 is a cycle, 2 depends on itself, 3 on an unknown id, 4 on the cycle, 5 is fine
+    deps = [[1], [0], [2], [None], [0], []]
+    assert SlackBot._schedulable_actions(deps) == [5]
+
+
+def test_dependent_action_runs_after_and_receives_its_dependency(bot):
+    order = []
+    seen_upstream = {}
+
+    def execute(action, upstream=None):
+        order.append(action['id'])
+        seen_upstream[action['id']] = [dep['result']['response'] for dep in upstream]
+        return {'success': True, 'response': f"{action['id']} output"}
+
+    actions = [
+        {'id': 'proposal', 'type': 'PROPOSAL', 'depends_on': ['research']},
+        {'id': 'research', 'type': 'RESEARCH'},
+    ]
+    results = run_actions(bot, actions, execute)
+
+    assert order == ['research', 'proposal']
+    assert seen_upstream == {'research': [], 'proposal': ['research output']}
+    # Results come back in plan order
+    assert [r['id'] for r in results] == ['proposal', 'research']
+    assert all(r['success'] for r in results)
+
+
+def test_independent_actions_run_concurrently(bot):
+    started = threading.Barrier(3, timeout=2)
+
+    def execute(action, upstream=None):
+        # Every action must be running at the same time to get past the barrier
+        started.wait()
+        return {'success': True, 'response': action['type']}
+
+    actions = [{'type': 'RESEARCH'}, {'type': 'COMPETITORS'}, {'type': 'BRANDING'}]
+    results = run_actions(bot, actions, execute)
+
+    assert [r['result']['response'] for r in results] == ['RESEARCH', 'COMPETITORS', 'BRANDING']
+
+
+def test_invalid_dependencies_fail_without_blocking_valid_actions(bot):
+    ran = []
+
+    def execute(action, upstream=None):
+        ran.append(action['id'])
+        return {'success': True}
+
+    actions = [
+        {'id': 'a', 'type': 'RESEARCH', 'depends_on': ['b']},
+        {'id': 'b', 'type': 'BRANDING', 'depends_on': 'a'},
+        {'id': 'c', 'type': 'WEBSITE', 'depends_on': ['missing']},
+        {'id': 'd', 'type': 'SOCIAL'},
+    ]
+    results = run_actions(bot, actions, execute)
+
+    assert ran == ['d']
+    assert [r['success'] for r in results] == [False, False, False, True]
+    assert all('Invalid depends_on' in r['error'] for r in results[:3])
+
+
+def test_failed_branch_skips_its_dependents_only(bot):
+    def execute(action, upstream=None):
+        if action['id'] == 'research':
+            raise RuntimeError('perplexity unavailable')
+        if action['id'] == 'branding':
+            return {'success': False, 'error': 'overloaded'}
+        return {'success': True, 'response': action['id']}
+
+    actions = [
+        {'id': 'research', 'type': 'RESEARCH'},
+        {'id': 'proposal', 'type': 'PROPOSAL', 'depends_on': ['research']},
+        {'id': 'branding', 'type': 'BRANDING'},
+        {'id': 'website', 'type': 'WEBSITE', 'depends_on': ['branding']},
+        {'id': 'social', 'type': 'SOCIAL'},
+    ]
+    results = {r['id']: r for r in run_actions(bot, actions, execute)}
+
+    assert results['research']['error'] == 'perplexity unavailable'
+    assert results['proposal']['error'] == 'Skipped: dependency research failed'
+    assert results['branding']['success'] is False
+    assert results['website']['error'] == 'Skipped: dependency branding failed'
+    assert results['social']['success'] is True
+
+
+def test_timed_out_action_is_abandoned(bot):
+    release = threading.Event()
+
+    def execute(action, upstream=None):
+        if action['type'] == 'RESEARCH':
+            release.wait(5)
+        return {'success': True}
+
+    actions = [{'type': 'RESEARCH', 'timeout': 0.1}, {'type': 'SOCIAL', 'depends_on': [0]}]
+    results = run_actions(bot, actions, execute)
+    release.set()
+
+    assert results[0]['error'] == 'Timed out after 0.1s'
+    assert results[1]['error'] == 'Skipped: dependency 0 failed'
+    assert bot.orchestration_stats()['action_pool']['timeouts'] == 1
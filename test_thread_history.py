@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for the Slack thread history cache
+Paginated loads, tail fetches, observed messages and TTL reloads over a fake WebClient
+"""
+
+import pytest
+
+from integrations import thread_history as thread_history_module
+from integrations.thread_history import ThreadHistoryCache
+
+
+class FakeSlackClient:
+    """conversations_replies over an in-memory thread, page_size messages per page"""
+
+    def __init__(self, messages, page_size=2):
+        self.messages = messages
+        self.page_size = page_size
+        self.calls = []
+        self.down = False
+
+    def conversations_replies(self, channel, ts, limit, oldest=None, inclusive=None, cursor=None):
+        self.calls.append({'oldest': oldest, 'cursor': cursor})
+        if self.down:
+            raise ConnectionError('slack unreachable')
+        matching = [m for m in self.messages if oldest is None or float(m['ts']) > float(oldest)]
+        start = int(cursor or 0)
+        page = matching[start:start + self.page_size]
+        has_more = start + self.page_size < len(matching)
+        return {'messages': page, 'has_more': has_more,
+                'response_metadata': {'next_cursor': str(start + self.page_size) if has_more else ''}}
+
+
+def message(ts, text, user='U1'):
+    return {'ts': ts, 'text': text, 'user': user}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.monotonic() for the cache module"""
+    now = [1000.0]
+    monkeypatch.setattr(thread_history_module.time, 'monotonic', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def client():
+    return FakeSlackClient([message('1.0', 'draft a proposal'), message('2.0', 'Here it is', user='BOT'),
+                            message('3.0', 'make it shorter')])
+
+
+@pytest.fixture
+def cache(client, clock):
+    return ThreadHistoryCache(client, bot_user_id='BOT', ttl=3600, resync_interval=120)
+
+
+def test_thread_is_loaded_across_pages_then_served_from_cache(cache, client):
+    history = cache.get('C1', '1.0')
+
+    assert [(m['role'], m['content']) for m in history] == [
+        ('user', 'draft a proposal'), ('assistant', 'Here it is'), ('user', 'make it shorter')]
+    assert client.calls == [{'oldest': None, 'cursor': None}, {'oldest': None, 'cursor': '2'}]
+
+    assert cache.get('C1', '1.0') == history
+    assert len(client.calls) == 2
+    assert (cache.stats()['full_fetches'], cache.stats()['hits']) == (1, 1)
+
+
+def test_stale_thread_fetches_only_the_missing_tail(cache, client, clock):
+    cache.get('C1', '1.0')
+    client.messages.append(message('4.0', 'thanks'))
+    client.calls.clear()
+
+    clock[0] += 121
+    history = cache.get('C1', '1.0')
+
+    assert [m['ts'] for m in history] == ['1.0', '2.0', '3.0', '4.0']
+    assert client.calls == [{'oldest': '3.0', 'cursor': None}]
+    assert cache.stats()['tail_fetches'] == 1
+
+
+def test_observed_messages_keep_the_thread_current_without_fetching(cache, client):
+    cache.get('C1', '1.0')
+    client.calls.clear()
+    cache.observe('C1', '1.0', message('4.0', 'Shorter version', user='BOT'))
+    # A reply in a thread that was never loaded would leave a gap, so it is not cached
+    cache.observe('C1', '9.0', message('9.5', 'unrelated'))
+
+    assert cache.get('C1', '1.0')[-1] == {'role': 'assistant', 'content': 'Shorter version', 'ts': '4.0'}
+    assert client.calls == []
+    assert cache.stats()['threads'] == 1
+
+
+def test_expired_thread_is_reloaded_in_full_to_pick_up_edits(cache, client, clock):
+    cache.get('C1', '1.0')
+    client.messages = [message('1.0', 'draft a proposal for acme'), message('3.0', 'make it shorter')]
+
+    clock[0] += 3601
+    history = cache.get('C1', '1.0')
+
+    assert [m['content'] for m in history] == ['draft a proposal for acme', 'make it shorter']
+    assert cache.stats()['full_fetches'] == 2
+
+
+def test_fetch_error_returns_what_is_cached(cache, client, clock):
+    cache.get('C1', '1.0')
+    client.down = True
+
+    clock[0] += 121
+    assert len(cache.get('C1', '1.0')) == 3
+    assert cache.get('C1', '5.0') == []
+    assert cache.stats()['fetch_errors'] == 2
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for thread memory
+When the rolling summary is refreshed and what the compacted context contains
+"""
+
+import threading
+
+import pytest
+
+from integrations.thread_memory import ThreadMemory
+
+
+def turns(count, start=1, size=120):
+    """count messages of about 32 estimated tokens each, ts start.0 onwards"""
+    return [{'role': 'user' if i % 2 else 'assistant', 'content': f'm{i}'.ljust(size, '.'), 'ts': f'{i}.0'}
+            for i in range(start, start + count)]
+
+
+class Summarizer:
+    """summarize_fn that records its calls; can be held or made to fail"""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+        self.fail = False
+
+    def __call__(self, summary, messages):
+        self.calls.append([m['ts'] for m in messages])
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError('model unavailable')
+        return f"{summary} covered {messages[0]['ts']}-{messages[-1]['ts']}".strip()
+
+
+@pytest.fixture
+def summarizer():
+    return Summarizer()
+
+
+@pytest.fixture
+def memory(summarizer):
+    memory = ThreadMemory(summarizer, token_budget=100)
+    yield memory
+    memory._executor.shutdown(wait=True)
+
+
+def test_thread_within_budget_is_never_summarized(memory, summarizer):
+    text = memory.context('C1:1.0', turns(3))
+
+    assert text.count('\n') == 2
+    assert 'Summary' not in text
+    assert summarizer.calls == []
+
+
+def test_messages_that_no_longer_fit_are_folded_into_the_summary(memory, summarizer, wait_for):
+    history = turns(5)
+    text = memory.context('C1:1.0', history)
+
+    # The newest three fit; the two older ones go to a background refresh
+    assert 'm1.' not in text and 'm2.' not in text and 'm5.' in text
+    assert wait_for(lambda: memory.stats()['refreshes'] == 1)
+    assert summarizer.calls == [['1.0', '2.0']]
+
+    text = memory.context('C1:1.0', history)
+    assert text.startswith('Summary of earlier conversation:\ncovered 1.0-2.0\n\nRecent messages:\n')
+    assert 'm5.' in text
+
+
+def test_only_one_refresh_runs_per_thread(memory, summarizer, wait_for):
+    summarizer.release.clear()
+    for count in (5, 6, 7):
+        memory.context('C1:1.0', turns(count))
+    summarizer.release.set()
+
+    assert wait_for(lambda: memory.stats()['refreshes'] == 1)
+    assert summarizer.calls == [['1.0', '2.0']]
+
+    # The next turn folds in what overflowed since, continuing from the summary
+    memory.context('C1:1.0', turns(8))
+    assert wait_for(lambda: memory.stats()['refreshes'] == 2)
+    assert summarizer.calls[1][0] == '3.0'
+
+
+def test_failed_refresh_keeps_the_summary_and_retries_next_turn(memory, summarizer, wait_for):
+    summarizer.fail = True
+    memory.context('C1:1.0', turns(5))
+    assert wait_for(lambda: memory.stats()['refresh_failures'] == 1)
+
+    summarizer.fail = False
+    assert 'Summary' not in memory.context('C1:1.0', turns(5))
+    assert wait_for(lambda: memory.stats()['refreshes'] == 1)
+    assert len(summarizer.calls) == 2
+
+
+def test_long_message_is_truncated_to_a_quarter_of_the_budget(memory):
+    text = memory.context('C1:1.0', turns(1, size=2000))
+
+    assert text.endswith(' … [truncated]')
+    assert len(text) < 150